@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 import os
 
@@ -9,4 +10,5 @@ if project_root not in sys.path:
 from src import main
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Пул процессов склейки в сборке PyInstaller
     main.main()  # Для сохранения относительных импортов
@@ -0,0 +1,14 @@
+import multiprocessing
+import sys
+import os
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src import cli
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(cli.main())  # Без tkinter: для серверов и cron
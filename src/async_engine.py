@@ -0,0 +1,640 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+import hashlib
+import logging
+import os
+from pathlib import Path
+import ssl
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+from . import config
+from .logic import (
+    LibraryHandler,
+    build_page_url,
+    extension_from_content_type,
+    partial_path,
+)
+from .page_cache import PageCache
+from .rate_limiter import THROTTLE_STATUS_CODES, parse_retry_after
+from .types import PageDoneCallback
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Редиректы, по которым asyncio-движок переходит (только в пределах хоста)
+REDIRECT_STATUS_CODES: Tuple[int, ...] = (301, 302, 303, 307, 308)
+
+
+class _HttpError(Exception):
+    """Ответ сервера со статусом 4xx/5xx или редирект, по которому не перешли."""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"{status} {reason}")
+        self.status = status
+
+
+class _HttpResponse:
+    """Ответ, тело которого читается потоком из соединения."""
+
+    def __init__(
+        self,
+        status: int,
+        reason: str,
+        headers: Dict[str, str],
+        connection: "_HttpConnection",
+    ):
+        self.status = status
+        self.reason = reason
+        self.headers = headers  # Ключи в нижнем регистре
+        self._connection = connection
+
+    def iter_body(self) -> AsyncIterator[bytes]:
+        """Отдает тело кусками не больше config.DOWNLOAD_CHUNK_SIZE.
+
+        Соединение можно переиспользовать только после полного чтения тела.
+        """
+        return self._connection.iter_body(self.status, self.headers)
+
+    async def read(self) -> bytes:
+        """Читает тело целиком (для коротких ответов с ошибками)."""
+        return b"".join([chunk async for chunk in self.iter_body()])
+
+
+class _HttpConnection:
+    """Одно keep-alive соединение HTTP/1.1 поверх asyncio streams."""
+
+    def __init__(self, host: str, port: int, ssl_context: Optional[ssl.SSLContext]):
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.reusable = False
+
+    async def _open(self) -> None:
+        connect_timeout, _ = config.REQUEST_TIMEOUT
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                self.host,
+                self.port,
+                ssl=self.ssl_context,
+                server_hostname=self.host if self.ssl_context else None,
+            ),
+            timeout=connect_timeout,
+        )
+        logger.debug(f"Opened connection to {self.host}:{self.port}")
+
+    async def request(self, target: str, headers: Dict[str, str]) -> _HttpResponse:
+        """Отправляет GET и читает статус и заголовки ответа.
+
+        Тело нужно прочитать через _HttpResponse.iter_body() до следующего
+        запроса. Если сервер закрыл простаивающее соединение, переподключается
+        один раз.
+        """
+        fresh = self.writer is None
+        if fresh:
+            await self._open()
+        try:
+            return await self._roundtrip(target, headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            if fresh:
+                raise
+            logger.debug("Keep-alive connection was closed by server, reconnecting")
+            self.close()
+            await self._open()
+            return await self._roundtrip(target, headers)
+
+    async def _roundtrip(self, target: str, headers: Dict[str, str]) -> _HttpResponse:
+        assert self.reader is not None and self.writer is not None
+        _, read_timeout = config.REQUEST_TIMEOUT
+        self.reusable = False
+
+        lines = [f"GET {target} HTTP/1.1", f"Host: {self.host}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        head = await asyncio.wait_for(
+            self.reader.readuntil(b"\r\n\r\n"), timeout=read_timeout
+        )
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        _, status_str, *reason_parts = status_line.split(" ", 2)
+        response_headers: Dict[str, str] = {}
+        for line in header_lines:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                response_headers[name.strip().lower()] = value.strip()
+
+        reason = reason_parts[0] if reason_parts else ""
+        return _HttpResponse(int(status_str), reason, response_headers, self)
+
+    async def iter_body(
+        self, status: int, headers: Dict[str, str]
+    ) -> AsyncIterator[bytes]:
+        assert self.reader is not None
+        _, read_timeout = config.REQUEST_TIMEOUT
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if status in (204, 304) or 100 <= status < 200:
+            pass  # Ответы без тела
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            async for chunk in self._iter_chunked(read_timeout):
+                yield chunk
+        elif "content-length" in headers:
+            async for chunk in self._iter_exactly(
+                int(headers["content-length"]), read_timeout
+            ):
+                yield chunk
+        else:
+            # Без длины тело заканчивается закрытием соединения
+            keep_alive = False
+            while True:
+                chunk = await asyncio.wait_for(
+                    self.reader.read(config.DOWNLOAD_CHUNK_SIZE), timeout=read_timeout
+                )
+                if not chunk:
+                    break
+                yield chunk
+        self.reusable = keep_alive
+
+    async def _iter_exactly(
+        self, size: int, read_timeout: float
+    ) -> AsyncIterator[bytes]:
+        assert self.reader is not None
+        remaining = size
+        while remaining > 0:
+            chunk = await asyncio.wait_for(
+                self.reader.read(min(remaining, config.DOWNLOAD_CHUNK_SIZE)),
+                timeout=read_timeout,
+            )
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            remaining -= len(chunk)
+            yield chunk
+
+    async def _iter_chunked(self, read_timeout: float) -> AsyncIterator[bytes]:
+        assert self.reader is not None
+        while True:
+            size_line = await asyncio.wait_for(
+                self.reader.readuntil(b"\r\n"), timeout=read_timeout
+            )
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                # Пропускаем трейлеры до пустой строки
+                while (
+                    await asyncio.wait_for(
+                        self.reader.readuntil(b"\r\n"), timeout=read_timeout
+                    )
+                ) != b"\r\n":
+                    pass
+                return
+            async for chunk in self._iter_exactly(size, read_timeout):
+                yield chunk
+            await asyncio.wait_for(self.reader.readexactly(2), timeout=read_timeout)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = None
+        self.writer = None
+        self.reusable = False
+
+
+class _ConnectionPool:
+    """Ограниченный пул keep-alive соединений к одному хосту."""
+
+    def __init__(self, base_url: str, size: int):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname or ""
+        is_https = parts.scheme == "https"
+        self.port = parts.port or (443 if is_https else 80)
+        self.ssl_context = ssl.create_default_context() if is_https else None
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[_HttpConnection] = []
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[_HttpConnection]:
+        async with self._slots:
+            conn = (
+                self._idle.pop()
+                if self._idle
+                else _HttpConnection(self.host, self.port, self.ssl_context)
+            )
+            try:
+                yield conn
+            finally:
+                if conn.reusable:
+                    self._idle.append(conn)
+                else:
+                    conn.close()
+
+    def redirect_target(self, target: str, location: str) -> Optional[str]:
+        """Путь для перехода по Location или None, если редирект ведет на другой хост."""
+        url = urljoin(f"{self.scheme}://{self.host}:{self.port}{target}", location)
+        parts = urlsplit(url)
+        default_port = 443 if parts.scheme == "https" else 80
+        if (parts.scheme, parts.hostname, parts.port or default_port) != (
+            self.scheme,
+            self.host,
+            self.port,
+        ):
+            return None
+        return (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+    def close(self) -> None:
+        for conn in self._idle:
+            conn.close()
+        self._idle.clear()
+
+
+class AsyncLibraryHandler(LibraryHandler):
+    """Обработчик с асинхронным движком скачивания.
+
+    Контракт download_pages тот же, что у LibraryHandler, но все страницы
+    ставятся в очередь одного event loop и разбираются небольшим пулом
+    keep-alive соединений. Event loop работает внутри потока, который
+    уже создает TaskManager, поэтому отдельные потоки не нужны.
+    Начальные куки по-прежнему получаются через сессию requests.
+    """
+
+    def download_pages(
+        self,
+        base_url: str,
+        url_ids: str,
+        filename_pdf: str,
+        total_pages: int,
+        output_dir: str,
+        workers: Optional[int] = None,
+        resume: Optional[bool] = None,
+        page_done_callback: Optional[PageDoneCallback] = None,
+    ) -> Tuple[int, int]:
+        """Скачивает все страницы книги асинхронно.
+
+        Args:
+            base_url: Базовый URL до ID.
+            url_ids: ID файла (часть URL).
+            filename_pdf: Имя файла на сайте (используется для кодирования).
+            total_pages: Общее количество страниц.
+            output_dir: Папка для сохранения скачанных страниц.
+            workers: Количество keep-alive соединений. Если None,
+                     используется config.ASYNC_CONNECTIONS.
+            resume: Докачка только недостающих страниц (см. LibraryHandler).
+            page_done_callback: Получатель результатов страниц (см. LibraryHandler).
+
+        Returns:
+            Кортеж (количество успешно скачанных страниц, общее количество страниц).
+        """
+        self.stop_event.clear()
+        self.page_done_callback = page_done_callback
+        connections = max(1, workers or config.ASYNC_CONNECTIONS)
+        prepared = self._prepare_download(
+            base_url, url_ids, filename_pdf, total_pages, output_dir
+        )
+        if prepared is None:
+            return 0, total_pages
+        base_url, url_ids, output_path = prepared
+        pages = self._plan_pages(
+            base_url, url_ids, filename_pdf, total_pages, output_path, resume
+        )
+        done_before = total_pages - len(pages)
+
+        logger.info(f"Using asyncio download engine with {connections} connections")
+        try:
+            success_count = asyncio.run(
+                self._download_all(
+                    base_url,
+                    url_ids,
+                    filename_pdf,
+                    total_pages,
+                    output_path,
+                    connections,
+                    pages,
+                    done_before,
+                )
+            )
+        finally:
+            if self.manifest is not None:
+                self.manifest.save()
+        if self.stop_event.is_set():
+            self.status_callback("--- Скачивание прервано пользователем ---")
+            logger.info("Download interrupted by user.")
+        return self._finish_download(done_before + success_count, total_pages)
+
+    def _request_headers(self, sample_url: str) -> Dict[str, str]:
+        """Заголовки запросов страниц, включая куки из сессии requests."""
+        headers = {
+            "User-Agent": config.DEFAULT_USER_AGENT,
+            "Accept": "*/*",
+            "Connection": "keep-alive",
+        }
+        if self.session is not None:
+            prepared = self.session.prepare_request(requests.Request("GET", sample_url))
+            cookie_header = prepared.headers.get("Cookie")
+            if cookie_header:
+                headers["Cookie"] = str(cookie_header)
+        return headers
+
+    async def _download_all(
+        self,
+        base_url: str,
+        url_ids: str,
+        filename_pdf: str,
+        total_pages: int,
+        output_path: Path,
+        connections: int,
+        pages: list[int],
+        done_before: int,
+    ) -> int:
+        pool = _ConnectionPool(base_url, connections)
+        headers = self._request_headers(base_url)
+        in_flight = asyncio.Semaphore(config.ASYNC_MAX_IN_FLIGHT)
+        completed = done_before
+
+        async def fetch(i: int) -> bool:
+            nonlocal completed
+            async with in_flight:
+                if self.stop_event.is_set():
+                    return False
+                try:
+                    ok = await self._fetch_page(
+                        pool,
+                        headers,
+                        i,
+                        total_pages,
+                        base_url,
+                        url_ids,
+                        filename_pdf,
+                        output_path,
+                    )
+                    if not ok:
+                        self._mark_page_failed(i)
+                    return ok
+                finally:
+                    completed += 1
+                    self.progress_callback(completed, total_pages)
+
+        tasks = [asyncio.create_task(fetch(i)) for i in pages]
+        watcher = asyncio.create_task(self._cancel_on_stop(tasks))
+        try:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            watcher.cancel()
+            pool.close()
+        return sum(1 for result in results if result is True)
+
+    async def _cancel_on_stop(self, tasks: list) -> None:
+        """Отменяет незавершенные задачи, как только выставлен stop_event."""
+        while not self.stop_event.is_set():
+            await asyncio.sleep(0.1)
+        for task in tasks:
+            task.cancel()
+
+    async def _fetch_page(
+        self,
+        pool: _ConnectionPool,
+        headers: Dict[str, str],
+        i: int,
+        total_pages: int,
+        base_url: str,
+        url_ids: str,
+        filename_pdf: str,
+        output_path: Path,
+    ) -> bool:
+        """Асинхронный аналог LibraryHandler._download_page."""
+        try:
+            final_url = build_page_url(base_url, url_ids, filename_pdf, i)
+        except Exception as e:
+            msg = f"Ошибка кодирования URL для стр. {i + 1}: {e}"
+            self.status_callback(msg)
+            logger.error(msg, exc_info=True)
+            return False
+
+        parts = urlsplit(final_url)
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+        final_output_filename = output_path / f"page_{i:03d}"
+
+        self.status_callback(f"Скачиваю страницу {i + 1}/{total_pages}...")
+
+        # Свежая запись кэша отдается без запроса к серверу
+        page_cache = self.page_cache
+        cache_entry = page_cache.lookup(final_url) if page_cache is not None else None
+        if (
+            page_cache is not None
+            and cache_entry is not None
+            and page_cache.is_fresh(cache_entry)
+            and self._restore_cached_page(
+                i, total_pages, cache_entry, final_output_filename
+            )
+        ):
+            return True
+        logger.debug(f"Requesting page {i + 1}: {final_url}")
+        page_headers = {**headers, **PageCache.conditional_headers(cache_entry)}
+
+        content_type = ""
+        digest = hashlib.sha256()
+        etag: Optional[str] = None
+        last_modified: Optional[str] = None
+        not_modified = False
+
+        async def save(response: _HttpResponse) -> Optional[int]:
+            """Пишет тело ответа в файл; None, если пришел HTML или 304."""
+            nonlocal final_output_filename, content_type, digest
+            nonlocal etag, last_modified, not_modified
+            logger.debug(f"Page {i + 1} response status: {response.status}")
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+            if response.status == 304 and cache_entry is not None:
+                await response.read()
+                not_modified = True
+                return None
+            content_type = response.headers.get("content-type", "").lower()
+            if "text/html" in content_type:
+                msg = f"Ошибка на стр. {i + 1}: Получен HTML вместо изображения. Проблема с сессией/URL?"
+                self.status_callback(msg)
+                body = await response.read()
+                preview = body[:200].decode("utf-8", errors="replace")
+                logger.error(f"{msg} URL: {final_url}. Content preview: {preview}")
+                return None
+
+            extension = extension_from_content_type(content_type, i + 1)
+            final_output_filename = final_output_filename.with_suffix(extension)
+            logger.debug(f"Saving page {i + 1} to {final_output_filename}")
+            digest = hashlib.sha256()  # Заново на случай повтора запроса
+            return await _write_body_atomically(response, final_output_filename, digest)
+
+        try:
+            bytes_written = await self._get_with_retry(pool, target, page_headers, save)
+            if not_modified and page_cache is not None and cache_entry is not None:
+                # Not Modified: содержимое берем из кэша
+                page_cache.mark_revalidated(cache_entry, etag, last_modified)
+                return self._restore_cached_page(
+                    i, total_pages, cache_entry, output_path / f"page_{i:03d}"
+                )
+            if bytes_written is None:
+                return False
+            if bytes_written == 0:
+                msg = f"Предупреждение: Файл {final_output_filename.name} пустой."
+                self.status_callback(msg)
+                logger.warning(f"{msg} URL: {final_url}")
+                return False
+            logger.info(
+                f"Page {i + 1}/{total_pages} downloaded successfully as "
+                f"{final_output_filename.name} ({bytes_written} bytes)"
+            )
+            self._mark_page_done(
+                i,
+                final_output_filename,
+                bytes_written,
+                content_type,
+                digest.hexdigest(),
+            )
+            if page_cache is not None:
+                page_cache.store(
+                    final_url,
+                    final_output_filename,
+                    etag,
+                    last_modified,
+                    content_type,
+                    digest.hexdigest(),
+                    bytes_written,
+                )
+            return True
+
+        except _HttpError as e:
+            msg = f"Ошибка HTTP {e.status} на стр. {i + 1} (после {config.MAX_RETRIES} попыток): {e}"
+            self.status_callback(msg)
+            logger.error(f"{msg} URL: {final_url}")
+            if e.status in [401, 403]:
+                self.status_callback(
+                    "   (Возможно, сессия истекла, куки неверны или доступ запрещен)"
+                )
+        except asyncio.TimeoutError:
+            msg = f"Ошибка: Таймаут при скачивании стр. {i + 1} (после {config.MAX_RETRIES} попыток)."
+            self.status_callback(msg)
+            logger.error(f"{msg} URL: {final_url}")
+        except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError) as e:
+            msg = f"Ошибка сети/сервера на стр. {i + 1} (после {config.MAX_RETRIES} попыток): {e}"
+            self.status_callback(msg)
+            logger.error(f"{msg} URL: {final_url}", exc_info=True)
+        except OSError as e:
+            msg = f"Ошибка записи файла для стр. {i + 1}: {e}"
+            self.status_callback(msg)
+            logger.error(f"{msg} Filename: {final_output_filename}", exc_info=True)
+        except Exception as e:
+            msg = f"Неожиданная ошибка на стр. {i + 1}: {e}"
+            self.status_callback(msg)
+            logger.error(f"{msg} URL: {final_url}", exc_info=True)
+        return False
+
+    async def _get_with_retry(
+        self,
+        pool: _ConnectionPool,
+        target: str,
+        headers: Dict[str, str],
+        consume: Callable[[_HttpResponse], Awaitable[_T]],
+    ) -> _T:
+        """GET с повторами по тем же правилам, что и Retry в сессии requests.
+
+        Повторяет при сетевых ошибках, таймаутах и статусах RETRY_ON_HTTP_CODES
+        с задержкой 2 ** попытка секунд, а 429/503 - после паузы лимитера
+        (она учитывает Retry-After). Как и requests, переходит по
+        редиректам, но только в пределах хоста и не больше
+        config.ASYNC_MAX_REDIRECTS раз. Перед каждой попыткой занимает
+        соединение, ждет токен адаптивного лимитера и сообщает ему результат.
+        Успешный ответ передается в consume, пока соединение еще занято, -
+        тело читается потоком прямо из сокета.
+        """
+        attempt = 0
+        redirects = 0
+        while True:
+            location: Optional[str] = None
+            throttled = False
+            started = time.monotonic()
+            try:
+                async with pool.connection() as conn:
+                    # Токен берем, только заняв соединение: иначе вся очередь
+                    # забронирует паузы по начальной скорости, и рост скорости
+                    # их уже не сократит
+                    await asyncio.sleep(self.rate_limiter.reserve())
+                    # Время ожидания соединения и токена не считаем задержкой сервера
+                    started = time.monotonic()
+                    response = await conn.request(target, headers)
+                    retry_after = None
+                    if response.status in THROTTLE_STATUS_CODES:
+                        retry_after = parse_retry_after(
+                            response.headers.get("retry-after")
+                        )
+                    self.rate_limiter.record(
+                        response.status, time.monotonic() - started, retry_after
+                    )
+                    if response.status < 300 or response.status == 304:
+                        return await consume(response)
+                    if response.status in REDIRECT_STATUS_CODES:
+                        location = response.headers.get("location")
+                    await response.read()  # Освобождаем соединение
+            except (
+                ConnectionError,
+                asyncio.TimeoutError,
+                asyncio.IncompleteReadError,
+            ):
+                self.rate_limiter.record(None, time.monotonic() - started)
+                if attempt >= config.MAX_RETRIES:
+                    raise
+            else:
+                next_target = (
+                    pool.redirect_target(target, location) if location else None
+                )
+                if next_target and redirects < config.ASYNC_MAX_REDIRECTS:
+                    redirects += 1
+                    logger.debug(
+                        f"Following redirect {response.status}: {target} -> {next_target}"
+                    )
+                    target = next_target
+                    continue
+                throttled = response.status in THROTTLE_STATUS_CODES
+                if (
+                    not throttled and response.status not in config.RETRY_ON_HTTP_CODES
+                ) or attempt >= config.MAX_RETRIES:
+                    raise _HttpError(response.status, response.reason)
+            attempt += 1
+            logger.debug(f"Retrying {target} (attempt {attempt}/{config.MAX_RETRIES})")
+            if not throttled:  # Паузу для 429/503 выдержит reserve() лимитера
+                await asyncio.sleep(2 ** (attempt - 1))
+
+
+async def _write_body_atomically(
+    response: _HttpResponse, target: Path, digest: Optional[Any] = None
+) -> int:
+    """Асинхронный аналог logic.write_stream_atomically."""
+    temp_path = partial_path(target)
+    bytes_written = 0
+    try:
+        with open(temp_path, "wb") as f:
+            async for chunk in response.iter_body():
+                f.write(chunk)
+                bytes_written += len(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+        if bytes_written == 0:
+            temp_path.unlink()
+            return 0
+        os.replace(temp_path, target)
+    except BaseException:
+        with suppress(OSError):
+            temp_path.unlink()
+        raise
+    return bytes_written
@@ -0,0 +1,373 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import csv
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import threading
+from typing import Any, Callable, Dict, Optional, Union
+
+from . import config
+from .logic import LibraryHandler
+from .manifest import book_identity
+from .rate_limiter import AdaptiveRateLimiter
+from .types import ProgressCallback, StatusCallback, StopEvent
+
+logger = logging.getLogger(__name__)
+
+QUEUE_VERSION: int = 1
+
+# Статусы книг в очереди
+JOB_PENDING: str = "pending"
+JOB_RUNNING: str = "running"
+JOB_DONE: str = "done"
+JOB_PARTIAL: str = "partial"  # Скачаны не все страницы
+JOB_FAILED: str = "failed"
+
+# Создает обработчик книги: (status_callback, progress_callback, stop_event)
+HandlerFactory = Callable[[StatusCallback, ProgressCallback, StopEvent], LibraryHandler]
+
+
+def load_books(path: Union[str, Path], base_url: str) -> list[Dict[str, Any]]:
+    """Читает список книг из JSON (список объектов) или CSV (с заголовком).
+
+    Поля: url_ids, filename_pdf, total_pages и необязательный base_url.
+
+    Args:
+        path: Путь к файлу списка.
+        base_url: Базовый URL для книг, у которых он не указан.
+
+    Returns:
+        Параметры книг в виде manifest.book_identity.
+
+    Raises:
+        ValueError: Если файл не разобран или у книги нет обязательных полей.
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = json.load(f)
+    if not isinstance(rows, list):
+        raise ValueError(f"{path}: ожидается список книг")  # noqa: TRY004
+
+    books = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            total_pages = int(row["total_pages"])
+            url_ids = row["url_ids"].strip()
+            filename_pdf = row["filename_pdf"].strip()
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise ValueError(f"{path}, книга {number}: неверные поля ({e})") from e
+        if total_pages < 1 or not url_ids or not filename_pdf:
+            raise ValueError(f"{path}, книга {number}: пустые поля или 0 страниц")
+        books.append(
+            book_identity(
+                row.get("base_url") or base_url, url_ids, filename_pdf, total_pages
+            )
+        )
+    return books
+
+
+def book_folder_name(book: Dict[str, Any]) -> str:
+    """Имя папки книги в пакете: имя PDF без расширения и ID файла."""
+    name = f"{Path(book['filename_pdf']).stem}_{book['url_ids']}"
+    return re.sub(r"[^\w.-]+", "_", name).strip("._") or "book"
+
+
+class BatchQueue:
+    """Очередь книг пакетного скачивания, сохраняемая на диск.
+
+    Для каждой книги хранит ее параметры, папки страниц и разворотов,
+    статус и итоги последнего запуска. Файл перезаписывается атомарно после
+    каждого изменения статуса, поэтому прерванный пакет продолжается с
+    того же места: готовые книги пропускаются, остальные докачиваются по
+    своим манифестам. Потокобезопасна.
+    """
+
+    def __init__(self, path: Path):
+        """Инициализация пустой очереди.
+
+        Args:
+            path: Путь к файлу очереди.
+        """
+        self.path = path
+        self.jobs: list[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path) -> "BatchQueue":
+        """Читает очередь с диска (пустая, если файла нет или он поврежден).
+
+        Книги, которые выполнялись в момент прерывания, снова ставятся в очередь.
+        """
+        queue = cls(path)
+        try:
+            if not path.is_file():
+                return queue
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != QUEUE_VERSION:
+                logger.warning(f"Batch queue {path} has unknown version, starting anew")
+                return queue
+            queue.jobs = list(data["jobs"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Could not load batch queue {path}: {e}. Starting anew")
+            queue.jobs = []
+        for job in queue.jobs:
+            if job["status"] == JOB_RUNNING:
+                job["status"] = JOB_PENDING
+        logger.info(f"Batch queue loaded from {path}: {len(queue.jobs)} books")
+        return queue
+
+    def add(
+        self,
+        book: Dict[str, Any],
+        output_dir: Union[str, Path],
+        process: bool = True,
+    ) -> bool:
+        """Добавляет книгу, если ее еще нет в очереди.
+
+        Args:
+            book: Параметры книги (manifest.book_identity).
+            output_dir: Папка пакета; страницы и развороты книги лягут
+                        в ее подпапку.
+            process: Создавать ли развороты после скачивания.
+
+        Returns:
+            True, если книга добавлена; False, если она уже в очереди.
+        """
+        book_dir = Path(output_dir) / book_folder_name(book)
+        with self._lock:
+            if any(job["book"] == book for job in self.jobs):
+                return False
+            self.jobs.append(
+                {
+                    "book": book,
+                    "pages_dir": str(book_dir / "pages"),
+                    "spreads_dir": str(book_dir / "spreads"),
+                    "process": process,
+                    "status": JOB_PENDING,
+                    "attempts": 0,
+                    "downloaded": 0,
+                    "spreads": 0,
+                    "error": None,
+                }
+            )
+        return True
+
+    def pending_jobs(self) -> list[int]:
+        """Индексы книг, которые нужно (до)выполнить: все, кроме готовых."""
+        with self._lock:
+            return [i for i, job in enumerate(self.jobs) if job["status"] != JOB_DONE]
+
+    def get(self, index: int) -> Dict[str, Any]:
+        """Копия записи книги."""
+        with self._lock:
+            return dict(self.jobs[index])
+
+    def update(self, index: int, **fields: Any) -> None:
+        """Обновляет запись книги и сохраняет очередь."""
+        with self._lock:
+            self.jobs[index].update(fields)
+        self.save()
+
+    def summary(self) -> Dict[str, int]:
+        """Количество книг по статусам."""
+        counts = dict.fromkeys(
+            (JOB_DONE, JOB_PARTIAL, JOB_FAILED, JOB_PENDING, JOB_RUNNING), 0
+        )
+        with self._lock:
+            for job in self.jobs:
+                counts[job["status"]] += 1
+        return counts
+
+    def save(self) -> bool:
+        """Атомарно сохраняет очередь (через временный файл).
+
+        Returns:
+            True в случае успеха, False при ошибке записи.
+        """
+        with self._lock:
+            data = {"version": QUEUE_VERSION, "jobs": self.jobs}
+            temp_path = self.path.with_name(self.path.name + config.PARTIAL_FILE_SUFFIX)
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=1, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save batch queue {self.path}: {e}")
+                return False
+        return True
+
+
+class BatchRunner:
+    """Выполняет очередь книг с ограничением параллельности.
+
+    Несколько книг скачиваются одновременно, каждая своим обработчиком в
+    page_workers потоков (соединений у asyncio-движка). Общее число
+    одновременных запросов ограничено max_connections, а скорость
+    запросов ко всему сайту - одним общим AdaptiveRateLimiter.
+    """
+
+    def __init__(
+        self,
+        queue: BatchQueue,
+        handler_factory: HandlerFactory,
+        status_callback: StatusCallback,
+        progress_callback: ProgressCallback,
+        stop_event: StopEvent,
+        book_workers: Optional[int] = None,
+        page_workers: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
+        """Инициализация.
+
+        Args:
+            queue: Очередь книг.
+            handler_factory: Создает обработчик для каждой книги.
+            status_callback: Сообщения о статусе (с именем книги в начале).
+            progress_callback: Прогресс скачивания по страницам всего пакета.
+            stop_event: Событие остановки всего пакета.
+            book_workers: Книг одновременно (None - config.BATCH_BOOK_WORKERS).
+            page_workers: Потоков скачивания на книгу
+                          (None - config.DOWNLOAD_WORKERS).
+            max_connections: Одновременных запросов на все книги
+                             (None - config.BATCH_MAX_CONNECTIONS).
+            rate_limiter: Общий лимитер запросов (None - новый по config).
+        """
+        self.queue = queue
+        self.handler_factory = handler_factory
+        self.status_callback = status_callback
+        self.progress_callback = progress_callback
+        self.stop_event = stop_event
+        max_connections = max(1, max_connections or config.BATCH_MAX_CONNECTIONS)
+        self.page_workers = min(
+            max(1, page_workers or config.DOWNLOAD_WORKERS), max_connections
+        )
+        self.book_workers = min(
+            max(1, book_workers or config.BATCH_BOOK_WORKERS),
+            max_connections // self.page_workers,
+        )
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self._lock = threading.Lock()
+        self._job_stop_events: Dict[int, threading.Event] = {}
+        self._job_progress: Dict[int, int] = {}
+        self._total_pages = 0
+
+    def run(self) -> Dict[str, int]:
+        """Выполняет все невыполненные книги очереди.
+
+        Returns:
+            Количество книг по статусам после запуска (BatchQueue.summary).
+        """
+        pending = self.queue.pending_jobs()
+        if not pending:
+            self.status_callback("Все книги пакета уже скачаны.")
+            return self.queue.summary()
+
+        self._total_pages = sum(
+            self.queue.get(i)["book"]["total_pages"] for i in pending
+        )
+        self._job_progress = dict.fromkeys(pending, 0)
+        self.status_callback(
+            f"Пакет: {len(pending)} книг, {self._total_pages} стр. "
+            f"(книг одновременно: {self.book_workers}, "
+            f"потоков на книгу: {self.page_workers})"
+        )
+        logger.info(
+            f"Batch started: {len(pending)} books, {self.book_workers} book workers, "
+            f"{self.page_workers} page workers"
+        )
+
+        with ThreadPoolExecutor(
+            max_workers=self.book_workers, thread_name_prefix="BatchBook"
+        ) as executor:
+            not_done = {executor.submit(self._run_job, i) for i in pending}
+            while not_done:
+                _, not_done = wait(not_done, timeout=0.2, return_when=FIRST_COMPLETED)
+                if self.stop_event.is_set():
+                    # Повторяем на каждом шаге: download_pages сбрасывает событие
+                    # при старте, и сигнал не должен потеряться
+                    with self._lock:
+                        for job_stop in self._job_stop_events.values():
+                            job_stop.set()
+
+        summary = self.queue.summary()
+        if self.stop_event.is_set():
+            self.status_callback("--- Пакет прерван, очередь сохранена ---")
+        self.status_callback(
+            f"Пакет: готово {summary[JOB_DONE]}, частично {summary[JOB_PARTIAL]}, "
+            f"с ошибкой {summary[JOB_FAILED]}, в очереди {summary[JOB_PENDING]}."
+        )
+        logger.info(f"Batch finished: {summary}")
+        return summary
+
+    def _report_progress(self, index: int, current: int) -> None:
+        with self._lock:
+            self._job_progress[index] = current
+            done = sum(self._job_progress.values())
+        self.progress_callback(done, self._total_pages)
+
+    def _run_job(self, index: int) -> None:
+        """Скачивает (и обрабатывает) одну книгу, записывая итог в очередь."""
+        job = self.queue.get(index)
+        book = job["book"]
+        name = book["filename_pdf"]
+        job_stop = threading.Event()
+        with self._lock:
+            self._job_stop_events[index] = job_stop
+        try:
+            if self.stop_event.is_set():
+                return
+            self.queue.update(index, status=JOB_RUNNING, attempts=job["attempts"] + 1)
+            logger.info(f"Batch book started: {name} ({book['url_ids']})")
+            handler = self.handler_factory(
+                lambda message: self.status_callback(f"[{name}] {message}"),
+                lambda current, total: self._report_progress(index, current),
+                job_stop,
+            )
+            handler.rate_limiter = self.rate_limiter
+
+            success_count, total_pages = handler.download_pages(
+                book["base_url"],
+                book["url_ids"],
+                name,
+                book["total_pages"],
+                job["pages_dir"],
+                workers=self.page_workers,
+                resume=True,
+            )
+            spread_count = 0
+            if success_count and job["process"] and not job_stop.is_set():
+                # Прогресс пакета считаем только по скачиванию
+                handler.progress_callback = lambda current, total: None
+                _, spread_count = handler.process_images(
+                    job["pages_dir"], job["spreads_dir"]
+                )
+
+            if job_stop.is_set():
+                status = JOB_PENDING
+            elif success_count == total_pages:
+                status = JOB_DONE
+            else:
+                status = JOB_PARTIAL if success_count else JOB_FAILED
+            self.queue.update(
+                index,
+                status=status,
+                downloaded=success_count,
+                spreads=spread_count,
+                error=None,
+            )
+            logger.info(f"Batch book {name}: {status}, {success_count}/{total_pages}")
+        except Exception as e:
+            logger.error(f"Batch book {name} failed: {e}", exc_info=True)
+            self.status_callback(f"[{name}] Ошибка: {e}")
+            self.queue.update(index, status=JOB_FAILED, error=str(e))
+        finally:
+            with self._lock:
+                del self._job_stop_events[index]
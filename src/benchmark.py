@@ -0,0 +1,511 @@
+import base64
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+import json
+import logging
+import multiprocessing
+from pathlib import Path
+import platform
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import unquote
+
+from PIL import Image, ImageDraw
+
+from . import config, image_processing, logic, utils
+from .async_engine import AsyncLibraryHandler
+from .rate_limiter import AdaptiveRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Размер синтетической страницы: A4 при 150 dpi
+SAMPLE_PAGE_SIZE: Tuple[int, int] = (1240, 1754)
+A4_INCHES: Tuple[float, float] = (8.27, 11.69)
+
+# Наборы страниц для замера обработки
+BOOKS: Tuple[str, ...] = ("grayscale", "colour", "mixed")
+
+
+class ComposeBenchmark(NamedTuple):
+    """Результат замера склейки одного вида книги."""
+
+    book: str  # "grayscale", "grayscale-as-rgb" (прежняя склейка) или "colour"
+    mode: str  # Режим получившегося разворота
+    seconds: float  # Лучшее время склейки одного разворота
+    size_bytes: int  # Размер файла разворота
+
+
+def make_sample_page(size: Tuple[int, int], mode: str, seed: int = 0) -> Image.Image:
+    """Синтетическая текстовая страница: шум бумаги и строки «текста».
+
+    Цветная ("RGB") - та же страница с желтоватым оттенком бумаги, как у
+    цветного скана текстовой страницы.
+    """
+    width, height = size
+    paper = Image.effect_noise(size, 12).point(lambda v: min(255, v + 100))
+    draw = ImageDraw.Draw(paper)
+    margin = width // 10
+    line_height = max(height // 60, 4)
+    for row, top in enumerate(range(margin, height - margin, line_height * 2)):
+        line_width = (width - 2 * margin) * (60 + (row * 37 + seed * 11) % 40) // 100
+        draw.rectangle((margin, top, margin + line_width, top + line_height), fill=40)
+    if mode == "L":
+        return paper
+    return Image.merge(
+        "RGB",
+        (
+            paper,
+            paper.point(lambda v: v * 97 // 100),
+            paper.point(lambda v: v * 85 // 100),
+        ),
+    )
+
+
+def _compose_as_rgb(pages: Sequence[Path], output: Path, jpeg_quality: int) -> None:
+    # Прежняя склейка для сравнения: всегда RGB-холст и копии страниц в RGB
+    with Image.open(pages[0]) as left, Image.open(pages[1]) as right:
+        spread = Image.new(
+            "RGB", (left.width + right.width, left.height), (255, 255, 255)
+        )
+        spread.paste(left.convert("RGB"), (0, 0))
+        spread.paste(right.convert("RGB"), (left.width, 0))
+        spread.save(output, "JPEG", quality=jpeg_quality, optimize=True)
+
+
+def benchmark_compose(
+    folder: Path,
+    page_size: Tuple[int, int] = SAMPLE_PAGE_SIZE,
+    repeat: int = 3,
+    jpeg_quality: int = 95,
+) -> list[ComposeBenchmark]:
+    """Сравнивает склейку серых и цветных страниц одного содержания.
+
+    Страницы сохраняются в folder как JPEG, разворот собирается через
+    Pillow (без jpegtran) кодировщиком JPEG по умолчанию. Серая книга
+    замеряется и прежним способом - с разворотом в RGB.
+
+    Args:
+        folder: Папка для страниц и разворотов (существующая).
+        page_size: Размер страницы.
+        repeat: Повторов, берется лучшее время.
+        jpeg_quality: Качество JPEG разворота.
+
+    Returns:
+        Результаты для серой книги, серой книги в RGB и цветной книги.
+    """
+    books: Dict[str, list[Path]] = {}
+    for mode in ("L", "RGB"):
+        books[mode] = []
+        for number in (1, 2):
+            page_path = folder / f"page_{mode}_{number:03d}.jpg"
+            make_sample_page(page_size, mode, number).save(page_path, quality=90)
+            books[mode].append(page_path)
+
+    def compose(pages: Sequence[Path], output: Path) -> None:
+        left, right = pages
+        image_processing.compose_spread(left, right, output, jpeg_quality, logger)
+
+    def compose_as_rgb(pages: Sequence[Path], output: Path) -> None:
+        _compose_as_rgb(pages, output, jpeg_quality)
+
+    results = []
+    for book, pages, run in (
+        ("grayscale", books["L"], compose),
+        ("grayscale-as-rgb", books["L"], compose_as_rgb),
+        ("colour", books["RGB"], compose),
+    ):
+        output = folder / f"{book}_001-002.jpg"
+        best = float("inf")
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            run(pages, output)
+            best = min(best, time.perf_counter() - started)
+        with Image.open(output) as spread:
+            spread_mode = spread.mode
+        results.append(ComposeBenchmark(book, spread_mode, best, output.stat().st_size))
+    return results
+
+
+def format_compose_benchmark(results: Sequence[ComposeBenchmark]) -> str:
+    """Таблица результатов benchmark_compose и выигрыш серой книги."""
+    lines = [f"{'book':<17} {'mode':<5}{'compose [ms]':>13}{'size [KB]':>12}"]
+    for result in results:
+        lines.append(
+            f"{result.book:<17} {result.mode:<5}"
+            f"{result.seconds * 1000:13.1f}{result.size_bytes / 1024:12.1f}"
+        )
+    by_book = {result.book: result for result in results}
+    gray = by_book.get("grayscale")
+    for other in ("grayscale-as-rgb", "colour"):
+        if gray is not None and other in by_book:
+            lines.append(
+                f"grayscale vs {other}: "
+                f"time x{gray.seconds / by_book[other].seconds:.2f}, "
+                f"size x{gray.size_bytes / by_book[other].size_bytes:.2f}"
+            )
+    return "\n".join(lines)
+
+
+class BenchResult(NamedTuple):
+    """Результат одного случая набора замеров."""
+
+    suite: str  # "download" или "process"
+    case: str  # Параметры случая; по нему сравнивается история
+    pages: int
+    seconds: float
+    size_bytes: int  # Скачано или прочитано страниц
+    peak_rss_mb: Optional[float]  # None - неизвестно (Windows)
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.size_bytes / 1024**2 / self.seconds if self.seconds > 0 else 0.0
+
+
+def page_size_at(dpi: int) -> Tuple[int, int]:
+    """Размер страницы A4 в пикселях при заданном разрешении."""
+    return round(A4_INCHES[0] * dpi), round(A4_INCHES[1] * dpi)
+
+
+def _encode_page(size: Tuple[int, int], mode: str, seed: int) -> bytes:
+    buffer = BytesIO()
+    make_sample_page(size, mode, seed).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Пиковый RSS процесса и его дочерних процессов, МБ (None - неизвестно)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return peak / (1024**2 if sys.platform == "darwin" else 1024)  # Байты или КБ
+
+
+def run_isolated(func: Callable[..., BenchResult], *args: Any) -> BenchResult:
+    """Выполняет случай в новом процессе, чтобы пиковый RSS был только его."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(func, *args).result()
+
+
+# --- Скачивание ---
+
+
+class _PageServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, page: bytes, latency: float):
+        super().__init__(("127.0.0.1", 0), _PageRequestHandler)
+        self.page = page
+        self.latency = latency
+
+
+class _PageRequestHandler(BaseHTTPRequestHandler):
+    """Отвечает как сайт библиотеки: куки на "/", одна и та же страница на URL книги."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, как у настоящего сервера
+    server: _PageServer
+
+    def do_GET(self) -> None:
+        if self.path == "/":
+            self._reply(b"", "text/html", {"Set-Cookie": "session=bench; Path=/"})
+            return
+        try:
+            page_key = base64.b64decode(unquote(self.path.rsplit("/", 1)[-1]))
+        except ValueError:
+            page_key = b""
+        if b"/" not in page_key:
+            self._reply(b"not found", "text/plain", status=404)
+            return
+        time.sleep(self.server.latency)
+        self._reply(self.server.page, "image/jpeg")
+
+    def _reply(
+        self,
+        body: bytes,
+        content_type: str,
+        headers: Optional[Dict[str, str]] = None,
+        status: int = 200,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass  # Без вывода каждого запроса в stderr
+
+
+@contextmanager
+def serve_pages(page: bytes, latency: float = 0.0) -> Iterator[str]:
+    """Локальная замена сайта библиотеки на время замера.
+
+    Args:
+        page: Содержимое, которое отдается на запрос любой страницы.
+        latency: Задержка перед каждым ответом со страницей, секунд.
+
+    Yields:
+        Базовый URL (вместо config.DEFAULT_URL_BASE).
+    """
+    server = _PageServer(page, latency)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_download(
+    base_url: str,
+    folder: Path,
+    pages: int,
+    workers: int = 4,
+    engine: str = "requests",
+) -> BenchResult:
+    """Замеряет download_pages против serve_pages (без кэша и без пауз).
+
+    Args:
+        base_url: Адрес serve_pages.
+        folder: Папка для страниц (очищать не нужно, манифест не читается).
+        pages: Страниц книги.
+        workers: Потоков (соединений у asyncio) скачивания.
+        engine: "requests" или "asyncio".
+
+    Returns:
+        Результат замера; в случае указаны параметры скачивания.
+    """
+    handler_class = AsyncLibraryHandler if engine == "asyncio" else logic.LibraryHandler
+    handler = handler_class(
+        status_callback=lambda message: None,
+        progress_callback=lambda current, total: None,
+        stop_event=threading.Event(),
+        page_cache=None,
+    )
+    # Темп сайта здесь не нужен: замеряется сам код скачивания
+    handler.rate_limiter = AdaptiveRateLimiter(
+        initial_rate=1e6, max_rate=1e6, burst=pages
+    )
+    handler.initial_cookie_url = base_url
+    started = time.perf_counter()
+    success_count, _ = handler.download_pages(
+        base_url, "bench/", "book.pdf", pages, str(folder), workers, resume=False
+    )
+    seconds = time.perf_counter() - started
+    return BenchResult(
+        "download",
+        f"{engine} workers={workers}",
+        success_count,
+        seconds,
+        handler.downloaded_bytes,
+        peak_rss_mb(),
+    )
+
+
+# --- Обработка ---
+
+
+def make_page_set(folder: Path, book: str, pages: int, dpi: int) -> int:
+    """Создает в folder страницы page_NNN.jpg синтетической книги.
+
+    Книги: "grayscale" и "colour" - одиночные страницы, "mixed" - цветная
+    обложка, серые страницы и каждая шестая - готовый цветной разворот.
+    Одинаковые страницы кодируются один раз.
+
+    Returns:
+        Общий размер страниц, байт.
+    """
+    size = page_size_at(dpi)
+    spread_size = (size[0] * 2, size[1])
+    encoded: Dict[Tuple[Tuple[int, int], str, int], bytes] = {}
+    folder.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for i in range(pages):
+        page_size, mode = size, "RGB" if book == "colour" else "L"
+        if book == "mixed" and (i == 0 or i % 6 == 5):
+            page_size, mode = (size if i == 0 else spread_size), "RGB"
+        key = (page_size, mode, i % 2)
+        if key not in encoded:
+            encoded[key] = _encode_page(page_size, mode, i % 2)
+        (folder / f"page_{i:03d}.jpg").write_bytes(encoded[key])
+        total += len(encoded[key])
+    return total
+
+
+def bench_processing(
+    pages_folder: Path, output_folder: Path, case: str, workers: int = 1
+) -> BenchResult:
+    """Замеряет process_images_in_folders (все развороты собираются заново).
+
+    Args:
+        pages_folder: Страницы из make_page_set.
+        output_folder: Папка разворотов.
+        case: Название случая для отчета.
+        workers: Процессов склейки.
+
+    Returns:
+        Результат замера.
+    """
+    pages = sorted(pages_folder.glob("page_*.jpg"))
+    started = time.perf_counter()
+    processed_count, _ = image_processing.process_images_in_folders(
+        str(pages_folder),
+        str(output_folder),
+        lambda message: None,
+        lambda current, total: None,
+        threading.Event(),
+        config,
+        utils,
+        logger,
+        workers=workers,
+        rebuild=True,
+    )
+    seconds = time.perf_counter() - started
+    size_bytes = sum(path.stat().st_size for path in pages)
+    return BenchResult(
+        "process", case, processed_count, seconds, size_bytes, peak_rss_mb()
+    )
+
+
+# --- Набор и история ---
+
+
+def run_suite(
+    folder: Path,
+    suites: Sequence[str] = ("download", "process"),
+    pages: int = 24,
+    latency: float = 0.02,
+    page_dpi: int = 150,
+    download_workers: Sequence[int] = (1, 4),
+    engines: Sequence[str] = ("requests", "asyncio"),
+    books: Sequence[str] = BOOKS,
+    dpis: Sequence[int] = (150, 300),
+    process_workers: int = 1,
+    isolated: bool = True,
+) -> list[BenchResult]:
+    """Выполняет набор замеров скачивания и обработки.
+
+    Каждый случай по умолчанию идет в отдельном процессе (run_isolated),
+    поэтому пиковый RSS относится только к нему.
+
+    Args:
+        folder: Рабочая папка (существующая, например временная).
+        suites: "download" и/или "process".
+        pages: Страниц в каждом случае.
+        latency: Задержка ответа сервера на страницу, секунд.
+        page_dpi: Разрешение страниц, которые отдает сервер.
+        download_workers: Потоков скачивания для случаев скачивания.
+        engines: Движки скачивания.
+        books: Наборы страниц из BOOKS.
+        dpis: Разрешения страниц для обработки.
+        process_workers: Процессов склейки.
+        isolated: Выполнять случаи в отдельных процессах.
+
+    Returns:
+        Результаты в порядке случаев.
+    """
+    run = run_isolated if isolated else (lambda func, *args: func(*args))
+    results = []
+    if "download" in suites:
+        page = _encode_page(page_size_at(page_dpi), "L", 0)
+        with serve_pages(page, latency) as base_url:
+            for engine in engines:
+                for workers in download_workers:
+                    target = folder / f"download_{engine}_{workers}"
+                    result = run(
+                        bench_download, base_url, target, pages, workers, engine
+                    )
+                    results.append(
+                        result._replace(
+                            case=f"{result.case} latency={latency * 1000:g}ms "
+                            f"{page_dpi}dpi"
+                        )
+                    )
+    if "process" in suites:
+        for book in books:
+            for dpi in dpis:
+                case = f"{book} {dpi}dpi workers={process_workers}"
+                pages_folder = folder / f"pages_{book}_{dpi}"
+                make_page_set(pages_folder, book, pages, dpi)
+                results.append(
+                    run(
+                        bench_processing,
+                        pages_folder,
+                        folder / f"spreads_{book}_{dpi}",
+                        case,
+                        process_workers,
+                    )
+                )
+    return results
+
+
+def load_history(path: Path) -> list[Dict[str, Any]]:
+    """Прошлые запуски набора из файла истории (JSON по строке на запуск)."""
+    runs = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    runs.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read benchmark history {path}: {e}")
+    return runs
+
+
+def append_history(path: Path, results: Sequence[BenchResult]) -> None:
+    """Дописывает запуск в файл истории."""
+    entry = {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [result._asdict() for result in results],
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def format_suite(
+    results: Sequence[BenchResult], previous: Optional[Dict[str, Any]] = None
+) -> str:
+    """Таблица результатов run_suite.
+
+    Если передан прошлый запуск из истории, для совпадающих случаев
+    показывается изменение скорости в страницах в секунду.
+    """
+    before = {}
+    for entry in (previous or {}).get("results", []):
+        seconds = entry.get("seconds") or 0
+        if seconds > 0:
+            before[(entry["suite"], entry["case"])] = entry["pages"] / seconds
+    header = f"{'suite':<9}{'case':<44}{'pages/s':>9}{'MB/s':>8}"
+    lines = [f"{header}{'peak RSS MB':>13}{'vs last':>9}"]
+    for result in results:
+        rss = "-" if result.peak_rss_mb is None else f"{result.peak_rss_mb:.0f}"
+        change = ""
+        old = before.get((result.suite, result.case))
+        if old:
+            change = f"{(result.pages_per_second / old - 1) * 100:+.0f}%"
+        lines.append(
+            f"{result.suite:<9}{result.case:<44}{result.pages_per_second:9.1f}"
+            f"{result.mb_per_second:8.1f}{rss:>13}{change:>9}"
+        )
+    return "\n".join(lines)
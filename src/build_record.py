@@ -0,0 +1,252 @@
+from contextlib import suppress
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Any, Dict, Optional, Sequence, Set, Tuple
+
+from . import config
+from .manifest import read_page_hashes
+
+logger = logging.getLogger(__name__)
+
+RECORD_VERSION: int = 1
+
+# Виды выходных файлов в записи
+KIND_COPY: str = "copy"  # Не зависит от параметров обработки
+KIND_SPREAD: str = "spread"
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 содержимого файла (читается кусками)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildRecord:
+    """Запись сборки папки разворотов: из чего получен каждый выходной файл.
+
+    Хранится в папке разворотов (config.BUILD_RECORD_FILE) и для каждого
+    выходного файла записывает его размер, исходные страницы (путь,
+    размер, mtime и SHA-256, если он известен из манифеста скачивания)
+    и вид (копия или разворот). Сами страницы при записи не читаются.
+    Параметры, от которых зависят развороты (порог, качество, формат и
+    т.д.), общие для всей записи: при их смене забываются только развороты.
+    Потокобезопасен.
+    """
+
+    def __init__(self, path: Path, params: Dict[str, Any]):
+        """Инициализация пустой записи.
+
+        Args:
+            path: Путь к файлу записи.
+            params: Параметры обработки разворотов (image_processing.processing_params).
+        """
+        self.path = path
+        self.params = json.loads(json.dumps(params))  # Как после чтения из JSON
+        self.outputs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._kept: Set[str] = set()  # Актуальны или собраны в этом запуске
+        # Папка страниц -> хэши из ее манифеста скачивания (read_page_hashes)
+        self._page_hashes: Dict[Path, Dict[str, Tuple[int, int, str]]] = {}
+
+    @classmethod
+    def load(cls, path: Path, params: Dict[str, Any]) -> "BuildRecord":
+        """Читает запись с диска.
+
+        Если файла нет или он поврежден, возвращается пустая запись. Если
+        изменились параметры, из записи удаляются развороты - они будут
+        собраны заново, а копии страниц остаются.
+        """
+        record = cls(path, params)
+        try:
+            if not path.is_file():
+                return record
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != RECORD_VERSION:
+                return record
+            outputs = dict(data.get("outputs", {}))
+            if data.get("params") != record.params:
+                logger.info("Processing parameters changed, spreads will be rebuilt")
+                outputs = {
+                    name: entry
+                    for name, entry in outputs.items()
+                    if entry.get("kind") == KIND_COPY
+                }
+            record.outputs = outputs
+            logger.info(f"Build record loaded from {path}: {len(outputs)} outputs")
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Could not load build record {path}: {e}. Starting anew")
+            record.outputs = {}
+        return record
+
+    def is_current(self, output_path: Path, sources: Sequence[Path]) -> bool:
+        """Проверяет, что выходной файл на месте и собран из тех же страниц.
+
+        Страница с прежними размером и mtime считается неизменной без
+        чтения. Если изменился только mtime (страницу скачали заново),
+        сравнивается SHA-256 (из манифеста скачивания или по содержимому),
+        и при совпадении запись обновляется. Без записанного SHA-256 такая
+        страница считается измененной.
+        """
+        with self._lock:
+            entry = self.outputs.get(output_path.name)
+        if not entry:
+            return False
+        try:
+            if output_path.stat().st_size != entry["size"]:
+                return False
+            recorded = entry["sources"]
+            if [os.path.abspath(path) for path in sources] != [
+                state["path"] for state in recorded
+            ]:
+                return False
+            touched = False
+            for path, state in zip(sources, recorded):
+                stat = path.stat()
+                if stat.st_size != state["size"]:
+                    return False
+                if stat.st_mtime_ns == state["mtime_ns"]:
+                    continue
+                recorded = state.get("sha256")
+                if not recorded:
+                    return False
+                if (self._known_sha256(path, stat) or file_sha256(path)) != recorded:
+                    return False
+                state["mtime_ns"] = stat.st_mtime_ns
+                touched = True
+        except (OSError, KeyError, TypeError) as e:
+            logger.debug(f"Output {output_path.name} is not up to date: {e}")
+            return False
+        with self._lock:
+            self._kept.add(output_path.name)
+        if touched:
+            self._changed()
+        return True
+
+    def _known_sha256(self, path: Path, stat: os.stat_result) -> Optional[str]:
+        """SHA-256 страницы из манифеста скачивания, если он к ней относится."""
+        folder = path.parent
+        with self._lock:
+            hashes = self._page_hashes.get(folder)
+        if hashes is None:
+            hashes = read_page_hashes(folder)
+            with self._lock:
+                self._page_hashes[folder] = hashes
+        known = hashes.get(path.name)
+        if known is None or known[:2] != (stat.st_size, stat.st_mtime_ns):
+            return None
+        return known[2]
+
+    def _source_state(self, path: Path) -> Dict[str, Any]:
+        stat = path.stat()
+        state: Dict[str, Any] = {
+            "path": os.path.abspath(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        sha256 = self._known_sha256(path, stat)
+        if sha256:
+            state["sha256"] = sha256
+        return state
+
+    def update(self, output_path: Path, sources: Sequence[Path], kind: str) -> None:
+        """Записывает только что созданный выходной файл."""
+        try:
+            entry = {
+                "kind": kind,
+                "size": output_path.stat().st_size,
+                "sources": [self._source_state(path) for path in sources],
+            }
+        except OSError as e:
+            logger.warning(f"Could not record {output_path.name}: {e}")
+            self.forget(output_path)
+            return
+        with self._lock:
+            self.outputs[output_path.name] = entry
+            self._kept.add(output_path.name)
+        self._changed()
+
+    def forget(self, output_path: Path) -> None:
+        """Удаляет выходной файл из записи (например, после ошибки)."""
+        with self._lock:
+            removed = self.outputs.pop(output_path.name, None)
+            self._kept.discard(output_path.name)
+        if removed is not None:
+            self._changed()
+
+    def drop_stale(self) -> list[str]:
+        """Удаляет выходные файлы, которые этот запуск не собрал и не проверил.
+
+        Такие файлы остаются от прежней раскладки страниц (например,
+        разворот 001-002 после того, как страница 001 стала одиночной).
+        Вызывается только после полного прохода по страницам.
+
+        Returns:
+            Имена удаленных из записи выходных файлов.
+        """
+        with self._lock:
+            stale = sorted(name for name in self.outputs if name not in self._kept)
+            for name in stale:
+                del self.outputs[name]
+        for name in stale:
+            with suppress(OSError):
+                (self.path.parent / name).unlink()
+            logger.info(f"Removed stale output {name}")
+        if stale:
+            self._changed()
+        return stale
+
+    def _changed(self) -> None:
+        with self._lock:
+            self._unsaved += 1
+            should_save = self._unsaved >= config.MANIFEST_SAVE_INTERVAL
+        if should_save:
+            self.save()
+
+    def save(self) -> bool:
+        """Атомарно сохраняет запись (через временный файл).
+
+        Returns:
+            True в случае успеха, False при ошибке записи.
+        """
+        with self._lock:
+            data = {
+                "version": RECORD_VERSION,
+                "params": self.params,
+                "outputs": {name: self.outputs[name] for name in sorted(self.outputs)},
+            }
+            self._unsaved = 0
+            temp_path = self.path.with_name(self.path.name + config.PARTIAL_FILE_SUFFIX)
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=1, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save build record {self.path}: {e}")
+                return False
+        logger.debug(f"Build record saved to {self.path}")
+        return True
+
+
+def open_build_record(
+    output_path: Path, params: Dict[str, Any], rebuild: bool
+) -> BuildRecord:
+    """Возвращает запись сборки для папки разворотов.
+
+    Обычно читает существующую. При rebuild начинает новую: все файлы
+    собираются заново, а запись ведется для следующего запуска.
+    """
+    path = output_path / config.BUILD_RECORD_FILE
+    if rebuild:
+        return BuildRecord(path, params)
+    return BuildRecord.load(path, params)
@@ -0,0 +1,531 @@
+# src/cli.py
+"""Консольный запуск без GUI (для серверов, cron и контейнеров).
+
+Модуль не импортирует tkinter ни прямо, ни через gui/app_state/task_manager:
+скачивание и обработка вызываются через LibraryHandler напрямую.
+
+Примеры:
+    python -m src.cli download --ids 123/456 --pdf-name book.pdf --pages 120
+    python -m src.cli process --pages-dir pages --spreads-dir spreads
+    python -m src.cli all --ids 123/456 --pdf-name book.pdf --pages 120 --resume
+    python -m src.cli batch --books books.csv --book-workers 3 --workers 2
+    python -m src.cli preview --pages-dir pages --spreads-dir spreads
+    python -m src.cli bench-encoders --image spreads/001-002.jpg
+    python -m src.cli bench-compose --repeat 5
+    python -m src.cli bench --suite process --dpi 300 --history bench.jsonl
+"""
+
+import argparse
+import functools
+import logging
+from pathlib import Path
+import sys
+import tempfile
+import threading
+from typing import Callable, Optional, Sequence, Tuple
+
+from . import (
+    async_engine,
+    batch,
+    benchmark,
+    config,
+    encoders,
+    logic,
+    page_cache,
+    progress,
+    utils,
+)
+from .rate_limiter import AdaptiveRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Коды возврата
+EXIT_OK: int = 0
+EXIT_PARTIAL: int = 1  # Часть страниц не скачана / ничего не обработано
+EXIT_USAGE: int = 2  # Ошибка аргументов или списка книг (как у argparse)
+EXIT_INTERRUPTED: int = 130  # Ctrl+C
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"ожидается число больше 0: {value}")
+    return number
+
+
+def _non_negative_float(value: str) -> float:
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"ожидается число не меньше 0: {value}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Создает парсер аргументов командной строки."""
+    parser = argparse.ArgumentParser(
+        prog="rgo-lib-parser",
+        description=f"{config.APP_NAME}: скачивание страниц и создание разворотов без GUI.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    download = argparse.ArgumentParser(add_help=False)
+    group = download.add_argument_group("скачивание")
+    group.add_argument("--base-url", default=config.DEFAULT_URL_BASE)
+    group.add_argument("--ids", required=True, help="ID файла (часть URL)")
+    group.add_argument("--pdf-name", required=True, help="Имя PDF на сайте")
+    group.add_argument("--pages", type=_positive_int, required=True)
+    group.add_argument(
+        "--resume",
+        action="store_true",
+        default=None,
+        help="Докачать только недостающие страницы",
+    )
+
+    network = argparse.ArgumentParser(add_help=False)
+    group = network.add_argument_group("сеть")
+    group.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=None,
+        help="Потоков (соединений у asyncio) скачивания",
+    )
+    group.add_argument(
+        "--delay",
+        type=_non_negative_float,
+        default=None,
+        help="Минимальная пауза между запросами, секунд "
+        "(0 - сразу с максимальной скоростью config.RATE_LIMIT_MAX_RPS)",
+    )
+    group.add_argument(
+        "--engine", choices=("requests", "asyncio"), default=config.DOWNLOAD_ENGINE
+    )
+    group.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Кэш страниц с перепроверкой через ETag/304 "
+        "(по умолчанию config.PAGE_CACHE_ENABLED)",
+    )
+
+    queue_options = argparse.ArgumentParser(add_help=False)
+    group = queue_options.add_argument_group("пакет")
+    group.add_argument(
+        "--books",
+        help="Список книг (JSON или CSV с полями url_ids, filename_pdf, "
+        "total_pages, base_url); без него продолжается сохраненная очередь",
+    )
+    group.add_argument("--base-url", default=config.DEFAULT_URL_BASE)
+    group.add_argument(
+        "--output-dir",
+        default=config.DEFAULT_BATCH_DIR,
+        help="Папка пакета: подпапки книг и файл очереди",
+    )
+    group.add_argument("--queue", help="Файл очереди (по умолчанию в --output-dir)")
+    group.add_argument(
+        "--book-workers",
+        type=_positive_int,
+        default=None,
+        help="Книг одновременно",
+    )
+    group.add_argument(
+        "--max-connections",
+        type=_positive_int,
+        default=None,
+        help="Одновременных запросов на все книги",
+    )
+    group.add_argument(
+        "--no-process", action="store_true", help="Только скачать, без разворотов"
+    )
+
+    pages_dir = argparse.ArgumentParser(add_help=False)
+    pages_dir.add_argument("--pages-dir", default=config.DEFAULT_PAGES_DIR)
+
+    process = argparse.ArgumentParser(add_help=False)
+    group = process.add_argument_group("обработка")
+    group.add_argument("--spreads-dir", default=config.DEFAULT_SPREADS_DIR)
+    group.add_argument(
+        "--process-workers",
+        type=int,
+        default=None,
+        help="Процессов склейки (0 - по числу ядер)",
+    )
+    group.add_argument(
+        "--contact-sheet",
+        action="store_true",
+        default=None,
+        help="Создать листы миниатюр страниц для проверки порядка",
+    )
+    group.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Пересобрать все развороты, даже не изменившиеся с прошлого запуска",
+    )
+
+    subparsers.add_parser(
+        "download", parents=[download, network, pages_dir], help="Скачать страницы"
+    )
+    subparsers.add_parser(
+        "process", parents=[pages_dir, process], help="Создать развороты"
+    )
+    subparsers.add_parser(
+        "all",
+        parents=[download, network, pages_dir, process],
+        help="Скачать страницы и создать развороты",
+    )
+    subparsers.add_parser(
+        "batch",
+        parents=[queue_options, network],
+        help="Скачать много книг по списку (очередь сохраняется)",
+    )
+    subparsers.add_parser(
+        "preview",
+        parents=[pages_dir],
+        help="Создать листы миниатюр страниц (в подпапке папки разворотов)",
+    ).add_argument("--spreads-dir", default=config.DEFAULT_SPREADS_DIR)
+    bench = subparsers.add_parser(
+        "bench-encoders",
+        help="Сравнить форматы вывода: время кодирования и размер файла",
+    )
+    bench.add_argument("--image", required=True, help="Разворот или страница")
+    bench.add_argument(
+        "--formats",
+        nargs="+",
+        choices=encoders.registered_encoders(),
+        help="Форматы для замера (по умолчанию все доступные)",
+    )
+    bench.add_argument("--repeat", type=_positive_int, default=3)
+    bench = subparsers.add_parser(
+        "bench-compose",
+        help="Сравнить склейку серых и цветных страниц (время и размер)",
+    )
+    bench.add_argument(
+        "--page-size",
+        type=_positive_int,
+        nargs=2,
+        default=benchmark.SAMPLE_PAGE_SIZE,
+        metavar=("WIDTH", "HEIGHT"),
+    )
+    bench.add_argument("--repeat", type=_positive_int, default=3)
+    bench = subparsers.add_parser(
+        "bench",
+        help="Замерить скачивание (локальный сервер) и обработку: стр/с, МБ/с, "
+        "пиковый RSS",
+    )
+    bench.add_argument("--suite", choices=("download", "process", "all"), default="all")
+    bench.add_argument("--pages", type=_positive_int, default=24)
+    bench.add_argument(
+        "--latency",
+        type=_non_negative_float,
+        default=0.02,
+        help="Задержка ответа сервера на страницу, секунд",
+    )
+    bench.add_argument(
+        "--engines",
+        nargs="+",
+        choices=("requests", "asyncio"),
+        default=["requests", "asyncio"],
+    )
+    bench.add_argument(
+        "--download-workers", type=_positive_int, nargs="+", default=[1, 4]
+    )
+    bench.add_argument(
+        "--page-dpi",
+        type=_positive_int,
+        default=150,
+        help="Разрешение страниц, которые отдает сервер",
+    )
+    bench.add_argument(
+        "--books", nargs="+", choices=benchmark.BOOKS, default=list(benchmark.BOOKS)
+    )
+    bench.add_argument(
+        "--dpi",
+        type=_positive_int,
+        nargs="+",
+        default=[150, 300],
+        help="Разрешения страниц для обработки",
+    )
+    bench.add_argument(
+        "--process-workers", type=int, default=1, help="Процессов склейки"
+    )
+    bench.add_argument(
+        "--history",
+        help="Файл истории (JSON Lines): запуск дописывается и сравнивается "
+        "с предыдущим",
+    )
+    for subparser in subparsers.choices.values():
+        subparser.add_argument(
+            "-q", "--quiet", action="store_true", help="Не выводить сообщения"
+        )
+    return parser
+
+
+def _make_callbacks(
+    quiet: bool,
+) -> Tuple[Callable[[str], None], progress.ProgressReporter]:
+    """Колбэки статуса и прогресса для консоли.
+
+    Прогресс (со скоростью и оставшимся временем) выводится только в
+    терминал и не чаще config.PROGRESS_MIN_INTERVAL.
+    """
+    show_progress = not quiet and sys.stdout.isatty()
+
+    def status_callback(message: str) -> None:
+        if not quiet:
+            if show_progress:
+                sys.stdout.write("\r\033[K")  # Стираем строку прогресса
+            print(message, flush=True)
+
+    def show_stats(stats: progress.ProgressStats) -> None:
+        if show_progress and stats.total > 0:
+            sys.stdout.write(f"\r\033[K{progress.format_progress(stats)}")
+            sys.stdout.flush()
+
+    return status_callback, progress.ProgressReporter(show_stats)
+
+
+def _make_rate_limiter(delay: Optional[float]) -> Optional[AdaptiveRateLimiter]:
+    """Лимитер запросов по --delay (None - настройки config)."""
+    if delay:
+        # Пауза задает потолок скорости; при ошибках лимитер замедляется дальше
+        return AdaptiveRateLimiter(
+            initial_rate=1 / delay,
+            min_rate=min(config.RATE_LIMIT_MIN_RPS, 1 / delay),
+            max_rate=1 / delay,
+            burst=1,
+        )
+    if delay == 0:
+        return AdaptiveRateLimiter(initial_rate=config.RATE_LIMIT_MAX_RPS)
+    return None
+
+
+def make_handler_factory(args: argparse.Namespace) -> batch.HandlerFactory:
+    """Фабрика обработчиков с движком, кэшем и лимитером из аргументов."""
+    handler_class = (
+        async_engine.AsyncLibraryHandler
+        if getattr(args, "engine", config.DOWNLOAD_ENGINE) == "asyncio"
+        else logic.LibraryHandler
+    )
+    cache = page_cache.create_page_cache(getattr(args, "cache", None))
+
+    def factory(
+        status_callback: Callable[[str], None],
+        progress_callback: Callable[[int, int], None],
+        stop_event: threading.Event,
+    ) -> logic.LibraryHandler:
+        handler = handler_class(
+            status_callback=status_callback,
+            progress_callback=progress_callback,
+            stop_event=stop_event,
+            page_cache=cache,
+        )
+        rate_limiter = _make_rate_limiter(getattr(args, "delay", None))
+        if rate_limiter is not None:
+            handler.rate_limiter = rate_limiter
+        return handler
+
+    return factory
+
+
+def create_handler(
+    args: argparse.Namespace, stop_event: threading.Event
+) -> logic.LibraryHandler:
+    """Создает обработчик с настройками из аргументов."""
+    status_callback, progress_reporter = _make_callbacks(args.quiet)
+    handler = make_handler_factory(args)(status_callback, progress_reporter, stop_event)
+    progress_reporter.bytes_source = lambda: handler.downloaded_bytes
+    return handler
+
+
+def run_batch(args: argparse.Namespace, stop_event: threading.Event) -> int:
+    """Выполняет пакет книг и возвращает код возврата."""
+    queue_path = Path(
+        args.queue or Path(args.output_dir) / config.BATCH_QUEUE_FILE_NAME
+    )
+    queue = batch.BatchQueue.load(queue_path)
+    status_callback, progress_callback = _make_callbacks(args.quiet)
+    if args.books:
+        try:
+            books = batch.load_books(args.books, args.base_url)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка списка книг: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        added = sum(
+            queue.add(book, args.output_dir, process=not args.no_process)
+            for book in books
+        )
+        queue.save()
+        status_callback(f"Добавлено книг в очередь: {added} из {len(books)}.")
+    elif not queue.jobs:
+        print(f"Очередь {queue_path} пуста, укажите --books", file=sys.stderr)
+        return EXIT_USAGE
+
+    summary = batch.BatchRunner(
+        queue,
+        make_handler_factory(args),
+        status_callback,
+        progress_callback,
+        stop_event,
+        book_workers=args.book_workers,
+        page_workers=args.workers,
+        max_connections=args.max_connections,
+        rate_limiter=_make_rate_limiter(args.delay),
+    ).run()
+    if stop_event.is_set():
+        return EXIT_INTERRUPTED
+    return EXIT_OK if summary[batch.JOB_DONE] == len(queue.jobs) else EXIT_PARTIAL
+
+
+def run_encoder_benchmark(args: argparse.Namespace) -> int:
+    """Замеряет кодирование изображения во всех предустановках форматов."""
+    from PIL import Image
+
+    try:
+        with Image.open(args.image) as image:
+            results = encoders.benchmark_encoders(
+                image,
+                args.formats,
+                jpeg_quality=config.JPEG_QUALITY,
+                repeat=args.repeat,
+            )
+    except OSError as e:
+        print(f"Ошибка чтения изображения: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    print(encoders.format_benchmark(results))
+    return EXIT_OK if results else EXIT_PARTIAL
+
+
+def run_compose_benchmark(args: argparse.Namespace) -> int:
+    """Замеряет склейку синтетических серых и цветных страниц."""
+    with tempfile.TemporaryDirectory(prefix="rgo_bench_") as folder:
+        results = benchmark.benchmark_compose(
+            Path(folder),
+            tuple(args.page_size),
+            repeat=args.repeat,
+            jpeg_quality=config.JPEG_QUALITY,
+        )
+    print(benchmark.format_compose_benchmark(results))
+    return EXIT_OK
+
+
+def run_benchmark_suite(args: argparse.Namespace) -> int:
+    """Выполняет набор замеров и печатает сравнение с прошлым запуском."""
+    history_path = Path(args.history) if args.history else None
+    history = benchmark.load_history(history_path) if history_path else []
+    with tempfile.TemporaryDirectory(prefix="rgo_bench_") as folder:
+        results = benchmark.run_suite(
+            Path(folder),
+            ("download", "process") if args.suite == "all" else (args.suite,),
+            pages=args.pages,
+            latency=args.latency,
+            page_dpi=args.page_dpi,
+            download_workers=args.download_workers,
+            engines=args.engines,
+            books=args.books,
+            dpis=args.dpi,
+            process_workers=args.process_workers,
+        )
+    print(benchmark.format_suite(results, history[-1] if history else None))
+    if history_path:
+        benchmark.append_history(history_path, results)
+    return EXIT_OK
+
+
+def run_command(
+    args: argparse.Namespace,
+    handler: logic.LibraryHandler,
+    stop_event: threading.Event,
+) -> int:
+    """Выполняет команду и возвращает код возврата."""
+    if args.command == "preview":
+        sheets = handler.create_contact_sheets(args.pages_dir, args.spreads_dir)
+        if stop_event.is_set():
+            return EXIT_INTERRUPTED
+        return EXIT_OK if sheets else EXIT_PARTIAL
+
+    all_downloaded = True
+    if args.command in ("download", "all"):
+        success_count, total_pages = handler.download_pages(
+            args.base_url,
+            args.ids,
+            args.pdf_name,
+            args.pages,
+            args.pages_dir,
+            workers=args.workers,
+            resume=args.resume,
+        )
+        if stop_event.is_set():
+            return EXIT_INTERRUPTED
+        if success_count == 0:
+            logger.error("CLI: no pages downloaded, nothing to process")
+            return EXIT_PARTIAL
+        all_downloaded = success_count == total_pages
+        if args.command == "download":
+            return EXIT_OK if all_downloaded else EXIT_PARTIAL
+
+    processed_count, created_spread_count = handler.process_images(
+        args.pages_dir,
+        args.spreads_dir,
+        workers=args.process_workers,
+        contact_sheet=args.contact_sheet,
+        rebuild=args.rebuild,
+    )
+    if stop_event.is_set():
+        return EXIT_INTERRUPTED
+    if processed_count == 0 and created_spread_count == 0:
+        return EXIT_PARTIAL
+    return EXIT_OK if all_downloaded else EXIT_PARTIAL
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Точка входа консольного режима.
+
+    Команда выполняется в фоновом потоке, чтобы Ctrl+C в главном потоке
+    аккуратно останавливал ее через stop_event, как кнопка СТОП в GUI.
+
+    Returns:
+        Код возврата процесса.
+    """
+    args = build_parser().parse_args(argv)
+    utils.setup_logging()
+    logger.info(f"Starting {config.APP_NAME} CLI: {args.command}")
+
+    stop_event = threading.Event()
+    if args.command == "batch":
+        command = functools.partial(run_batch, args, stop_event)
+    elif args.command == "bench-encoders":
+        command = functools.partial(run_encoder_benchmark, args)
+    elif args.command == "bench-compose":
+        command = functools.partial(run_compose_benchmark, args)
+    elif args.command == "bench":
+        command = functools.partial(run_benchmark_suite, args)
+    else:
+        command = functools.partial(
+            run_command, args, create_handler(args, stop_event), stop_event
+        )
+    result = {"code": EXIT_PARTIAL}
+
+    def target() -> None:
+        try:
+            result["code"] = command()
+        except Exception as e:
+            logger.critical(f"Critical error in CLI command: {e}", exc_info=True)
+            print(f"Критическая ошибка: {e}. Подробности в {config.LOG_FILE}")
+
+    worker = threading.Thread(target=target, name="CliTask", daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(timeout=0.5)
+    except KeyboardInterrupt:
+        print("\n--- Получен сигнал СТОП (Ctrl+C), завершаем... ---", flush=True)
+        stop_event.set()
+        worker.join()
+        result["code"] = EXIT_INTERRUPTED
+
+    logger.info(f"CLI finished with exit code {result['code']}")
+    logging.shutdown()
+    return result["code"]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
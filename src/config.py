@@ -8,12 +8,59 @@ LOG_FILE: str = "parsing.log"
 LOG_LEVEL: int = logging.INFO
 LOG_MAX_BYTES: int = 2 * 1024 * 1024  # 2 MB
 LOG_BACKUP_COUNT: int = 2
+# Время импорта каждого модуля при запуске в лог (как python -X importtime)
+STARTUP_PROFILE_IMPORTS: bool = False
+STARTUP_PROFILE_TOP: int = 25  # Сколько самых долгих импортов показать
 
 # --- GUI ---
 WINDOW_TITLE: str = "Загрузчик + склейщик файлов библиотеки РГО. v1.4 by b0s"
 WINDOW_ICON_PATH: str = "assets/window_bnwbook.png"
+GUI_STATUS_FLUSH_MS: int = 75  # Как часто выводить накопленные строки статуса
+GUI_STATUS_MAX_LINES: int = 1000  # Строк в поле статуса (полный журнал в LOG_FILE)
+PROGRESS_MIN_INTERVAL: float = 0.25  # Прогресс обновляется не чаще (секунд)
+PROGRESS_RATE_WINDOW: float = 15.0  # Окно расчета скорости и ETA (секунд)
 DEFAULT_ASPECT_RATIO_THRESHOLD: float = 1.1  # Порог определения разворота (w / h)
 JPEG_QUALITY: int = 95  # Для разворотов
+# Формат разворотов: "jpeg", "webp", "avif" (Pillow с libavif), "jxl"
+# (pillow-jxl-plugin); недоступный формат заменяется JPEG
+OUTPUT_FORMAT: str = "jpeg"
+# "fast" - без оптимизации (архив), "balanced", "small" - меньше файлы
+# (для JPEG - прогрессивный), кодирование медленнее
+OUTPUT_PRESET: str = "balanced"
+# Высота разворота: "max" - по большей странице, "min" - по меньшей (без увеличения)
+SPREAD_TARGET_HEIGHT: str = "max"
+# Фильтр масштабирования: "lanczos", "bicubic", "bilinear" (быстрее к концу
+# списка) или "auto" - по OUTPUT_PRESET
+RESIZE_FILTER: str = "lanczos"
+RESIZE_REDUCING_GAP: float = 2.0  # Уменьшение от стольких раз - через reduce()
+# Разворот от стольких пикселей склеивается полосами: страницы декодируются
+# по одной, без полных копий (для 600 dpi и параллельной склейки), 0 - никогда
+COMPOSE_LOW_MEMORY_PIXELS: int = 60_000_000
+COMPOSE_STRIP_HEIGHT: int = 256  # Строк в полосе
+# Повторная обработка пересобирает только развороты, у которых изменились
+# страницы или параметры (запись сборки - в папке разворотов)
+INCREMENTAL_PROCESSING: bool = True
+BUILD_RECORD_FILE: str = "build_record.json"
+PROCESSING_WORKERS: int = 1  # Процессов склейки (0 - по числу ядер, 1 - без пула)
+IMAGE_INFO_CACHE_SIZE: int = 4096  # Заголовков изображений в памяти
+# Склейка JPEG одной высоты без перекодирования (нужен jpegtran из libjpeg 9
+# или libjpeg-turbo с ключами -crop WxH+X+Y с расширением и -drop)
+JPEG_LOSSLESS_JOIN: bool = True
+JPEGTRAN_PATH: str = ""  # Пусто - искать jpegtran в PATH
+JPEGTRAN_TIMEOUT: float = 30.0  # На один вызов jpegtran (секунд)
+# Копирование обложек, готовых разворотов и одиночных страниц: способы по
+# порядку, при неудаче - следующий, в конце всегда "copy2". "reflink" - копия
+# при записи (Btrfs, XFS), "copy_file_range" - копирование внутри ядра.
+# "hardlink" по умолчанию выключен: файл становится общим с исходной страницей
+# (правка одного меняет другой); включается добавлением перед "copy_file_range"
+COPY_METHODS: tuple[str, ...] = ("reflink", "copy_file_range", "copy2")
+# Листы миниатюр для проверки порядка страниц (JPEG декодируется в 1/2-1/8)
+CONTACT_SHEET_ENABLED: bool = False  # Создавать после обработки разворотов
+CONTACT_SHEET_DIR_NAME: str = "_preview"  # Подпапка в папке разворотов
+CONTACT_SHEET_THUMB_SIZE: tuple[int, int] = (160, 220)  # Рамка миниатюры (px)
+CONTACT_SHEET_COLUMNS: int = 8
+CONTACT_SHEET_ROWS: int = 8  # Страниц на листе - COLUMNS * ROWS
+CONTACT_SHEET_QUALITY: int = 80
 
 # --- Сеть и Скачивание ---
 DEFAULT_USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.0.0 Safari/537.36"
@@ -21,8 +68,41 @@ INITIAL_COOKIE_URL: str = "https://elib.rgo.ru/"
 MAX_RETRIES: int = 3  # Для каждой страницы
 RETRY_ON_HTTP_CODES: list[int] = [500, 502, 503, 504]
 DEFAULT_DELAY_SECONDS: float = 0.5  # Между запросами (секунд)
+DOWNLOAD_WORKERS: int = 1  # Потоков скачивания (1 - последовательно)
+MAX_DOWNLOAD_WORKERS: int = 16  # Верхняя граница и размер пула соединений
+DOWNLOAD_ENGINE: str = "requests"  # "requests" или "asyncio"
+ASYNC_CONNECTIONS: int = 4  # Keep-alive соединений у asyncio-движка
+ASYNC_MAX_IN_FLIGHT: int = 256  # Страниц в очереди event loop одновременно
+# asyncio-движок, в отличие от requests, идет по редиректам только на тот же хост
+ASYNC_MAX_REDIRECTS: int = 5
 RETRY_DELAY: float = 2.0  # Перед повтором (секунд)
+# Адаптивный лимит запросов (token bucket + AIMD), начинаем с прежних 0.5 с
+RATE_LIMIT_INITIAL_RPS: float = 1 / DEFAULT_DELAY_SECONDS
+RATE_LIMIT_MIN_RPS: float = 0.2
+RATE_LIMIT_MAX_RPS: float = 20.0
+RATE_LIMIT_BURST: float = 2.0  # Запросов подряд без ожидания
+RATE_LIMIT_INCREASE_RPS: float = 0.25  # Прибавка после быстрого 200
+RATE_LIMIT_DECREASE_FACTOR: float = 0.5  # Множитель при 429/5xx/ошибке
+RATE_LIMIT_LATENCY_FACTOR: float = 2.0  # Ответ во столько раз медленнее среднего
+RATE_LIMIT_LATENCY_EWMA_ALPHA: float = 0.2
+RATE_LIMIT_SLOW_LATENCY_FLOOR: float = 0.5  # Ответ быстрее не считается медленным
+RATE_LIMIT_MAX_RETRY_AFTER: float = 120.0  # Верхняя граница Retry-After (секунд)
 REQUEST_TIMEOUT: tuple[int, int] = (10, 30)  # Для connect и read
+DOWNLOAD_CHUNK_SIZE: int = 64 * 1024  # Кусок потоковой записи страницы (байт)
+PARTIAL_FILE_SUFFIX: str = ".part"  # Недокачанная страница до переименования
+DOWNLOAD_MANIFEST_FILE: str = "manifest.json"  # В папке страниц
+MANIFEST_SAVE_INTERVAL: int = 20  # Сохранять манифест каждые N страниц
+DOWNLOAD_RESUME: bool = False  # Докачивать только недостающие страницы
+PIPELINED_ALL: bool = False  # «Скачать и обработать»: склеивать по ходу скачивания
+# Пакетное скачивание (src/batch.py, консольная команда batch)
+BATCH_BOOK_WORKERS: int = 2  # Книг одновременно
+BATCH_MAX_CONNECTIONS: int = 8  # Одновременных запросов страниц на все книги
+BATCH_QUEUE_FILE_NAME: str = "batch_queue.json"  # В папке пакета
+# Кэш страниц по URL (общий для всех папок), перепроверка через ETag/304.
+# Выключен по умолчанию: каждая страница пишется второй раз (в кэш)
+PAGE_CACHE_ENABLED: bool = False  # Консольная команда: --cache/--no-cache
+PAGE_CACHE_MAX_AGE: float = 0  # Отдавать без запроса (секунд), 0 - всегда 304
+PAGE_CACHE_MAX_BYTES: int = 2 * 1024**3  # 2 GB, старое содержимое удаляется
 IMAGE_EXTENSIONS: tuple[str, ...] = (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff")
 
 # --- Пути ---
@@ -32,12 +112,18 @@ try:
     DEFAULT_APP_DATA_DIR.mkdir(exist_ok=True)
     _default_pages_path = DEFAULT_APP_DATA_DIR / "downloaded_pages"
     _default_spreads_path = DEFAULT_APP_DATA_DIR / "final_spreads"
+    _default_cache_path = DEFAULT_APP_DATA_DIR / "page_cache"
+    _default_batch_path = DEFAULT_APP_DATA_DIR / "batch"
 except Exception:
     _default_pages_path = Path("./downloaded_pages")
     _default_spreads_path = Path("./final_spreads")
+    _default_cache_path = Path("./page_cache")
+    _default_batch_path = Path("./batch")
 
 DEFAULT_PAGES_DIR: str = str(_default_pages_path)
 DEFAULT_SPREADS_DIR: str = str(_default_spreads_path)
+PAGE_CACHE_DIR: str = str(_default_cache_path)
+DEFAULT_BATCH_DIR: str = str(_default_batch_path)  # Папки книг и файл очереди
 
 # --- Поля ---
 DEFAULT_URL_BASE: str = "https://elib.rgo.ru/safe-view/"
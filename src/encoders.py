@@ -0,0 +1,219 @@
+import importlib
+from io import BytesIO
+import logging
+import time
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# fast - быстрее всего, balanced - как раньше для JPEG, small - меньше файлы
+PRESETS: tuple[str, ...] = ("fast", "balanced", "small")
+
+
+class EncoderSpec(NamedTuple):
+    """Зарегистрированный формат."""
+
+    pil_format: str  # Имя формата для Image.save
+    extension: str
+    presets: Dict[str, Dict[str, Any]]  # Предустановка -> параметры save
+    plugin: Optional[str]  # Модуль, который добавляет формат в Pillow
+
+
+class OutputEncoder(NamedTuple):
+    """Готовые параметры сохранения; передается в дочерние процессы."""
+
+    name: str
+    pil_format: str
+    extension: str
+    options: Dict[str, Any]
+
+    def save(self, image: Image.Image, path: Any) -> None:
+        """Сохраняет изображение в файл или поток."""
+        image.save(path, self.pil_format, **self.options)
+
+
+_ENCODERS: Dict[str, EncoderSpec] = {}
+
+
+def register_encoder(
+    name: str,
+    pil_format: str,
+    extension: str,
+    presets: Dict[str, Dict[str, Any]],
+    plugin: Optional[str] = None,
+) -> None:
+    """Регистрирует формат вывода.
+
+    Args:
+        name: Имя для config.OUTPUT_FORMAT.
+        pil_format: Имя формата в Pillow.
+        extension: Расширение файлов (с точкой).
+        presets: Параметры Image.save для каждой из PRESETS.
+        plugin: Модуль-плагин Pillow, который нужно импортировать.
+    """
+    missing = set(PRESETS) - set(presets)
+    if missing:
+        raise ValueError(f"Encoder {name}: no presets {sorted(missing)}")
+    _ENCODERS[name] = EncoderSpec(pil_format, extension, presets, plugin)
+
+
+register_encoder(
+    "jpeg",
+    "JPEG",
+    ".jpg",
+    {
+        "fast": {},  # Без лишнего прохода оптимизации таблиц Хаффмана
+        "balanced": {"optimize": True},
+        "small": {"optimize": True, "progressive": True},
+    },
+)
+register_encoder(
+    "webp",
+    "WEBP",
+    ".webp",
+    {
+        "fast": {"quality": 85, "method": 0},
+        "balanced": {"quality": 85, "method": 4},
+        "small": {"quality": 80, "method": 6},
+    },
+)
+register_encoder(
+    "avif",
+    "AVIF",
+    ".avif",
+    {
+        "fast": {"quality": 75, "speed": 10},
+        "balanced": {"quality": 75, "speed": 6},
+        "small": {"quality": 70, "speed": 4},
+    },
+)
+register_encoder(
+    "jxl",
+    "JXL",
+    ".jxl",
+    {
+        "fast": {"quality": 85, "effort": 3},
+        "balanced": {"quality": 85, "effort": 7},
+        "small": {"quality": 80, "effort": 8},
+    },
+    plugin="pillow_jxl",
+)
+
+
+def registered_encoders() -> list[str]:
+    """Имена всех зарегистрированных форматов."""
+    return list(_ENCODERS)
+
+
+def available_encoders() -> list[str]:
+    """Имена форматов, которые можно использовать в этой установке."""
+    return [name for name in _ENCODERS if is_available(name)]
+
+
+def is_available(name: str) -> bool:
+    """Может ли Pillow сохранять в этот формат (плагин грузится при проверке)."""
+    spec = _ENCODERS.get(name)
+    if spec is None:
+        return False
+    if spec.plugin:
+        try:
+            importlib.import_module(spec.plugin)
+        except ImportError:
+            return False
+    if spec.pil_format not in Image.SAVE:
+        Image.init()  # Загружает остальные плагины Pillow (JPEG уже есть)
+    return spec.pil_format in Image.SAVE
+
+
+def get_encoder(name: str, preset: str, jpeg_quality: int) -> OutputEncoder:
+    """Параметры сохранения для формата и предустановки.
+
+    Для JPEG качество берется из jpeg_quality (config.JPEG_QUALITY).
+    Недоступный формат заменяется JPEG с той же предустановкой.
+
+    Raises:
+        ValueError: Неизвестный формат или предустановка.
+    """
+    if name not in _ENCODERS:
+        raise ValueError(
+            f"Неизвестный формат вывода: {name} (есть: {', '.join(_ENCODERS)})"
+        )
+    if preset not in PRESETS:
+        raise ValueError(
+            f"Неизвестная предустановка: {preset} (есть: {', '.join(PRESETS)})"
+        )
+    if not is_available(name):
+        logger.warning(f"Output format '{name}' is not supported here, using JPEG")
+        name = "jpeg"
+    spec = _ENCODERS[name]
+    options = dict(spec.presets[preset])
+    if name == "jpeg":
+        options["quality"] = jpeg_quality
+    return OutputEncoder(name, spec.pil_format, spec.extension, options)
+
+
+def encoder_from_config(config: Any) -> OutputEncoder:
+    """Кодировщик по настройкам OUTPUT_FORMAT, OUTPUT_PRESET и JPEG_QUALITY."""
+    return get_encoder(config.OUTPUT_FORMAT, config.OUTPUT_PRESET, config.JPEG_QUALITY)
+
+
+class EncoderBenchmark(NamedTuple):
+    """Результат замера одного формата."""
+
+    name: str
+    preset: str
+    seconds: float  # Лучшее время кодирования из повторов
+    size_bytes: int
+
+
+def benchmark_encoders(
+    image: Image.Image,
+    names: Optional[Sequence[str]] = None,
+    presets: Sequence[str] = PRESETS,
+    jpeg_quality: int = 95,
+    repeat: int = 3,
+) -> list[EncoderBenchmark]:
+    """Замеряет время кодирования и размер результата в памяти.
+
+    Args:
+        image: Изображение (например, готовый разворот).
+        names: Форматы (None - все доступные). Недоступные пропускаются.
+        presets: Предустановки для замера.
+        jpeg_quality: Качество JPEG.
+        repeat: Повторов на вариант, берется лучшее время.
+
+    Returns:
+        Результаты в порядке форматов и предустановок.
+    """
+    image = image.convert("RGB")
+    image.load()
+    results = []
+    for name in available_encoders() if names is None else names:
+        if not is_available(name):
+            logger.warning(f"Benchmark: output format '{name}' is not available")
+            continue
+        for preset in presets:
+            encoder = get_encoder(name, preset, jpeg_quality)
+            best = float("inf")
+            size = 0
+            for _ in range(max(repeat, 1)):
+                buffer = BytesIO()
+                started = time.perf_counter()
+                encoder.save(image, buffer)
+                best = min(best, time.perf_counter() - started)
+                size = buffer.tell()
+            results.append(EncoderBenchmark(name, preset, best, size))
+    return results
+
+
+def format_benchmark(results: Sequence[EncoderBenchmark]) -> str:
+    """Таблица результатов benchmark_encoders."""
+    lines = [f"{'format':<6} {'preset':<9}{'encode [ms]':>12}{'size [KB]':>12}"]
+    for result in results:
+        lines.append(
+            f"{result.name:<6} {result.preset:<9}"
+            f"{result.seconds * 1000:12.1f}{result.size_bytes / 1024:12.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,137 @@
+from contextlib import suppress
+import errno
+import logging
+import os
+from pathlib import Path
+import shutil
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence, Set, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Все способы по порядку от самого дешевого; "copy2" - обычное копирование
+COPY_METHODS: Tuple[str, ...] = ("reflink", "hardlink", "copy_file_range", "copy2")
+
+_FICLONE = 0x40049409  # ioctl из linux/fs.h: клонирование файла целиком
+
+# Ошибки, после которых способ не пробуется для этой пары устройств
+_UNSUPPORTED_ERRNOS = frozenset(
+    (
+        errno.EXDEV,  # Разные файловые системы
+        errno.EOPNOTSUPP,
+        errno.ENOTSUP,
+        errno.ENOTTY,  # ioctl не поддерживается
+        errno.EINVAL,
+        errno.ENOSYS,
+        errno.EPERM,  # Жесткие ссылки запрещены (FAT, сетевые диски)
+        errno.EMLINK,  # Слишком много ссылок на файл
+    )
+)
+
+# (способ, устройство источника, устройство папки назначения)
+_unsupported: Set[Tuple[str, int, int]] = set()
+_unsupported_lock = threading.Lock()
+
+
+def _reflink(source: Path, target: Path) -> None:
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        raise OSError(errno.ENOTSUP, "reflink is not supported") from None
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    shutil.copystat(source, target)
+
+
+def _hardlink(source: Path, target: Path) -> None:
+    os.link(source, target)
+
+
+def _copy_file_range(source: Path, target: Path) -> None:
+    if not hasattr(os, "copy_file_range"):  # Только Linux
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+            if copied == 0:  # Файл укоротился или ядро не смогло скопировать
+                raise OSError(
+                    errno.EIO, f"copy_file_range stopped with {remaining} bytes left"
+                )
+            remaining -= copied
+    shutil.copystat(source, target)
+
+
+_METHODS: Dict[str, Callable[[Path, Path], None]] = {
+    "reflink": _reflink,
+    "hardlink": _hardlink,
+    "copy_file_range": _copy_file_range,
+}
+
+
+def copy_file(source: Any, target: Any, methods: Optional[Sequence[str]] = None) -> str:
+    """Копирует файл первым сработавшим способом из methods.
+
+    Быстрые способы пишут во временный файл рядом с target и заменяют
+    target целиком, так что при ошибке на месте остается прежний файл.
+    Способ, который не поддерживается файловой системой, больше не
+    пробуется для той же пары устройств. Последним всегда идет
+    shutil.copy2 (на Linux он сам использует sendfile).
+
+    Args:
+        source: Исходный файл.
+        target: Файл назначения (перезаписывается).
+        methods: Способы из COPY_METHODS по порядку (None - config.COPY_METHODS).
+
+    Returns:
+        Имя способа, которым скопирован файл.
+
+    Raises:
+        ValueError: Неизвестный способ копирования.
+        OSError: Ошибка shutil.copy2.
+    """
+    methods = config.COPY_METHODS if methods is None else methods
+    unknown = [name for name in methods if name not in COPY_METHODS]
+    if unknown:
+        raise ValueError(
+            f"Неизвестный способ копирования: {', '.join(unknown)} "
+            f"(есть: {', '.join(COPY_METHODS)})"
+        )
+
+    devices: Optional[Tuple[int, int]] = None
+    for name in methods:
+        if name == "copy2":
+            break
+        source_path, target_path = Path(source), Path(target)
+        if devices is None:
+            try:
+                devices = (
+                    source_path.stat().st_dev,
+                    target_path.parent.stat().st_dev,
+                )
+            except OSError:
+                break  # Ошибку покажет shutil.copy2
+        if (name, *devices) in _unsupported:
+            continue
+        temp_path = target_path.with_name(
+            f"{target_path.name}.{os.getpid()}.{threading.get_ident()}"
+            f"{config.PARTIAL_FILE_SUFFIX}"
+        )
+        try:
+            _METHODS[name](source_path, temp_path)
+            os.replace(temp_path, target_path)
+        except OSError as e:
+            with suppress(OSError):
+                temp_path.unlink()
+            if e.errno in _UNSUPPORTED_ERRNOS:
+                with _unsupported_lock:
+                    _unsupported.add((name, *devices))
+            logger.debug(f"Copy method {name} failed for {source_path.name}: {e}")
+            continue
+        logger.debug(f"Copied with {name}: {source_path} -> {target_path}")
+        return name
+
+    shutil.copy2(source, target)
+    return "copy2"
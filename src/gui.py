@@ -3,21 +3,25 @@ import logging
 import os
 from pathlib import Path
 import threading
-import time
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
-from typing import Callable, Dict
+from typing import TYPE_CHECKING, Callable, Dict, Optional, cast
 
 # Импортируем новые модули и старые зависимости
 from . import (
     config,
-    logic,
     ui_builder,  # Импортируем модуль целиком
+    utils,
 )
 from .app_state import AppState
+from .progress import ProgressReporter, ProgressStats, format_progress
 from .settings_manager import SettingsManager
+from .status_buffer import StatusBuffer
 from .task_manager import TaskManager
 
+if TYPE_CHECKING:  # logic тянет requests и Pillow, грузится при первой задаче
+    from .logic import LibraryHandler
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,26 +43,29 @@ class JournalDownloaderApp:
         # 2. Менеджер настроек (работает с AppState)
         self.settings_manager = SettingsManager(self.state)
 
-        # 3. Логика и событие остановки
+        # 3. Событие остановки. Обработчик логики создается при первой задаче
+        # (см. _create_handler), чтобы окно не ждало импорта requests и Pillow
         self.stop_event = threading.Event()
-        # Создаем экземпляр обработчика логики
-        self.handler = logic.LibraryHandler(
-            status_callback=self._update_status_safe,  # Передаем методы GUI как колбэки
-            progress_callback=self._update_progress_safe,
-            stop_event=self.stop_event,
+        self.handler: Optional[LibraryHandler] = None
+        # Строки статуса от рабочих потоков; выводятся пачками (_status_flush_tick)
+        self.status_buffer = StatusBuffer()
+        # Прореживает прогресс и считает скорость/ETA для строки под прогресс-баром
+        self.progress_reporter = ProgressReporter(
+            self._update_progress_safe, bytes_source=self._downloaded_bytes
         )
 
         # 4. Менеджер задач (получает зависимости и колбэки)
         self.task_manager = TaskManager(
             app_state=self.state,
-            handler=self.handler,
+            handler=None,
             stop_event=self.stop_event,
             status_callback=self._update_status_safe,
-            progress_callback=self._update_progress_safe,
+            progress_callback=self.progress_reporter,
             set_buttons_state_callback=self._set_buttons_state,
             show_message_callback=self._show_message_safe,
             open_folder_callback=self._open_folder_safe,
             root=self.root,  # Передаем root для root.after
+            handler_factory=self._create_handler,
         )
 
         # 5. Построение UI
@@ -86,14 +93,38 @@ class JournalDownloaderApp:
             )
         )
         self.widgets.update(ui_builder.create_progress_frame(self.root))
-        self.widgets.update(ui_builder.create_status_frame(self.root))
+        self.widgets.update(
+            ui_builder.create_status_frame(self.root, self.open_log_file)
+        )
 
         # 6. Загрузка настроек и установка обработчика закрытия
         self.settings_manager.load_settings()  # Загрузит в self.state, виджеты обновятся
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self._status_flush_tick()
 
         logger.info("GUI initialized successfully.")
 
+    def _create_handler(self) -> "LibraryHandler":
+        """Создает обработчик логики (движок скачивания из config)."""
+        from . import async_engine, logic, page_cache
+
+        handler_class = (
+            async_engine.AsyncLibraryHandler
+            if config.DOWNLOAD_ENGINE == "asyncio"
+            else logic.LibraryHandler
+        )
+        self.handler = handler_class(
+            status_callback=self._update_status_safe,  # Передаем методы GUI как колбэки
+            progress_callback=self.progress_reporter,
+            stop_event=self.stop_event,
+            page_cache=page_cache.create_page_cache(),
+        )
+        return self.handler
+
+    def _downloaded_bytes(self) -> int:
+        """Байт, записанных текущим скачиванием (для скорости в МБ/с)."""
+        return self.handler.downloaded_bytes if self.handler is not None else 0
+
     # --- Методы обратного вызова для GUI ---
 
     def browse_output_pages(self) -> None:
@@ -127,27 +158,42 @@ class JournalDownloaderApp:
     # --- Обновление GUI (вызываются из TaskManager через root.after) ---
 
     def _update_status_safe(self, message: str) -> None:
-        """Безопасно планирует обновление статуса в основном потоке."""
-        if self.root and self.root.winfo_exists():
-            self.root.after(0, self._update_status, message)
-        else:
-            logger.warning(f"GUI root doesn't exist, status update ignored: {message}")
+        """Ставит сообщение в буфер статуса (можно вызывать из любого потока).
+
+        Виджет обновляется в основном потоке по таймеру (_status_flush_tick).
+        """
+        if isinstance(message, str) and not message.startswith("---"):
+            logger.info(f"GUI Status Update: {message}")
+        self.status_buffer.put(message)
 
     def _update_status(self, message: str) -> None:
-        """Обновляет текстовое поле статуса (выполняется в основном потоке)."""
-        if not self.root or not self.root.winfo_exists():
+        """Сразу выводит сообщение (только из основного потока)."""
+        self._update_status_safe(message)
+        self._flush_status()
+
+    def _status_flush_tick(self) -> None:
+        """Периодически выводит накопленные строки статуса."""
+        if not self.root:
+            return
+        self._flush_status()
+        try:
+            self.root.after(config.GUI_STATUS_FLUSH_MS, self._status_flush_tick)
+        except tk.TclError:
+            logger.debug("Status flush timer stopped: root is being destroyed.")
+
+    def _flush_status(self) -> None:
+        """Вставляет все накопленные строки статуса одной операцией."""
+        lines = self.status_buffer.drain()
+        if not lines or not self.root or not self.root.winfo_exists():
             return
         status_text_widget = self.widgets.get("status_text")
         if not isinstance(status_text_widget, scrolledtext.ScrolledText):
             return
 
-        if isinstance(message, str) and not message.startswith("---"):
-            logger.info(f"GUI Status Update: {message}")
-
         try:
             status_text_widget.config(state=tk.NORMAL)
-            timestamp = time.strftime("%H:%M:%S")
-            status_text_widget.insert(tk.END, f"[{timestamp}] {message}\n")
+            status_text_widget.insert(tk.END, "".join(lines))
+            self._trim_status(status_text_widget)
             status_text_widget.see(tk.END)
             status_text_widget.config(state=tk.DISABLED)
         except tk.TclError as e:
@@ -155,17 +201,28 @@ class JournalDownloaderApp:
         except Exception as e:
             logger.error(f"Unexpected error updating status text: {e}", exc_info=True)
 
-    def _update_progress_safe(self, current_value: int, max_value: int) -> None:
-        """Безопасно планирует обновление прогресс-бара."""
+    def _update_progress_safe(self, stats: ProgressStats) -> None:
+        """Безопасно планирует обновление прогресс-бара.
+
+        Вызывается уже прореженным ProgressReporter (self.progress_reporter).
+        """
         if self.root and self.root.winfo_exists():
-            self.root.after(0, self._update_progress, current_value, max_value)
+            self.root.after(
+                0,
+                self._update_progress,
+                stats.current,
+                stats.total,
+                format_progress(stats),
+            )
         else:
             logger.warning(
-                f"GUI root doesn't exist, progress update ignored: {current_value}/{max_value}"
+                f"GUI root doesn't exist, progress update ignored: {stats.current}/{stats.total}"
             )
 
-    def _update_progress(self, current_value: int, max_value: int) -> None:
-        """Обновляет прогресс-бар (выполняется в основном потоке)."""
+    def _update_progress(
+        self, current_value: int, max_value: int, details: str = ""
+    ) -> None:
+        """Обновляет прогресс-бар и строку скорости (в основном потоке)."""
         if not self.root or not self.root.winfo_exists():
             return
         progress_bar_widget = self.widgets.get("progress_bar")
@@ -179,6 +236,12 @@ class JournalDownloaderApp:
             else:
                 progress_bar_widget["maximum"] = 1
                 progress_bar_widget["value"] = 0
+            # В WidgetsDict виджеты хранятся как tk.Widget, а это ttk.Label
+            progress_label = cast(
+                Optional[ttk.Label], self.widgets.get("progress_label")
+            )
+            if progress_label is not None:
+                progress_label.config(text=details)
         except tk.TclError as e:
             logger.warning(f"TclError updating progress bar (window closing?): {e}")
         except Exception as e:
@@ -269,9 +332,7 @@ class JournalDownloaderApp:
         try:
             norm_path = os.path.normpath(folder_path)
             if os.path.isdir(norm_path):
-                os.startfile(
-                    norm_path
-                )  # Должно работать на Windows, MacOS, Linux (с xdg-open)
+                utils.open_in_system_app(norm_path)
                 logger.info(f"Opened folder successfully: {norm_path}")
             else:
                 err_msg = f"Ошибка: Папка не найдена: {norm_path}"
@@ -290,6 +351,30 @@ class JournalDownloaderApp:
                 "error", "Ошибка", f"Произошла ошибка при попытке открыть папку:\n{e}"
             )
 
+    def _trim_status(self, status_text_widget: scrolledtext.ScrolledText) -> None:
+        """Оставляет в поле статуса последние config.GUI_STATUS_MAX_LINES строк.
+
+        С длинным текстом Tk вставляет и прокручивает все медленнее, а полный
+        журнал все равно есть в лог-файле (кнопка «Журнал»).
+        """
+        # После последней строки всегда идет пустая
+        line_count = int(status_text_widget.index("end-1c").split(".")[0]) - 1
+        excess = line_count - config.GUI_STATUS_MAX_LINES
+        if excess > 0:
+            status_text_widget.delete("1.0", f"{excess + 1}.0")
+
+    def open_log_file(self) -> None:
+        """Открывает полный журнал (лог-файл) в системной программе."""
+        log_path = os.path.abspath(config.LOG_FILE)
+        logger.info(f"Opening log file: {log_path}")
+        try:
+            utils.open_in_system_app(log_path)
+        except Exception as e:
+            logger.error(f"Could not open log file {log_path}: {e}", exc_info=True)
+            self._show_message(
+                "error", "Ошибка", f"Не удалось открыть журнал:\n{log_path}\n{e}"
+            )
+
     def clear_status(self) -> None:
         """Очищает текстовое поле статуса."""
         if not self.root or not self.root.winfo_exists():
@@ -1,11 +1,15 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import logging
+import os
 from pathlib import Path
-import shutil
 import time
 import types
-from typing import Tuple
+from typing import Any, Dict, NamedTuple, Optional, Protocol, Sequence, Tuple
 
-from PIL import Image
+from PIL import Image, ImageDraw
+
+from . import build_record, encoders, file_copy, jpeg_join
 
 # Общие типы и зависимости
 from .types import ProgressCallback, StatusCallback, StopEvent
@@ -14,6 +18,397 @@ ConfigModule = types.ModuleType
 UtilsModule = types.ModuleType
 
 
+class PageSource(Protocol):
+    """Упорядоченные по номеру страницы, которые нужно обработать."""
+
+    @property
+    def total(self) -> int:
+        """Ожидаемое количество страниц (может уменьшаться)."""
+        ...
+
+    def has(self, position: int) -> bool:
+        """Есть ли страница с таким порядковым номером (может ждать)."""
+        ...
+
+    def __getitem__(self, position: int) -> Path: ...
+
+
+class _PageList:
+    """Источник страниц из уже готового списка файлов."""
+
+    def __init__(self, files: list[Path]):
+        self._files = files
+
+    @property
+    def total(self) -> int:
+        return len(self._files)
+
+    def has(self, position: int) -> bool:
+        return position < len(self._files)
+
+    def __getitem__(self, position: int) -> Path:
+        return self._files[position]
+
+
+class SpreadJob(NamedTuple):
+    """Задание на один выходной файл: копия страницы или склейка пары."""
+
+    sources: Tuple[Path, ...]  # Одна страница - копия, две - разворот
+    output_file_path: Path
+    status_message: str
+    next_index: int  # Индекс следующей страницы (для прогресса)
+
+
+class ResizeStrategy(NamedTuple):
+    """Как приводить страницы разворота к одной высоте."""
+
+    target: str  # "max" - по большей странице, "min" - по меньшей
+    resample: Image.Resampling
+    # Уменьшение в reducing_gap раз и больше: сначала draft (JPEG) и reduce()
+    reducing_gap: float
+
+
+RESIZE_FILTERS: Dict[str, Image.Resampling] = {
+    "lanczos": Image.Resampling.LANCZOS,
+    "bicubic": Image.Resampling.BICUBIC,
+    "bilinear": Image.Resampling.BILINEAR,
+}
+# Фильтр для RESIZE_FILTER = "auto" по предустановке вывода (OUTPUT_PRESET)
+_PRESET_FILTERS: Dict[str, str] = {
+    "fast": "bilinear",
+    "balanced": "bicubic",
+    "small": "lanczos",
+}
+DEFAULT_RESIZE = ResizeStrategy("max", Image.Resampling.LANCZOS, 2.0)
+
+
+def resize_strategy_from_config(config: ConfigModule) -> ResizeStrategy:
+    """Стратегия по настройкам SPREAD_TARGET_HEIGHT, RESIZE_FILTER и
+    RESIZE_REDUCING_GAP.
+
+    Raises:
+        ValueError: Неизвестный фильтр или режим высоты.
+    """
+    name = config.RESIZE_FILTER
+    if name == "auto":
+        name = _PRESET_FILTERS.get(config.OUTPUT_PRESET, "lanczos")
+    if name not in RESIZE_FILTERS:
+        raise ValueError(f"Неизвестный фильтр масштабирования: {name}")
+    if config.SPREAD_TARGET_HEIGHT not in ("max", "min"):
+        raise ValueError(
+            f"Неизвестный режим высоты разворота: {config.SPREAD_TARGET_HEIGHT}"
+        )
+    return ResizeStrategy(
+        config.SPREAD_TARGET_HEIGHT, RESIZE_FILTERS[name], config.RESIZE_REDUCING_GAP
+    )
+
+
+class StripMode(NamedTuple):
+    """Склейка больших разворотов полосами для экономии памяти."""
+
+    min_pixels: int  # Разворот от стольких пикселей склеивается полосами
+    band_height: int  # Строк в полосе
+
+
+def strip_mode_from_config(config: ConfigModule) -> Optional[StripMode]:
+    """Режим по COMPOSE_LOW_MEMORY_PIXELS и COMPOSE_STRIP_HEIGHT (None - выключен)."""
+    if config.COMPOSE_LOW_MEMORY_PIXELS <= 0:
+        return None
+    return StripMode(config.COMPOSE_LOW_MEMORY_PIXELS, config.COMPOSE_STRIP_HEIGHT)
+
+
+class SpreadTimings(NamedTuple):
+    """Время этапов создания разворотов, секунд."""
+
+    decode: float = 0.0
+    resize: float = 0.0
+    encode: float = 0.0  # Склейка и запись файла (или вызовы jpegtran)
+
+    def plus(self, other: "SpreadTimings") -> "SpreadTimings":
+        return SpreadTimings(*(a + b for a, b in zip(self, other)))
+
+    def __str__(self) -> str:
+        return (
+            f"decode {self.decode:.2f} s, resize {self.resize:.2f} s, "
+            f"encode {self.encode:.2f} s"
+        )
+
+
+# Фон разворота по режиму
+_WHITE: Dict[str, Any] = {"L": 255, "RGB": (255, 255, 255)}
+
+
+def spread_mode(*page_modes: str) -> str:
+    """Режим разворота: "L", если все страницы серые или ч/б, иначе "RGB".
+
+    Серый разворот втрое меньше в памяти и заметно меньше в JPEG.
+    """
+    return "L" if all(mode in ("L", "1") for mode in page_modes) else "RGB"
+
+
+def _as_mode(img: Image.Image, mode: str) -> Image.Image:
+    """Изображение в нужном режиме; копия создается, только если режим другой."""
+    return img if img.mode == mode else img.convert(mode)
+
+
+def _draft_for_height(
+    img: Image.Image,
+    size: Tuple[int, int],
+    target_height: int,
+    strategy: ResizeStrategy,
+) -> None:
+    """Для сильного уменьшения JPEG сразу декодируется в 2-8 раз меньше
+    (но не меньше нужного размера). Вызывается до загрузки пикселей.
+    """
+    width, height = size
+    if height >= target_height * strategy.reducing_gap:
+        img.draft(img.mode, (width * target_height // height, target_height))
+
+
+def _paste_in_strips(
+    canvas: Image.Image,
+    img: Image.Image,
+    x: int,
+    size: Tuple[int, int],
+    strategy: ResizeStrategy,
+    band_height: int,
+) -> None:
+    """Вставляет страницу в разворот полосами, масштабируя ее до size.
+
+    Каждая полоса масштабируется из своей области исходника (resize с box
+    берет и соседние строки, поэтому швов нет), так что полная
+    масштабированная копия и копия в режиме разворота не создаются.
+    """
+    width, height = size
+    scale = img.height / height
+    for top in range(0, height, band_height):
+        bottom = min(top + band_height, height)
+        if img.size == size:
+            band = img.crop((0, top, width, bottom))
+        else:
+            band = img.resize(
+                (width, bottom - top),
+                strategy.resample,
+                box=(0, top * scale, img.width, bottom * scale),
+            )
+        canvas.paste(_as_mode(band, canvas.mode), (x, top))
+
+
+def _fit_height(
+    img: Image.Image,
+    size: Tuple[int, int],
+    target_height: int,
+    strategy: ResizeStrategy,
+) -> Tuple[Image.Image, int]:
+    """Масштабирует страницу исходного размера size до target_height.
+
+    Страница нужной высоты возвращается как есть, без копии. Сильно
+    уменьшаемая сначала грубо уменьшается через reduce() в целое число раз.
+
+    Returns:
+        Кортеж (изображение, его итоговая ширина).
+    """
+    width, height = size
+    if height == target_height:
+        return img, width
+    new_size = (int(width * target_height / height), target_height)
+    if img.size == new_size:  # draft уже дал нужный размер
+        return img, new_size[0]
+    if img.size[1] >= target_height * strategy.reducing_gap:
+        resized = img.resize(
+            new_size, strategy.resample, reducing_gap=strategy.reducing_gap
+        )
+    else:
+        resized = img.resize(new_size, strategy.resample)
+    return resized, new_size[0]
+
+
+def compose_spread(
+    left_path: Path,
+    right_path: Path,
+    output_file_path: Path,
+    jpeg_quality: int,
+    logger: logging.Logger,
+    jpegtran: Optional[str] = None,
+    encoder: Optional[encoders.OutputEncoder] = None,
+    resize: ResizeStrategy = DEFAULT_RESIZE,
+    strips: Optional[StripMode] = None,
+) -> SpreadTimings:
+    """Склеивает две одиночные страницы в разворот и сохраняет его.
+
+    Страницы приводятся к одной высоте (по resize: большей или меньшей из
+    двух), масштабируется только страница другой высоты. JPEG, который
+    нужно уменьшить в resize.reducing_gap раз и больше, сразу декодируется
+    в уменьшенном масштабе (Image.draft). Если задан jpegtran, вывод в JPEG
+    и обе страницы - JPEG одной высоты с совместимыми параметрами, они
+    склеиваются без перекодирования; иначе - через Pillow. Функция не
+    зависит от состояния модуля, поэтому может выполняться в дочернем
+    процессе. encoder задает формат и параметры сохранения; без него -
+    JPEG с jpeg_quality и optimize.
+
+    Разворот от strips.min_pixels пикселей собирается полосами: страницы
+    декодируются по одной и масштабируются прямо в холст разворота, в
+    памяти - холст, одна страница и полоса вместо холста, обеих страниц и
+    их масштабированных копий.
+
+    Returns:
+        Время декодирования, масштабирования и записи.
+
+    Raises:
+        Exception: Любая ошибка чтения, склейки или записи изображений.
+    """
+    started = time.perf_counter()
+    if encoder is None:
+        encoder = encoders.get_encoder("jpeg", "balanced", jpeg_quality)
+    if (
+        jpegtran
+        and encoder.pil_format == "JPEG"
+        and jpeg_join.join_losslessly(left_path, right_path, output_file_path, jpegtran)
+    ):
+        logger.debug("    Joined losslessly with jpegtran, no re-encoding.")
+        return SpreadTimings(encode=time.perf_counter() - started)
+
+    with (
+        Image.open(left_path) as img_left,
+        Image.open(right_path) as img_right,
+    ):
+        w_left, h_left = img_left.size
+        w_right, h_right = img_right.size
+        heights = (h_left, h_right)
+        target_height = max(heights) if resize.target == "max" else min(heights)
+        mode = spread_mode(img_left.mode, img_right.mode)
+        if strips is not None:
+            final_widths = [
+                width
+                if height == target_height
+                else int(width * target_height / height)
+                for width, height in (img_left.size, img_right.size)
+            ]
+            if sum(final_widths) * target_height >= strips.min_pixels:
+                return _compose_in_strips(
+                    (img_left, img_right),
+                    final_widths,
+                    target_height,
+                    mode,
+                    output_file_path,
+                    encoder,
+                    resize,
+                    strips.band_height,
+                    logger,
+                    started,
+                )
+
+        for img in (img_left, img_right):
+            _draft_for_height(img, img.size, target_height, resize)
+            img.load()
+        decoded = time.perf_counter()
+
+        if h_left != h_right:
+            logger.debug(
+                f"    Resizing images to target height: {target_height}px (using {resize.resample.name})"
+            )
+            img_left_final, w_left_final = _fit_height(
+                img_left, (w_left, h_left), target_height, resize
+            )
+            img_right_final, w_right_final = _fit_height(
+                img_right, (w_right, h_right), target_height, resize
+            )
+            logger.debug(
+                f"    Resized to: {w_left_final}x{target_height} + {w_right_final}x{target_height}"
+            )
+        else:
+            img_left_final = img_left
+            img_right_final = img_right
+            w_left_final = w_left
+            w_right_final = w_right
+            logger.debug("    Heights match, no resize needed.")
+        resized = time.perf_counter()
+
+        total_width = w_left_final + w_right_final
+        logger.debug(
+            f"    Creating new spread image: {total_width}x{target_height} {mode}"
+        )
+        spread_img = Image.new(mode, (total_width, target_height), _WHITE[mode])
+        spread_img.paste(_as_mode(img_left_final, mode), (0, 0))
+        spread_img.paste(_as_mode(img_right_final, mode), (w_left_final, 0))
+        encoder.save(spread_img, output_file_path)
+
+    timings = SpreadTimings(
+        decoded - started, resized - decoded, time.perf_counter() - resized
+    )
+    logger.debug(f"    Timings: {timings}")
+    return timings
+
+
+def _compose_in_strips(
+    pages: Tuple[Image.Image, Image.Image],
+    final_widths: list[int],
+    target_height: int,
+    mode: str,
+    output_file_path: Path,
+    encoder: encoders.OutputEncoder,
+    resize: ResizeStrategy,
+    band_height: int,
+    logger: logging.Logger,
+    started: float,
+) -> SpreadTimings:
+    """Собирает разворот полосами; страницы открыты, но не декодированы."""
+    total_width = sum(final_widths)
+    logger.debug(
+        f"    Composing {total_width}x{target_height} {mode} in strips of {band_height} rows"
+    )
+    spread_img = Image.new(mode, (total_width, target_height), _WHITE[mode])
+    decode_seconds = resize_seconds = 0.0
+    x = 0
+    for img, final_width in zip(pages, final_widths):
+        header_size = img.size
+        _draft_for_height(img, header_size, target_height, resize)
+        img.load()
+        decoded = time.perf_counter()
+        decode_seconds += decoded - started
+        _paste_in_strips(
+            spread_img, img, x, (final_width, target_height), resize, band_height
+        )
+        img.close()  # Пиксели страницы больше не нужны
+        started = time.perf_counter()
+        resize_seconds += started - decoded
+        x += final_width
+    encoder.save(spread_img, output_file_path)
+    timings = SpreadTimings(
+        decode_seconds, resize_seconds, time.perf_counter() - started
+    )
+    logger.debug(f"    Timings: {timings}")
+    return timings
+
+
+def _list_numbered_pages(
+    input_path: Path,
+    config: ConfigModule,
+    utils: UtilsModule,
+    logger: logging.Logger,
+) -> list[Path]:
+    """Изображения из папки, упорядоченные по номеру страницы.
+
+    Raises:
+        OSError: Если папку не удалось прочитать.
+    """
+    all_files = [
+        f
+        for f in input_path.iterdir()
+        if f.is_file() and f.suffix.lower() in config.IMAGE_EXTENSIONS
+    ]
+    logger.info(f"Found {len(all_files)} potential image files in {input_path}.")
+
+    numbered_files = []
+    for f in all_files:
+        page_num = utils.get_page_number(f.name)
+        if page_num != -1:
+            numbered_files.append((page_num, f))
+        else:
+            logger.warning(f"Skipping file without page number: {f.name}")
+    return [f for _, f in sorted(numbered_files)]
+
+
 def process_images_in_folders(
     input_folder: str,
     output_folder: str,
@@ -23,6 +418,8 @@ def process_images_in_folders(
     config: ConfigModule,
     utils: UtilsModule,
     logger: logging.Logger,
+    workers: int = 1,
+    rebuild: bool = False,
 ) -> Tuple[int, int]:
     """Обрабатывает скачанные изображения: копирует обложки/развороты,
     склеивает одиночные страницы.
@@ -36,6 +433,10 @@ def process_images_in_folders(
         config: Модуль с конфигурацией.
         utils: Модуль с утилитами.
         logger: Экземпляр логгера.
+        workers: Количество процессов для склейки разворотов
+                 (0 - по числу ядер, 1 - последовательно в этом процессе).
+        rebuild: Собрать заново все выходные файлы, даже неизмененные
+                 (при config.INCREMENTAL_PROCESSING).
 
     Returns:
         Кортеж (количество обработанных/скопированных файлов,
@@ -61,12 +462,7 @@ def process_images_in_folders(
         return 0, 0
 
     try:
-        all_files = [
-            f
-            for f in input_path.iterdir()
-            if f.is_file() and f.suffix.lower() in config.IMAGE_EXTENSIONS
-        ]
-        logger.info(f"Found {len(all_files)} potential image files in {input_path}.")
+        sorted_files = _list_numbered_pages(input_path, config, utils, logger)
     except FileNotFoundError:
         msg = f"Ошибка: Папка со страницами '{input_folder}' не найдена."
         status_callback(msg)
@@ -78,15 +474,6 @@ def process_images_in_folders(
         logger.error(msg, exc_info=True)
         return 0, 0
 
-    numbered_files = []
-    for f in all_files:
-        page_num = utils.get_page_number(f.name)
-        if page_num != -1:
-            numbered_files.append((page_num, f))
-        else:
-            logger.warning(f"Skipping file without page number: {f.name}")
-
-    sorted_files = [f for _, f in sorted(numbered_files)]
     total_files_to_process = len(sorted_files)
     logger.info(f"Found {total_files_to_process} numbered image files to process.")
 
@@ -98,11 +485,214 @@ def process_images_in_folders(
     status_callback(f"Найдено {total_files_to_process} файлов. Создание разворотов...")
     progress_callback(0, total_files_to_process)
 
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if workers > 1:
+        return _build_spreads_parallel(
+            sorted_files,
+            output_path,
+            status_callback,
+            progress_callback,
+            stop_event,
+            config,
+            utils,
+            logger,
+            workers,
+            rebuild,
+        )
+    return _build_spreads(
+        _PageList(sorted_files),
+        output_path,
+        status_callback,
+        progress_callback,
+        stop_event,
+        config,
+        utils,
+        logger,
+        rebuild,
+    )
+
+
+def process_page_feed(
+    pages: PageSource,
+    output_folder: str,
+    status_callback: StatusCallback,
+    progress_callback: ProgressCallback,
+    stop_event: StopEvent,
+    config: ConfigModule,
+    utils: UtilsModule,
+    logger: logging.Logger,
+) -> Tuple[int, int]:
+    """Создает развороты из страниц, которые еще скачиваются.
+
+    Обходит страницы в том же порядке и по тем же правилам, что и
+    process_images_in_folders, но берет их из pages: обращение к
+    следующей странице ждет, пока она не будет скачана. stop_event
+    не сбрасывается - им управляет задача скачивания.
+
+    Args:
+        pages: Источник страниц (например, pipeline.PageFeed).
+        output_folder: Папка для сохранения разворотов.
+        status_callback: Функция для отправки сообщений о статусе (в GUI).
+        progress_callback: Функция для обновления прогресса (в GUI).
+        stop_event: Событие для сигнализации об остановке операции.
+        config: Модуль с конфигурацией.
+        utils: Модуль с утилитами.
+        logger: Экземпляр логгера.
+
+    Returns:
+        Кортеж (количество обработанных/скопированных файлов,
+                 количество созданных разворотов).
+    """
+    output_path = Path(output_folder)
+    logger.info(f"Starting pipelined image processing. Output: '{output_path}'")
+    try:
+        output_path.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        msg = f"Ошибка создания папки для разворотов '{output_folder}': {e}"
+        status_callback(msg)
+        logger.error(msg, exc_info=True)
+        return 0, 0
+
+    status_callback("Создание разворотов по мере скачивания страниц...")
+    progress_callback(0, pages.total)
+    return _build_spreads(
+        pages,
+        output_path,
+        status_callback,
+        progress_callback,
+        stop_event,
+        config,
+        utils,
+        logger,
+    )
+
+
+def processing_params(
+    config: ConfigModule,
+    encoder: encoders.OutputEncoder,
+    resize: ResizeStrategy,
+    jpegtran: Optional[str],
+) -> Dict[str, Any]:
+    """Параметры, от которых зависит содержимое разворотов (для записи сборки)."""
+    return {
+        "threshold": config.DEFAULT_ASPECT_RATIO_THRESHOLD,
+        "jpeg_quality": config.JPEG_QUALITY,
+        "encoder": [encoder.name, encoder.options],
+        "resize": list(resize),
+        "lossless_join": jpegtran is not None,
+    }
+
+
+def _open_build_record(
+    output_path: Path,
+    config: ConfigModule,
+    encoder: encoders.OutputEncoder,
+    resize: ResizeStrategy,
+    jpegtran: Optional[str],
+    rebuild: bool,
+) -> Optional[build_record.BuildRecord]:
+    if not config.INCREMENTAL_PROCESSING:
+        return None
+    params = processing_params(config, encoder, resize, jpegtran)
+    return build_record.open_build_record(output_path, params, rebuild)
+
+
+def _is_up_to_date(
+    record: Optional[build_record.BuildRecord],
+    output_file_path: Path,
+    sources: Tuple[Path, ...],
+    logger: logging.Logger,
+) -> bool:
+    if record is None or not record.is_current(output_file_path, sources):
+        return False
+    logger.info(f"    Up to date, skipped: {output_file_path.name}")
+    return True
+
+
+def _copy_page(
+    source: Path,
+    output_file_path: Path,
+    config: ConfigModule,
+    record: Optional[build_record.BuildRecord],
+    logger: logging.Logger,
+) -> bool:
+    """Копирует страницу, если прежняя копия устарела.
+
+    Returns:
+        True, если копия не изменилась с прошлого запуска и пропущена.
+    """
+    if _is_up_to_date(record, output_file_path, (source,), logger):
+        return True
+    try:
+        file_copy.copy_file(source, output_file_path, config.COPY_METHODS)
+    except Exception:
+        if record is not None:
+            record.forget(output_file_path)
+        raise
+    if record is not None:
+        record.update(output_file_path, (source,), build_record.KIND_COPY)
+    return False
+
+
+def _finish(
+    processed_count: int,
+    created_spread_count: int,
+    reused_count: int,
+    record: Optional[build_record.BuildRecord],
+    stop_event: StopEvent,
+    status_callback: StatusCallback,
+    logger: logging.Logger,
+) -> Tuple[int, int]:
+    """Сохраняет запись сборки и сообщает итог обработки.
+
+    После полного прохода (без СТОП) удаляет выходные файлы прежней
+    раскладки страниц, которые этот запуск не собрал.
+    """
+    if record is not None:
+        if not stop_event.is_set():
+            record.drop_stale()
+        record.save()
+    logger.info(
+        f"Processing finished. Processed/copied: {processed_count}, Spreads created: {created_spread_count}"
+        + (f", Up to date: {reused_count}" if reused_count else "")
+    )
+    status_callback(
+        f"Обработка завершена. Обработано/скопировано: {processed_count}. Создано разворотов: {created_spread_count}."
+        + (f" Без изменений: {reused_count}." if reused_count else "")
+    )
+    return processed_count, created_spread_count
+
+
+def _build_spreads(
+    sorted_files: PageSource,
+    output_path: Path,
+    status_callback: StatusCallback,
+    progress_callback: ProgressCallback,
+    stop_event: StopEvent,
+    config: ConfigModule,
+    utils: UtilsModule,
+    logger: logging.Logger,
+    rebuild: bool = False,
+) -> Tuple[int, int]:
+    """Основной цикл: копирует обложку/развороты и склеивает пары страниц.
+
+    При config.INCREMENTAL_PROCESSING выходные файлы, которые не изменились
+    с прошлого запуска (см. build_record.BuildRecord), пропускаются; при
+    rebuild все собираются заново.
+    """
+    jpegtran = jpeg_join.find_jpegtran()
+    encoder = encoders.encoder_from_config(config)
+    resize = resize_strategy_from_config(config)
+    strips = strip_mode_from_config(config)
+    record = _open_build_record(output_path, config, encoder, resize, jpegtran, rebuild)
+    timings = SpreadTimings()
     page_index = 0
     processed_count = 0  # Скопировано или склеено
     created_spread_count = 0
+    reused_count = 0  # Не изменились с прошлого запуска
 
-    while page_index < total_files_to_process:
+    while sorted_files.has(page_index):
         if stop_event.is_set():
             status_callback("--- Обработка прервана пользователем ---")
             logger.info("Processing interrupted by user.")
@@ -133,7 +723,10 @@ def process_images_in_folders(
                 f"Copying {'cover' if page_index == 0 else 'existing spread'}: {current_file_path.name} -> {output_filename}"
             )
             try:
-                shutil.copy2(current_file_path, output_file_path)
+                if _copy_page(
+                    current_file_path, output_file_path, config, record, logger
+                ):
+                    reused_count += 1
                 processed_increment = 1
             except Exception as e:
                 msg = f"Ошибка при копировании {current_file_path.name}: {e}"
@@ -144,7 +737,7 @@ def process_images_in_folders(
         # --- Вариант 2: Текущий файл - одиночная страница ---
         else:
             # Проверяем, есть ли следующий файл
-            if page_index + 1 < total_files_to_process:
+            if sorted_files.has(page_index + 1):
                 next_file_path = sorted_files[page_index + 1]
                 next_page_num = utils.get_page_number(next_file_path.name)
                 # Определяем, является ли СЛЕДУЮЩИЙ файл одиночным
@@ -157,7 +750,9 @@ def process_images_in_folders(
 
                 # --- Вариант 2.1: Следующий тоже одиночный ---
                 if next_is_single:
-                    output_filename = f"{current_page_num:03d}-{next_page_num:03d}.jpg"
+                    output_filename = (
+                        f"{current_page_num:03d}-{next_page_num:03d}{encoder.extension}"
+                    )
                     output_file_path = output_path / output_filename
                     status_msg = f"Создаю разворот: {current_file_path.name} + {next_file_path.name} -> {output_filename}"
                     status_callback(status_msg)
@@ -165,77 +760,36 @@ def process_images_in_folders(
                         f"Creating spread: {current_file_path.name} + {next_file_path.name} -> {output_filename}"
                     )
 
+                    sources = (current_file_path, next_file_path)
                     try:
-                        with (
-                            Image.open(current_file_path) as img_left,
-                            Image.open(next_file_path) as img_right,
-                        ):
-                            w_left, h_left = img_left.size
-                            w_right, h_right = img_right.size
-
-                            # Приводим к одной высоте по LANCZOS, если нужно
-                            if h_left != h_right:
-                                target_height = max(
-                                    h_left, h_right
-                                )  # Берем максимальную высоту
-                                logger.debug(
-                                    f"    Resizing images to target height: {target_height}px (using LANCZOS)"
-                                )
-
-                                # Масштабируем левое изображение
-                                ratio_left = target_height / h_left
-                                w_left_final = int(w_left * ratio_left)
-                                img_left_final = img_left.resize(
-                                    (w_left_final, target_height),
-                                    Image.Resampling.LANCZOS,
-                                )
-                                logger.debug(
-                                    f"    Left resized to: {w_left_final}x{target_height}"
-                                )
-
-                                # Масштабируем правое изображение
-                                ratio_right = target_height / h_right
-                                w_right_final = int(w_right * ratio_right)
-                                img_right_final = img_right.resize(
-                                    (w_right_final, target_height),
-                                    Image.Resampling.LANCZOS,
-                                )
-                                logger.debug(
-                                    f"    Right resized to: {w_right_final}x{target_height}"
-                                )
-                            else:
-                                target_height = h_left
-                                img_left_final = img_left
-                                img_right_final = img_right
-                                w_left_final = w_left
-                                w_right_final = w_right
-                                logger.debug("    Heights match, no resize needed.")
-
-                            total_width = w_left_final + w_right_final
-                            logger.debug(
-                                f"    Creating new spread image: {total_width}x{target_height}"
-                            )
-                            spread_img = Image.new(
-                                "RGB", (total_width, target_height), (255, 255, 255)
-                            )
-                            spread_img.paste(img_left_final.convert("RGB"), (0, 0))
-                            spread_img.paste(
-                                img_right_final.convert("RGB"), (w_left_final, 0)
-                            )
-                            spread_img.save(
+                        if _is_up_to_date(record, output_file_path, sources, logger):
+                            reused_count += 1
+                        else:
+                            spread_timings = compose_spread(
+                                current_file_path,
+                                next_file_path,
                                 output_file_path,
-                                "JPEG",
-                                quality=config.JPEG_QUALITY,
-                                optimize=True,
+                                config.JPEG_QUALITY,
+                                logger,
+                                jpegtran,
+                                encoder,
+                                resize,
+                                strips,
                             )
-
+                            timings = timings.plus(spread_timings)
+                            if record is not None:
+                                record.update(
+                                    output_file_path, sources, build_record.KIND_SPREAD
+                                )
                             created_spread_count += 1
-                            processed_increment = 2
                             logger.info(
                                 f"    Spread created successfully: {output_filename}"
                             )
+                        processed_increment = 2
 
                     except Exception as e:
+                        if record is not None:
+                            record.forget(output_file_path)
                         msg = f"Ошибка при создании разворота для {current_file_path.name} и {next_file_path.name}: {e}"
                         status_callback(msg)
                         logger.error(msg, exc_info=True)
@@ -255,7 +809,10 @@ def process_images_in_folders(
                         f"Copying single page (next is spread): {current_file_path.name} -> {output_filename}"
                     )
                     try:
-                        shutil.copy2(current_file_path, output_file_path)
+                        if _copy_page(
+                            current_file_path, output_file_path, config, record, logger
+                        ):
+                            reused_count += 1
                         processed_increment = 1
                     except Exception as e:
                         msg = f"Ошибка при копировании одиночной {current_file_path.name}: {e}"
@@ -273,7 +830,10 @@ def process_images_in_folders(
                     f"Copying last single page: {current_file_path.name} -> {output_filename}"
                 )
                 try:
-                    shutil.copy2(current_file_path, output_file_path)
+                    if _copy_page(
+                        current_file_path, output_file_path, config, record, logger
+                    ):
+                        reused_count += 1
                     processed_increment = 1
                 except Exception as e:
                     msg = f"Ошибка при копировании последней одиночной {current_file_path.name}: {e}"
@@ -282,14 +842,363 @@ def process_images_in_folders(
                 page_index += 1  # Завершаем цикл
 
         processed_count += processed_increment
-        progress_callback(page_index, total_files_to_process)
-        # Чтобы GUI успевал обновляться
-        time.sleep(0.01)
+        # Без пауз: GUI сам прореживает статус и прогресс (StatusBuffer,
+        # ProgressReporter), колбэки не блокируют цикл
+        progress_callback(page_index, sorted_files.total)
+
+    logger.info(f"Spread timings: {timings}")
+    return _finish(
+        processed_count,
+        created_spread_count,
+        reused_count,
+        record,
+        stop_event,
+        status_callback,
+        logger,
+    )
+
+
+def plan_spread_jobs(
+    sorted_files: list[Path],
+    output_path: Path,
+    config: ConfigModule,
+    utils: UtilsModule,
+    extension: str = ".jpg",
+) -> list[SpreadJob]:
+    """Заранее определяет выходные файлы по тем же правилам, что и _build_spreads.
+
+    Склеенные развороты получают расширение extension (формат вывода).
+
+    Returns:
+        Задания в порядке страниц.
+    """
+    threshold = config.DEFAULT_ASPECT_RATIO_THRESHOLD
+    jobs: list[SpreadJob] = []
+    page_index = 0
+    while page_index < len(sorted_files):
+        current_file_path = sorted_files[page_index]
+        current_page_num = utils.get_page_number(current_file_path.name)
+        copy_name = f"{current_page_num:03d}{current_file_path.suffix}"
+
+        if page_index == 0 or utils.is_likely_spread(current_file_path, threshold):
+            action_desc = "обложку" if page_index == 0 else "готовый разворот"
+            status_msg = (
+                f"Копирую {action_desc}: {current_file_path.name} -> {copy_name}"
+            )
+        elif page_index + 1 < len(sorted_files):
+            next_file_path = sorted_files[page_index + 1]
+            if not utils.is_likely_spread(next_file_path, threshold):
+                next_page_num = utils.get_page_number(next_file_path.name)
+                output_filename = (
+                    f"{current_page_num:03d}-{next_page_num:03d}{extension}"
+                )
+                status_msg = f"Создаю разворот: {current_file_path.name} + {next_file_path.name} -> {output_filename}"
+                page_index += 2
+                jobs.append(
+                    SpreadJob(
+                        (current_file_path, next_file_path),
+                        output_path / output_filename,
+                        status_msg,
+                        page_index,
+                    )
+                )
+                continue
+            status_msg = f"Копирую одиночную страницу (следующий - разворот): {current_file_path.name} -> {copy_name}"
+        else:
+            status_msg = f"Копирую последнюю одиночную страницу: {current_file_path.name} -> {copy_name}"
+
+        page_index += 1
+        jobs.append(
+            SpreadJob(
+                (current_file_path,), output_path / copy_name, status_msg, page_index
+            )
+        )
+    return jobs
+
+
+def run_spread_job(
+    job: SpreadJob,
+    jpeg_quality: int,
+    jpegtran: Optional[str] = None,
+    encoder: Optional[encoders.OutputEncoder] = None,
+    resize: ResizeStrategy = DEFAULT_RESIZE,
+    strips: Optional[StripMode] = None,
+    copy_methods: Optional[Sequence[str]] = None,
+) -> Optional[SpreadTimings]:
+    """Выполняет задание; вызывается в дочернем процессе пула.
+
+    Копии делаются способами copy_methods (None - config.COPY_METHODS).
+
+    Returns:
+        Время этапов для разворота, None для копии.
+    """
+    if len(job.sources) == 1:
+        file_copy.copy_file(job.sources[0], job.output_file_path, copy_methods)
+        return None
+    left_path, right_path = job.sources
+    return compose_spread(
+        left_path,
+        right_path,
+        job.output_file_path,
+        jpeg_quality,
+        logging.getLogger(__name__),
+        jpegtran,
+        encoder,
+        resize,
+        strips,
+    )
+
+
+def _wait_for_job(
+    future: Future, stop_event: StopEvent, poll_interval: float = 0.1
+) -> Tuple[bool, Optional[BaseException]]:
+    """Ждет задание, пока не придет сигнал остановки.
+
+    Returns:
+        Кортеж (завершено ли задание, исключение задания или None).
+    """
+    while not stop_event.is_set():
+        try:
+            future.result(timeout=poll_interval)
+            return True, None
+        except FutureTimeoutError:
+            continue
+        except Exception as e:
+            return True, e
+    return False, None
+
+
+def _build_spreads_parallel(
+    sorted_files: list[Path],
+    output_path: Path,
+    status_callback: StatusCallback,
+    progress_callback: ProgressCallback,
+    stop_event: StopEvent,
+    config: ConfigModule,
+    utils: UtilsModule,
+    logger: logging.Logger,
+    workers: int,
+    rebuild: bool = False,
+) -> Tuple[int, int]:
+    """Планирует все выходные файлы и выполняет их в пуле процессов.
 
+    Декодирование, масштабирование и кодирование JPEG идут параллельно,
+    а сообщения и прогресс выдаются в порядке страниц. Неизмененные
+    выходные файлы пропускаются так же, как в _build_spreads.
+    """
+    encoder = encoders.encoder_from_config(config)
+    jobs = plan_spread_jobs(sorted_files, output_path, config, utils, encoder.extension)
+    jpegtran = jpeg_join.find_jpegtran()
+    resize = resize_strategy_from_config(config)
+    strips = strip_mode_from_config(config)
+    record = _open_build_record(output_path, config, encoder, resize, jpegtran, rebuild)
+    up_to_date = [
+        _is_up_to_date(record, job.output_file_path, job.sources, logger)
+        for job in jobs
+    ]
+    timings = SpreadTimings()
+    workers = max(1, min(workers, up_to_date.count(False)))
     logger.info(
-        f"Processing finished. Processed/copied: {processed_count}, Spreads created: {created_spread_count}"
+        f"Planned {len(jobs)} output files ({up_to_date.count(True)} up to date), "
+        f"running in {workers} processes"
     )
-    status_callback(
-        f"Обработка завершена. Обработано/скопировано: {processed_count}. Создано разворотов: {created_spread_count}."
+    processed_count = 0
+    created_spread_count = 0
+    reused_count = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            None
+            if current
+            else executor.submit(
+                run_spread_job,
+                job,
+                config.JPEG_QUALITY,
+                jpegtran,
+                encoder,
+                resize,
+                strips,
+                config.COPY_METHODS,
+            )
+            for job, current in zip(jobs, up_to_date)
+        ]
+        for job, future in zip(jobs, futures):
+            if future is None:
+                if stop_event.is_set():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    status_callback("--- Обработка прервана пользователем ---")
+                    logger.info("Processing interrupted by user.")
+                    break
+                reused_count += 1
+                processed_count += len(job.sources)
+                progress_callback(job.next_index, len(sorted_files))
+                continue
+            finished, error = _wait_for_job(future, stop_event)
+            if not finished:
+                executor.shutdown(wait=False, cancel_futures=True)
+                status_callback("--- Обработка прервана пользователем ---")
+                logger.info("Processing interrupted by user.")
+                break
+
+            names = " + ".join(path.name for path in job.sources)
+            status_callback(job.status_message)
+            if error is None:
+                if record is not None:
+                    record.update(
+                        job.output_file_path,
+                        job.sources,
+                        build_record.KIND_SPREAD
+                        if len(job.sources) == 2
+                        else build_record.KIND_COPY,
+                    )
+                if len(job.sources) == 2:
+                    created_spread_count += 1
+                    spread_timings = future.result()
+                    if spread_timings is not None:
+                        timings = timings.plus(spread_timings)
+                    logger.info(
+                        f"    Spread created successfully: {job.output_file_path.name}"
+                    )
+                else:
+                    logger.info(f"Copied: {names} -> {job.output_file_path.name}")
+                processed_count += len(job.sources)
+            else:
+                if record is not None:
+                    record.forget(job.output_file_path)
+                if len(job.sources) == 2:
+                    msg = f"Ошибка при создании разворота для {job.sources[0].name} и {job.sources[1].name}: {error}"
+                    processed_count += 2  # Как и в последовательном режиме
+                else:
+                    msg = f"Ошибка при копировании {names}: {error}"
+                status_callback(msg)
+                logger.error(msg, exc_info=error)
+            progress_callback(job.next_index, len(sorted_files))
+
+    logger.info(f"Spread timings (sum over processes): {timings}")
+    return _finish(
+        processed_count,
+        created_spread_count,
+        reused_count,
+        record,
+        stop_event,
+        status_callback,
+        logger,
     )
-    return processed_count, created_spread_count
+
+
+def load_thumbnail(image_path: Path, size: Tuple[int, int]) -> Image.Image:
+    """Загружает уменьшенную копию изображения, вписанную в size.
+
+    JPEG декодируется сразу в масштабе 1/2, 1/4 или 1/8 (Image.draft),
+    поэтому полный скан не распаковывается. Остальные форматы
+    загружаются целиком и уменьшаются.
+
+    Raises:
+        Exception: Любая ошибка чтения изображения.
+    """
+    with Image.open(image_path) as img:
+        img.draft("RGB", size)  # Самый мелкий масштаб, не меньше size
+        img.thumbnail(size, Image.Resampling.BILINEAR)
+        return img.convert("RGB")
+
+
+def create_contact_sheets(
+    input_folder: str,
+    output_folder: str,
+    status_callback: StatusCallback,
+    stop_event: StopEvent,
+    config: ConfigModule,
+    utils: UtilsModule,
+    logger: logging.Logger,
+) -> list[Path]:
+    """Собирает листы миниатюр страниц, чтобы проверить их порядок.
+
+    Страницы идут в том же порядке, что и при создании разворотов, под
+    каждой миниатюрой - имя файла. На листе config.CONTACT_SHEET_COLUMNS x
+    config.CONTACT_SHEET_ROWS страниц; листы сохраняются как
+    contact_sheet_001.jpg, contact_sheet_002.jpg и т. д.
+
+    Args:
+        input_folder: Папка со скачанными страницами.
+        output_folder: Папка для листов (создается при необходимости).
+        status_callback: Функция для отправки сообщений о статусе (в GUI).
+        stop_event: Событие для сигнализации об остановке операции.
+        config: Модуль с конфигурацией.
+        utils: Модуль с утилитами.
+        logger: Экземпляр логгера.
+
+    Returns:
+        Пути созданных листов.
+    """
+    output_path = Path(output_folder)
+    try:
+        sorted_files = _list_numbered_pages(Path(input_folder), config, utils, logger)
+        if sorted_files:
+            output_path.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        msg = f"Ошибка подготовки листов миниатюр: {e}"
+        status_callback(msg)
+        logger.error(msg, exc_info=True)
+        return []
+    if not sorted_files:
+        logger.warning(f"No pages for contact sheets in {input_folder}")
+        return []
+
+    thumb_width, thumb_height = config.CONTACT_SHEET_THUMB_SIZE
+    columns = config.CONTACT_SHEET_COLUMNS
+    per_sheet = columns * config.CONTACT_SHEET_ROWS
+    margin, label_height = 8, 16
+    cell_width, cell_height = thumb_width + margin, thumb_height + label_height
+    status_callback(f"Создаю листы миниатюр ({len(sorted_files)} стр.)...")
+    logger.info(f"Creating contact sheets for {len(sorted_files)} pages")
+
+    sheet_paths: list[Path] = []
+    for start in range(0, len(sorted_files), per_sheet):
+        if stop_event.is_set():
+            logger.info("Contact sheets interrupted by user.")
+            break
+        chunk = sorted_files[start : start + per_sheet]
+        rows = -(-len(chunk) // columns)
+        sheet = Image.new(
+            "RGB",
+            (columns * cell_width + margin, rows * cell_height + margin),
+            (255, 255, 255),
+        )
+        draw = ImageDraw.Draw(sheet)
+        for position, page_path in enumerate(chunk):
+            x = margin + position % columns * cell_width
+            y = margin + position // columns * cell_height
+            try:
+                thumb = load_thumbnail(page_path, (thumb_width, thumb_height))
+            except Exception as e:
+                logger.warning(f"Cannot read {page_path.name} for contact sheet: {e}")
+                draw.rectangle(
+                    (x, y, x + thumb_width - 1, y + thumb_height - 1),
+                    outline=(200, 0, 0),
+                )
+            else:
+                sheet.paste(
+                    thumb,
+                    (
+                        x + (thumb_width - thumb.width) // 2,
+                        y + (thumb_height - thumb.height) // 2,
+                    ),
+                )
+            draw.text((x, y + thumb_height + 2), page_path.name, fill=(0, 0, 0))
+
+        sheet_path = output_path / f"contact_sheet_{len(sheet_paths) + 1:03d}.jpg"
+        try:
+            sheet.save(sheet_path, "JPEG", quality=config.CONTACT_SHEET_QUALITY)
+        except OSError as e:
+            msg = f"Ошибка сохранения листа миниатюр {sheet_path.name}: {e}"
+            status_callback(msg)
+            logger.error(msg, exc_info=True)
+            break
+        sheet_paths.append(sheet_path)
+
+    if sheet_paths:
+        status_callback(
+            f"Листы миниатюр ({len(sheet_paths)}) сохранены в '{output_path}'."
+        )
+    logger.info(f"Contact sheets created: {len(sheet_paths)}")
+    return sheet_paths
@@ -0,0 +1,138 @@
+from contextlib import suppress
+import logging
+import os
+from pathlib import Path
+import shutil
+import subprocess
+from typing import Any, NamedTuple, Optional, Tuple, Union
+
+from PIL import Image
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+class JpegLayout(NamedTuple):
+    """Параметры JPEG, от которых зависит склейка без перекодирования."""
+
+    width: int
+    height: int
+    mode: str
+    sampling: Tuple[Tuple[int, int], ...]  # (h, v) каждого компонента
+    quantization: Any  # Таблицы квантования (dict от Pillow)
+
+
+def find_jpegtran() -> Optional[str]:
+    """Путь к jpegtran или None, если склейка без перекодирования недоступна."""
+    if not config.JPEG_LOSSLESS_JOIN:
+        return None
+    if config.JPEGTRAN_PATH:
+        return config.JPEGTRAN_PATH
+    return shutil.which("jpegtran")
+
+
+def read_jpeg_layout(image_path: Union[str, Path]) -> Optional[JpegLayout]:
+    """Читает заголовок JPEG (без декодирования).
+
+    Returns:
+        Параметры файла или None, если это не baseline/sequential JPEG.
+    """
+    try:
+        with Image.open(image_path) as img:
+            if img.format != "JPEG" or img.info.get("progressive"):
+                return None
+            sampling = tuple((h, v) for _, h, v, _ in img.layer)
+            width, height = img.size
+            return JpegLayout(width, height, img.mode, sampling, img.quantization)
+    except (OSError, AttributeError, ValueError) as e:
+        logger.debug(f"Could not read JPEG header of {image_path}: {e}")
+        return None
+
+
+def can_join_losslessly(left: JpegLayout, right: JpegLayout) -> bool:
+    """Можно ли приставить right справа к left без потерь.
+
+    Нужны одинаковые высота, цветовая модель, прореживание и таблицы
+    квантования, а ширина левой страницы должна быть кратна ширине MCU
+    (иначе правая страница встанет не на границу блоков).
+    """
+    if (left.height, left.mode, left.sampling) != (
+        right.height,
+        right.mode,
+        right.sampling,
+    ):
+        return False
+    if left.quantization != right.quantization:
+        return False
+    mcu_width = 8 * max(h for h, _ in left.sampling)
+    return left.width % mcu_width == 0
+
+
+def _run_jpegtran(jpegtran: str, *args: str) -> None:
+    subprocess.run(
+        [jpegtran, *args],
+        check=True,
+        capture_output=True,
+        timeout=config.JPEGTRAN_TIMEOUT,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),  # Windows
+    )
+
+
+def join_losslessly(
+    left_path: Path, right_path: Path, output_file_path: Path, jpegtran: str
+) -> bool:
+    """Склеивает две JPEG-страницы без декодирования, как jpegtran -drop.
+
+    Левая страница расширяется до ширины разворота (-crop с расширением),
+    затем на свободное место вставляется правая (-drop). Коэффициенты DCT
+    копируются как есть, поэтому качество не теряется. Нужен jpegtran из
+    libjpeg 9 или libjpeg-turbo с поддержкой этих ключей.
+
+    Returns:
+        True, если разворот сохранен; False, если склеить так нельзя и
+        нужно перекодирование.
+    """
+    left = read_jpeg_layout(left_path)
+    right = read_jpeg_layout(right_path)
+    if left is None or right is None or not can_join_losslessly(left, right):
+        return False
+
+    total_width = left.width + right.width
+    canvas_path = output_file_path.with_name(
+        output_file_path.name + ".canvas" + config.PARTIAL_FILE_SUFFIX
+    )
+    temp_path = output_file_path.with_name(
+        output_file_path.name + config.PARTIAL_FILE_SUFFIX
+    )
+    try:
+        _run_jpegtran(
+            jpegtran,
+            *("-copy", "none", "-crop", f"{total_width}x{left.height}+0+0"),
+            *("-outfile", str(canvas_path), str(left_path)),
+        )
+        _run_jpegtran(
+            jpegtran,
+            *("-copy", "none", "-drop", f"+{left.width}+0", str(right_path)),
+            *("-outfile", str(temp_path), str(canvas_path)),
+        )
+        result = read_jpeg_layout(temp_path)
+        if result is None or (result.width, result.height) != (
+            total_width,
+            left.height,
+        ):
+            logger.warning(f"jpegtran produced an unexpected file for {temp_path.name}")
+            return False
+        os.replace(temp_path, output_file_path)
+        return True
+    except (OSError, subprocess.SubprocessError) as e:
+        stderr = getattr(e, "stderr", None) or b""
+        logger.warning(
+            f"Lossless join failed for {left_path.name} + {right_path.name}: {e} "
+            f"{stderr.decode(errors='replace').strip()}"
+        )
+        return False
+    finally:
+        for path in (canvas_path, temp_path):
+            with suppress(OSError):
+                path.unlink()
@@ -1,20 +1,118 @@
 import base64
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import suppress
+import hashlib
 import logging
+import os
 from pathlib import Path
 import threading
 import time
-from typing import Optional, Tuple
+from typing import Any, Iterable, Optional, Tuple
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from . import config, image_processing, utils
-from .types import ProgressCallback, StatusCallback
+from .manifest import DownloadManifest, book_identity, open_manifest
+from .page_cache import CacheEntry, PageCache
+from .rate_limiter import (
+    THROTTLE_STATUS_CODES,
+    AdaptiveRateLimiter,
+    parse_retry_after,
+)
+from .types import PageDoneCallback, ProgressCallback, StatusCallback
 
 logger = logging.getLogger(__name__)
 
 
+def build_page_url(
+    base_url: str, url_ids: str, filename_pdf: str, page_index: int
+) -> str:
+    """Строит URL страницы: base_url + url_ids + base64("<имя файла>/<индекс>").
+
+    Args:
+        base_url: Базовый URL до ID (с завершающим '/').
+        url_ids: ID файла (с завершающим '/').
+        filename_pdf: Имя файла на сайте.
+        page_index: Индекс страницы (с нуля).
+
+    Returns:
+        Полный URL страницы.
+    """
+    page_string = f"{filename_pdf}/{page_index}"
+    page_b64_string = base64.b64encode(page_string.encode("utf-8")).decode("utf-8")
+    return f"{base_url}{url_ids}{page_b64_string}"
+
+
+def extension_from_content_type(content_type: str, page_number: int) -> str:
+    """Определяет расширение файла страницы по заголовку Content-Type.
+
+    Args:
+        content_type: Значение Content-Type в нижнем регистре.
+        page_number: Номер страницы (с единицы), только для лога.
+
+    Returns:
+        Расширение с точкой; '.jpg', если тип неизвестен.
+    """
+    if "png" in content_type:
+        return ".png"
+    if "gif" in content_type:
+        return ".gif"
+    if "bmp" in content_type:
+        return ".bmp"
+    if "tiff" in content_type:
+        return ".tiff"
+    if "jpeg" in content_type:
+        return ".jpeg"
+    logger.warning(
+        f"Unknown Content-Type '{content_type}' for page {page_number}. Assuming .jpg"
+    )
+    return ".jpg"
+
+
+def partial_path(target: Path) -> Path:
+    """Путь временного файла, в который пишется страница до переименования."""
+    return target.with_name(target.name + config.PARTIAL_FILE_SUFFIX)
+
+
+def write_stream_atomically(
+    chunks: Iterable[bytes], target: Path, digest: Optional[Any] = None
+) -> int:
+    """Пишет поток кусков во временный файл и атомарно переименовывает его.
+
+    Пока страница качается, на месте target ничего нет, поэтому прерванное
+    скачивание не оставляет обрезанных картинок. Пустой поток файл не создает.
+
+    Args:
+        chunks: Куски тела ответа.
+        target: Итоговый путь файла.
+        digest: Объект hashlib, который обновляется записанными байтами.
+
+    Returns:
+        Количество записанных байт.
+    """
+    temp_path = partial_path(target)
+    bytes_written = 0
+    try:
+        with open(temp_path, "wb") as f:
+            for chunk in chunks:
+                if chunk:
+                    f.write(chunk)
+                    bytes_written += len(chunk)
+                    if digest is not None:
+                        digest.update(chunk)
+        if bytes_written == 0:
+            temp_path.unlink()
+            return 0
+        os.replace(temp_path, target)
+    except BaseException:
+        with suppress(OSError):
+            temp_path.unlink()
+        raise
+    return bytes_written
+
+
 class LibraryHandler:
     """Класс, инкапсулирующий логику скачивания страниц
     и делегирующий обработку изображений.
@@ -25,6 +123,7 @@ class LibraryHandler:
         status_callback: StatusCallback,  # Используем импортированный тип
         progress_callback: ProgressCallback,  # Используем импортированный тип
         stop_event: threading.Event,  # Можно использовать StopEvent из types.py, если он там определен
+        page_cache: Optional[PageCache] = None,
     ):
         """Инициализация обработчика.
 
@@ -32,11 +131,24 @@ class LibraryHandler:
             status_callback: Функция для отправки сообщений о статусе (в GUI).
             progress_callback: Функция для обновления прогресса (в GUI).
             stop_event: Событие для сигнализации об остановке операции.
+            page_cache: Локальный кэш страниц по URL (None - без кэша).
         """
         self.status_callback = status_callback
         self.progress_callback = progress_callback
         self.stop_event = stop_event
+        self.page_cache = page_cache
         self.session: Optional[requests.Session] = None
+        # Страница, с которой берутся сессионные куки (замеры подставляют свою)
+        self.initial_cookie_url = config.INITIAL_COOKIE_URL
+        # Манифест текущего скачивания (см. download_pages)
+        self.manifest: Optional[DownloadManifest] = None
+        # Получатель готовых страниц текущего скачивания (см. download_pages)
+        self.page_done_callback: Optional[PageDoneCallback] = None
+        # Общий для всех потоков/запросов, заменяет фиксированную паузу
+        self.rate_limiter = AdaptiveRateLimiter()
+        # Байт страниц, записанных текущим скачиванием (для скорости в МБ/с)
+        self.downloaded_bytes = 0
+        self._bytes_lock = threading.Lock()
         logger.info("LibraryHandler initialized")
 
     def _setup_session_with_retry(self) -> None:
@@ -49,17 +161,27 @@ class LibraryHandler:
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": config.DEFAULT_USER_AGENT})
 
+        # 429/503 повторяет _get_page_response после паузы лимитера
+        retry_statuses = [
+            code
+            for code in config.RETRY_ON_HTTP_CODES
+            if code not in THROTTLE_STATUS_CODES
+        ]
         retry_strategy = Retry(
             total=config.MAX_RETRIES,
-            status_forcelist=config.RETRY_ON_HTTP_CODES,
+            status_forcelist=retry_statuses,
             backoff_factor=1,  # Задержка = backoff_factor * (2 ** (попытка - 1))
             allowed_methods=["HEAD", "GET", "OPTIONS"],
+            respect_retry_after_header=False,
+        )
+        # Пул соединений с запасом на все потоки скачивания
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy, pool_maxsize=config.MAX_DOWNLOAD_WORKERS
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
         self.session.mount("https://", adapter)
         self.session.mount("http://", adapter)
         logger.info(
-            f"Requests session created with retry strategy (max={config.MAX_RETRIES}, statuses={config.RETRY_ON_HTTP_CODES})"
+            f"Requests session created with retry strategy (max={config.MAX_RETRIES}, statuses={retry_statuses})"
         )
 
     def _get_initial_cookies(self) -> bool:
@@ -89,14 +211,12 @@ class LibraryHandler:
             return False
 
         self.status_callback(
-            f"Автоматическое получение сессионных куки с {config.INITIAL_COOKIE_URL}..."
-        )
-        logger.info(
-            f"Attempting to get initial cookies from {config.INITIAL_COOKIE_URL}"
+            f"Автоматическое получение сессионных куки с {self.initial_cookie_url}..."
         )
+        logger.info(f"Attempting to get initial cookies from {self.initial_cookie_url}")
         try:
             initial_response = self.session.get(
-                config.INITIAL_COOKIE_URL, timeout=config.REQUEST_TIMEOUT
+                self.initial_cookie_url, timeout=config.REQUEST_TIMEOUT
             )
             initial_response.raise_for_status()
 
@@ -112,7 +232,7 @@ class LibraryHandler:
                 logger.warning("Server did not set any cookies during initial request.")
                 return False
         except requests.exceptions.Timeout:
-            msg = f"Ошибка: Превышено время ожидания при получении куки с {config.INITIAL_COOKIE_URL}."
+            msg = f"Ошибка: Превышено время ожидания при получении куки с {self.initial_cookie_url}."
             self.status_callback(msg)
             logger.error(msg)
             return False
@@ -129,6 +249,9 @@ class LibraryHandler:
         filename_pdf: str,
         total_pages: int,
         output_dir: str,
+        workers: Optional[int] = None,
+        resume: Optional[bool] = None,
+        page_done_callback: Optional[PageDoneCallback] = None,
     ) -> Tuple[int, int]:
         """Скачивает все страницы книги.
 
@@ -138,12 +261,85 @@ class LibraryHandler:
             filename_pdf: Имя файла на сайте (используется для кодирования).
             total_pages: Общее количество страниц.
             output_dir: Папка для сохранения скачанных страниц.
+            workers: Количество потоков скачивания. Если None, используется
+                     config.DOWNLOAD_WORKERS; 1 - последовательное скачивание.
+            resume: Докачка: скачивать только страницы, которых по манифесту
+                    нет на диске. Если None, используется config.DOWNLOAD_RESUME.
+            page_done_callback: Вызывается для каждой страницы, как только
+                    ее результат известен (путь к файлу или None), в том
+                    числе для страниц, пропущенных при докачке.
 
         Returns:
             Кортеж (количество успешно скачанных страниц, общее количество страниц).
+            Страницы, пропущенные при докачке, считаются успешными.
         """
         # ... (код без изменений, кроме удаления зависимостей, которые ушли в image_processing) ...
         self.stop_event.clear()
+        self.page_done_callback = page_done_callback
+        if workers is None:
+            workers = config.DOWNLOAD_WORKERS
+        workers = max(1, min(workers, config.MAX_DOWNLOAD_WORKERS))
+        prepared = self._prepare_download(
+            base_url, url_ids, filename_pdf, total_pages, output_dir
+        )
+        if prepared is None:
+            return 0, total_pages
+        base_url, url_ids, output_path = prepared
+        pages = self._plan_pages(
+            base_url, url_ids, filename_pdf, total_pages, output_path, resume
+        )
+        done_before = total_pages - len(pages)
+
+        try:
+            if workers > 1:
+                success_count = self._download_pages_concurrent(
+                    base_url,
+                    url_ids,
+                    filename_pdf,
+                    total_pages,
+                    output_path,
+                    workers,
+                    pages=pages,
+                    done_before=done_before,
+                )
+            else:
+                success_count = 0
+                for position, i in enumerate(pages, start=done_before + 1):
+                    if self.stop_event.is_set():
+                        self.status_callback(
+                            "--- Скачивание прервано пользователем ---"
+                        )
+                        logger.info("Download interrupted by user.")
+                        break
+                    try:
+                        if self._download_page(
+                            i, total_pages, base_url, url_ids, filename_pdf, output_path
+                        ):
+                            success_count += 1
+                        else:
+                            self._mark_page_failed(i)
+                    finally:
+                        self.progress_callback(position, total_pages)
+        finally:
+            if self.manifest is not None:
+                self.manifest.save()
+
+        return self._finish_download(done_before + success_count, total_pages)
+
+    def _prepare_download(
+        self,
+        base_url: str,
+        url_ids: str,
+        filename_pdf: str,
+        total_pages: int,
+        output_dir: str,
+    ) -> Optional[Tuple[str, str, Path]]:
+        """Общая подготовка к скачиванию: сессия, куки, папка, стартовые сообщения.
+
+        Returns:
+            Кортеж (нормализованный base_url, нормализованный url_ids, папка)
+            или None, если продолжать скачивание нельзя.
+        """
         if not self.session:
             self._setup_session_with_retry()
             if not self.session:
@@ -151,7 +347,7 @@ class LibraryHandler:
                 self.status_callback(
                     "Критическая ошибка: Не удалось создать сетевую сессию для скачивания."
                 )
-                return 0, total_pages
+                return None
 
         got_cookies = self._get_initial_cookies()
         if not got_cookies:
@@ -169,7 +365,7 @@ class LibraryHandler:
             msg = f"Ошибка создания папки для страниц '{output_dir}': {e}"
             self.status_callback(msg)
             logger.error(msg, exc_info=True)
-            return 0, total_pages
+            return None
 
         self.status_callback(
             f"Начинаем скачивание {total_pages} страниц в '{output_dir}'..."
@@ -177,36 +373,185 @@ class LibraryHandler:
         logger.info(
             f"Starting download of {total_pages} pages to '{output_dir}'. BaseURL: {base_url}, IDs: {url_ids}, PDFName: {filename_pdf}"
         )
+        self.downloaded_bytes = 0
         self.progress_callback(0, total_pages)
+        return base_url, url_ids, output_path
 
-        success_count = 0
-        for i in range(total_pages):
-            if self.stop_event.is_set():
-                self.status_callback("--- Скачивание прервано пользователем ---")
-                logger.info("Download interrupted by user.")
-                break
+    def _plan_pages(
+        self,
+        base_url: str,
+        url_ids: str,
+        filename_pdf: str,
+        total_pages: int,
+        output_path: Path,
+        resume: Optional[bool],
+    ) -> list[int]:
+        """Открывает манифест и определяет, какие страницы нужно скачать.
 
-            page_string = f"{filename_pdf}/{i}"
-            try:
-                page_b64_bytes = base64.b64encode(page_string.encode("utf-8"))
-                page_b64_string = page_b64_bytes.decode("utf-8")
-            except Exception as e:
-                msg = f"Ошибка кодирования URL для стр. {i + 1}: {e}"
-                self.status_callback(msg)
-                logger.error(msg, exc_info=True)
-                continue
+        Returns:
+            Индексы страниц для скачивания по возрастанию.
+        """
+        if resume is None:
+            resume = config.DOWNLOAD_RESUME
+        book = book_identity(base_url, url_ids, filename_pdf, total_pages)
+        self.manifest = open_manifest(output_path, book, resume)
+        if not resume:
+            return list(range(total_pages))
+
+        pages = self.manifest.pending_pages()
+        done_before = total_pages - len(pages)
+        if self.page_done_callback is not None:
+            pending = set(pages)
+            for i in range(total_pages):
+                if i not in pending:
+                    self.page_done_callback(
+                        i, output_path / self.manifest.pages[i]["file"]
+                    )
+        if done_before:
+            self.status_callback(
+                f"Докачка: {done_before} из {total_pages} страниц уже скачаны, "
+                f"осталось {len(pages)}."
+            )
+            logger.info(
+                f"Resuming download: {done_before}/{total_pages} pages already on disk"
+            )
+            self.progress_callback(done_before, total_pages)
+        return pages
+
+    def _mark_page_failed(self, i: int) -> None:
+        """Отмечает страницу в манифесте как неудачную (если это не СТОП)."""
+        if self.manifest is not None and not self.stop_event.is_set():
+            self.manifest.mark_failed(i)
+        if self.page_done_callback is not None:
+            self.page_done_callback(i, None)
+
+    def _mark_page_done(
+        self, i: int, target: Path, size: int, content_type: str, sha256: str
+    ) -> None:
+        if self.manifest is not None:
+            self.manifest.mark_done(i, target.name, size, content_type, sha256)
+        with self._bytes_lock:
+            self.downloaded_bytes += size
+        if self.page_done_callback is not None:
+            self.page_done_callback(i, target)
+
+    def _restore_cached_page(
+        self, i: int, total_pages: int, entry: CacheEntry, base_output_filename: Path
+    ) -> bool:
+        """Копирует страницу из кэша в папку скачивания.
+
+        Returns:
+            True, если страница восстановлена из кэша.
+        """
+        assert self.page_cache is not None
+        content_type = entry.get("content_type", "")
+        extension = extension_from_content_type(content_type, i + 1)
+        final_output_filename = base_output_filename.with_suffix(extension)
+        try:
+            size = self.page_cache.restore(entry, final_output_filename)
+        except OSError as e:
+            logger.warning(f"Could not restore page {i + 1} from cache: {e}")
+            return False
+        logger.info(
+            f"Page {i + 1}/{total_pages} restored from cache as "
+            f"{final_output_filename.name} ({size} bytes)"
+        )
+        self._mark_page_done(
+            i, final_output_filename, size, content_type, entry["sha256"]
+        )
+        return True
 
-            final_url = f"{base_url}{url_ids}{page_b64_string}"
-            # Имя файла будет определено по Content-Type
-            base_output_filename = output_path / f"page_{i:03d}"
+    def _finish_download(self, success_count: int, total_pages: int) -> Tuple[int, int]:
+        """Логирует и сообщает итог скачивания."""
+        if self.page_cache is not None:
+            self.page_cache.prune()
+        logger.info(f"Download finished. Success: {success_count}/{total_pages}")
+        self.status_callback(
+            f"Скачивание завершено. Успешно: {success_count} из {total_pages}."
+        )
+        return success_count, total_pages
 
-            status_msg = f"Скачиваю страницу {i + 1}/{total_pages}..."
-            self.status_callback(status_msg)
-            logger.debug(f"Requesting page {i + 1}: {final_url}")
+    def _download_page(
+        self,
+        i: int,
+        total_pages: int,
+        base_url: str,
+        url_ids: str,
+        filename_pdf: str,
+        output_path: Path,
+    ) -> bool:
+        """Скачивает одну страницу и сохраняет ее как page_NNN.<ext>.
 
+        Безопасен для вызова из нескольких потоков: пишет только в свой файл,
+        а сессия requests разделяется между потоками.
+
+        Args:
+            i: Индекс страницы (с нуля).
+            total_pages: Общее количество страниц (для сообщений).
+            base_url: Базовый URL до ID (с завершающим '/').
+            url_ids: ID файла (с завершающим '/').
+            filename_pdf: Имя файла на сайте.
+            output_path: Папка для сохранения.
+
+        Returns:
+            True, если страница успешно скачана и файл не пустой.
+        """
+        try:
+            final_url = build_page_url(base_url, url_ids, filename_pdf, i)
+        except Exception as e:
+            msg = f"Ошибка кодирования URL для стр. {i + 1}: {e}"
+            self.status_callback(msg)
+            logger.error(msg, exc_info=True)
+            return False
+
+        # Имя файла будет определено по Content-Type
+        base_output_filename = output_path / f"page_{i:03d}"
+        final_output_filename = base_output_filename
+
+        status_msg = f"Скачиваю страницу {i + 1}/{total_pages}..."
+        self.status_callback(status_msg)
+
+        # Свежая запись кэша отдается без запроса к серверу
+        page_cache = self.page_cache
+        cache_entry = page_cache.lookup(final_url) if page_cache is not None else None
+        if (
+            page_cache is not None
+            and cache_entry is not None
+            and page_cache.is_fresh(cache_entry)
+            and self._restore_cached_page(
+                i, total_pages, cache_entry, base_output_filename
+            )
+        ):
+            return True
+        logger.debug(f"Requesting page {i + 1}: {final_url}")
+
+        try:
+            request_kwargs: dict[str, Any] = {
+                "timeout": config.REQUEST_TIMEOUT,
+                "stream": True,
+            }
+            conditional_headers = PageCache.conditional_headers(cache_entry)
+            if conditional_headers:
+                request_kwargs["headers"] = conditional_headers
+            response = self._get_page_response(final_url, request_kwargs, i)
+            if response is None:
+                return False  # СТОП во время ожидания лимитера
             try:
-                response = self.session.get(final_url, timeout=config.REQUEST_TIMEOUT)
                 logger.debug(f"Page {i + 1} response status: {response.status_code}")
+                if (
+                    response.status_code == 304
+                    and page_cache is not None
+                    and cache_entry is not None
+                ):
+                    # Not Modified: содержимое берем из кэша
+                    page_cache.mark_revalidated(
+                        cache_entry,
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"),
+                    )
+                    return self._restore_cached_page(
+                        i, total_pages, cache_entry, base_output_filename
+                    )
                 response.raise_for_status()  # Проверка на 4xx/5xx
 
                 content_type = response.headers.get("Content-Type", "").lower()
@@ -216,93 +561,210 @@ class LibraryHandler:
                     logger.error(
                         f"{msg} URL: {final_url}. Content preview: {response.text[:200]}"
                     )
-                    continue
-
-                # Определяем расширение файла
-                extension = ".jpg"
-                if "png" in content_type:
-                    extension = ".png"
-                elif "gif" in content_type:
-                    extension = ".gif"
-                elif "bmp" in content_type:
-                    extension = ".bmp"
-                elif "tiff" in content_type:
-                    extension = ".tiff"
-                elif "jpeg" in content_type:
-                    extension = ".jpeg"
-                else:
-                    logger.warning(
-                        f"Unknown Content-Type '{content_type}' for page {i + 1}. Assuming .jpg"
-                    )
+                    return False
 
+                extension = extension_from_content_type(content_type, i + 1)
                 final_output_filename = base_output_filename.with_suffix(extension)
                 logger.debug(f"Saving page {i + 1} to {final_output_filename}")
 
-                # Записываем файл
-                with open(final_output_filename, "wb") as f:
-                    f.write(response.content)
-
-                # Проверяем размер файла
-                if final_output_filename.stat().st_size == 0:
-                    msg = f"Предупреждение: Файл {final_output_filename.name} пустой."
-                    self.status_callback(msg)
-                    logger.warning(f"{msg} URL: {final_url}")
-                else:
-                    success_count += 1
-                    logger.info(
-                        f"Page {i + 1}/{total_pages} downloaded successfully as {final_output_filename.name}"
-                    )
+                # Пишем по кускам, не держа всю страницу в памяти
+                digest = hashlib.sha256()
+                bytes_written = write_stream_atomically(
+                    response.iter_content(chunk_size=config.DOWNLOAD_CHUNK_SIZE),
+                    final_output_filename,
+                    digest,
+                )
+            finally:
+                response.close()  # Возвращает соединение в пул
 
-            except requests.exceptions.HTTPError as e:
-                status_code = e.response.status_code if e.response else "N/A"
-                msg = f"Ошибка HTTP {status_code} на стр. {i + 1} (после {config.MAX_RETRIES} попыток): {e}"
-                self.status_callback(msg)
-                logger.error(f"{msg} URL: {final_url}")
-                if status_code in [401, 403]:
-                    self.status_callback(
-                        "   (Возможно, сессия истекла, куки неверны или доступ запрещен)"
-                    )
-            except requests.exceptions.Timeout:
-                msg = f"Ошибка: Таймаут при скачивании стр. {i + 1} (после {config.MAX_RETRIES} попыток)."
-                self.status_callback(msg)
-                logger.error(f"{msg} URL: {final_url}")
-            except requests.exceptions.RequestException as e:
-                msg = f"Ошибка сети/сервера на стр. {i + 1} (после {config.MAX_RETRIES} попыток): {e}"
+            if bytes_written == 0:
+                msg = f"Предупреждение: Файл {final_output_filename.name} пустой."
                 self.status_callback(msg)
-                logger.error(f"{msg} URL: {final_url}", exc_info=True)
-            except OSError as e:
-                msg = f"Ошибка записи файла для стр. {i + 1}: {e}"
-                self.status_callback(msg)
-                logger.error(f"{msg} Filename: {final_output_filename}", exc_info=True)
-            except Exception as e:
-                msg = f"Неожиданная ошибка на стр. {i + 1}: {e}"
-                self.status_callback(msg)
-                logger.error(f"{msg} URL: {final_url}", exc_info=True)
+                logger.warning(f"{msg} URL: {final_url}")
+                return False
+            logger.info(
+                f"Page {i + 1}/{total_pages} downloaded successfully as "
+                f"{final_output_filename.name} ({bytes_written} bytes)"
+            )
+            self._mark_page_done(
+                i,
+                final_output_filename,
+                bytes_written,
+                content_type,
+                digest.hexdigest(),
+            )
+            if page_cache is not None:
+                page_cache.store(
+                    final_url,
+                    final_output_filename,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    content_type,
+                    digest.hexdigest(),
+                    bytes_written,
+                )
+            return True
 
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code if e.response else "N/A"
+            msg = f"Ошибка HTTP {status_code} на стр. {i + 1} (после {config.MAX_RETRIES} попыток): {e}"
+            self.status_callback(msg)
+            logger.error(f"{msg} URL: {final_url}")
+            if status_code in [401, 403]:
+                self.status_callback(
+                    "   (Возможно, сессия истекла, куки неверны или доступ запрещен)"
+                )
+        except requests.exceptions.Timeout:
+            msg = f"Ошибка: Таймаут при скачивании стр. {i + 1} (после {config.MAX_RETRIES} попыток)."
+            self.status_callback(msg)
+            logger.error(f"{msg} URL: {final_url}")
+        except requests.exceptions.RequestException as e:
+            msg = f"Ошибка сети/сервера на стр. {i + 1} (после {config.MAX_RETRIES} попыток): {e}"
+            self.status_callback(msg)
+            logger.error(f"{msg} URL: {final_url}", exc_info=True)
+        except OSError as e:
+            msg = f"Ошибка записи файла для стр. {i + 1}: {e}"
+            self.status_callback(msg)
+            logger.error(f"{msg} Filename: {final_output_filename}", exc_info=True)
+        except Exception as e:
+            msg = f"Неожиданная ошибка на стр. {i + 1}: {e}"
+            self.status_callback(msg)
+            logger.error(f"{msg} URL: {final_url}", exc_info=True)
+        return False
+
+    def _get_page_response(
+        self, url: str, request_kwargs: dict[str, Any], i: int
+    ) -> Optional[requests.Response]:
+        """Запрашивает страницу, повторяя 429/503 после паузы лимитера.
+
+        Темп задает адаптивный лимитер: перед каждой попыткой ждем токен
+        (с учетом Retry-After), ожидание прерывается по СТОП. Остальные
+        повторы (сетевые ошибки, 5xx) выполняет Retry в сессии.
+
+        Returns:
+            Ответ (при исчерпании повторов - последний 429/503) или None,
+            если ожидание прервано.
+        """
+        assert self.session is not None  # Создается в _prepare_download
+        throttled = 0
+        while True:
+            if not self.rate_limiter.acquire(self.stop_event):
+                return None
+            started = time.monotonic()
+            try:
+                response = self.session.get(url, **request_kwargs)
+            except requests.exceptions.RequestException:
+                self.rate_limiter.record(None, time.monotonic() - started)
+                raise
+            self._record_response(response, time.monotonic() - started)
+            if (
+                response.status_code not in THROTTLE_STATUS_CODES
+                or throttled >= config.MAX_RETRIES
+            ):
+                return response
+            response.close()
+            throttled += 1
+            logger.info(
+                f"Page {i + 1} throttled with {response.status_code}, "
+                f"retrying ({throttled}/{config.MAX_RETRIES})"
+            )
+
+    def _record_response(self, response: requests.Response, latency: float) -> None:
+        """Передает статус, время ответа и Retry-After в лимитер запросов."""
+        retry_after = None
+        if response.status_code in THROTTLE_STATUS_CODES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        self.rate_limiter.record(response.status_code, latency, retry_after)
+
+    def _download_pages_concurrent(
+        self,
+        base_url: str,
+        url_ids: str,
+        filename_pdf: str,
+        total_pages: int,
+        output_path: Path,
+        workers: int,
+        pages: Optional[list[int]] = None,
+        done_before: int = 0,
+    ) -> int:
+        """Скачивает страницы пулом из нескольких потоков.
+
+        Все потоки используют одну сессию (и ее пул соединений). Имена файлов
+        зависят только от индекса страницы, поэтому порядок завершения не важен.
+        После сигнала остановки новые страницы не запрашиваются, а уже
+        отправленные запросы завершаются в пределах REQUEST_TIMEOUT.
+        Качаются страницы pages (по умолчанию все); прогресс при докачке
+        отсчитывается от done_before уже скачанных.
+
+        Returns:
+            Количество успешно скачанных страниц.
+        """
+        logger.info(f"Using concurrent download with {workers} workers")
+        if pages is None:
+            pages = list(range(total_pages))
+        completed = done_before
+        progress_lock = threading.Lock()
+
+        def worker(i: int) -> bool:
+            nonlocal completed
+            if self.stop_event.is_set():
+                return False
+            try:
+                ok = self._download_page(
+                    i, total_pages, base_url, url_ids, filename_pdf, output_path
+                )
+                if not ok:
+                    self._mark_page_failed(i)
+                return ok
             finally:
-                self.progress_callback(i + 1, total_pages)
-                if not self.stop_event.is_set():
-                    time.sleep(config.DEFAULT_DELAY_SECONDS)
+                with progress_lock:
+                    completed += 1
+                    # Под блокировкой, чтобы прогресс не шел назад
+                    self.progress_callback(completed, total_pages)
 
-        logger.info(f"Download finished. Success: {success_count}/{total_pages}")
-        self.status_callback(
-            f"Скачивание завершено. Успешно: {success_count} из {total_pages}."
-        )
-        return success_count, total_pages
+        success_count = 0
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="page-download"
+        ) as executor:
+            futures = [executor.submit(worker, i) for i in pages]
+            for future in as_completed(futures):
+                if future.result():
+                    success_count += 1
+                if self.stop_event.is_set():
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    break
+
+        if self.stop_event.is_set():
+            self.status_callback("--- Скачивание прервано пользователем ---")
+            logger.info("Download interrupted by user.")
+        return success_count
 
-    def process_images(self, input_folder: str, output_folder: str) -> Tuple[int, int]:
+    def process_images(
+        self,
+        input_folder: str,
+        output_folder: str,
+        workers: Optional[int] = None,
+        contact_sheet: Optional[bool] = None,
+        rebuild: bool = False,
+    ) -> Tuple[int, int]:
         """Делегирует обработку изображений (создание разворотов)
         специализированной функции.
 
         Args:
             input_folder: Папка со скачанными страницами.
             output_folder: Папка для сохранения разворотов.
+            workers: Количество процессов склейки. Если None, используется
+                     config.PROCESSING_WORKERS (0 - по числу ядер).
+            contact_sheet: Создать после обработки листы миниатюр. Если None,
+                           используется config.CONTACT_SHEET_ENABLED.
+            rebuild: Собрать заново все развороты, даже неизмененные с
+                     прошлого запуска (см. config.INCREMENTAL_PROCESSING).
 
         Returns:
             Кортеж (количество обработанных/скопированных файлов,
                      количество созданных разворотов).
         """
-        return image_processing.process_images_in_folders(
+        result = image_processing.process_images_in_folders(
             input_folder=input_folder,
             output_folder=output_folder,
             status_callback=self.status_callback,
@@ -311,4 +773,62 @@ class LibraryHandler:
             config=config,
             utils=utils,
             logger=logger,
+            workers=config.PROCESSING_WORKERS if workers is None else workers,
+            rebuild=rebuild,
+        )
+        if contact_sheet is None:
+            contact_sheet = config.CONTACT_SHEET_ENABLED
+        if contact_sheet and any(result) and not self.stop_event.is_set():
+            self.create_contact_sheets(input_folder, output_folder)
+        return result
+
+    def create_contact_sheets(
+        self, input_folder: str, spreads_folder: str
+    ) -> list[Path]:
+        """Создает листы миниатюр страниц в подпапке папки разворотов.
+
+        Args:
+            input_folder: Папка со скачанными страницами.
+            spreads_folder: Папка разворотов; листы попадают в ее подпапку
+                            config.CONTACT_SHEET_DIR_NAME.
+
+        Returns:
+            Пути созданных листов.
+        """
+        return image_processing.create_contact_sheets(
+            input_folder=input_folder,
+            output_folder=str(Path(spreads_folder) / config.CONTACT_SHEET_DIR_NAME),
+            status_callback=self.status_callback,
+            stop_event=self.stop_event,
+            config=config,
+            utils=utils,
+            logger=logger,
+        )
+
+    def process_page_feed(
+        self,
+        pages: image_processing.PageSource,
+        output_folder: str,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Tuple[int, int]:
+        """Создает развороты из страниц, которые поступают по ходу скачивания.
+
+        Args:
+            pages: Источник страниц (например, pipeline.PageFeed).
+            output_folder: Папка для сохранения разворотов.
+            progress_callback: Свой колбэк прогресса (по умолчанию общий).
+
+        Returns:
+            Кортеж (количество обработанных/скопированных файлов,
+                     количество созданных разворотов).
+        """
+        return image_processing.process_page_feed(
+            pages=pages,
+            output_folder=output_folder,
+            status_callback=self.status_callback,
+            progress_callback=progress_callback or self.progress_callback,
+            stop_event=self.stop_event,
+            config=config,
+            utils=utils,
+            logger=logger,
         )
@@ -1,22 +1,48 @@
 import logging
 import sys
-import tkinter as tk
-from tkinter import messagebox
 
-from . import config, utils
-from .gui import JournalDownloaderApp
+from . import config, startup, utils
+
+# Замер запуска начинается до импорта GUI
+startup_timer = startup.StartupTimer()
+import_profiler = startup.ImportProfiler() if config.STARTUP_PROFILE_IMPORTS else None
+if import_profiler is not None:
+    import_profiler.start()
+
+import tkinter as tk  # noqa: E402
+from tkinter import messagebox  # noqa: E402
+
+from .gui import JournalDownloaderApp  # noqa: E402
+
+if import_profiler is not None:
+    import_profiler.stop()
+startup_timer.mark("imports")
 
 utils.setup_logging()
 logger = logging.getLogger(__name__)
 
 
+def _report_startup() -> None:
+    """Пишет в лог время запуска (вызывается, когда окно уже нарисовано)."""
+    startup_timer.mark("first frame")
+    logger.info(f"Startup timings: {startup_timer.report()}")
+    heavy_modules = startup.loaded_heavy_modules()
+    logger.info(f"Heavy modules loaded at startup: {heavy_modules or 'none'}")
+    if import_profiler is not None:
+        report = import_profiler.report(config.STARTUP_PROFILE_TOP)
+        logger.info(f"Startup import profile:\n{report}")
+
+
 def main():
     """Функция запуска приложения."""
     logger.info(f"Starting {config.APP_NAME} application...")
     root = None
     try:
         root = tk.Tk()
+        startup_timer.mark("tk")
         app = JournalDownloaderApp(root)
+        startup_timer.mark("ui")
+        root.after_idle(_report_startup)
         root.mainloop()
         logger.info(f"{config.APP_NAME} finished gracefully.")
 
@@ -0,0 +1,194 @@
+from contextlib import suppress
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Any, Dict, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION: int = 1
+
+# Статусы страниц в манифесте
+STATUS_DONE: str = "done"
+STATUS_FAILED: str = "failed"
+
+
+class DownloadManifest:
+    """Манифест скачивания книги: что уже лежит в папке страниц.
+
+    Хранится в папке страниц (config.DOWNLOAD_MANIFEST_FILE) и для каждого
+    индекса страницы записывает статус, имя файла, размер, Content-Type и
+    SHA-256. По нему режим докачки понимает, какие страницы скачивать заново.
+    Страницы без записи считаются нескачанными. Потокобезопасен.
+    """
+
+    def __init__(self, path: Path, book: Dict[str, Any]):
+        """Инициализация пустого манифеста.
+
+        Args:
+            path: Путь к файлу манифеста.
+            book: Параметры книги (URL, ID, имя файла, число страниц). Манифест
+                  от другой книги при загрузке отбрасывается.
+        """
+        self.path = path
+        self.book = book
+        self.pages: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+    @classmethod
+    def load(cls, path: Path, book: Dict[str, Any]) -> "DownloadManifest":
+        """Читает манифест с диска.
+
+        Если файла нет, он поврежден или описывает другую книгу,
+        возвращается пустой манифест.
+        """
+        manifest = cls(path, book)
+        try:
+            if not path.is_file():
+                return manifest
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION or data.get("book") != book:
+                logger.info(f"Manifest {path} belongs to another book, starting anew")
+                return manifest
+            manifest.pages = {
+                int(index): record for index, record in data.get("pages", {}).items()
+            }
+            logger.info(f"Manifest loaded from {path}: {len(manifest.pages)} records")
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Could not load manifest {path}: {e}. Starting anew")
+            manifest.pages = {}
+        return manifest
+
+    def mark_done(
+        self, index: int, filename: str, size: int, content_type: str, sha256: str
+    ) -> None:
+        """Записывает успешно скачанную страницу."""
+        self._update(
+            index,
+            {
+                "status": STATUS_DONE,
+                "file": filename,
+                "size": size,
+                "content_type": content_type,
+                "sha256": sha256,
+            },
+        )
+
+    def mark_failed(self, index: int) -> None:
+        """Записывает страницу, которую скачать не удалось."""
+        self._update(index, {"status": STATUS_FAILED})
+
+    def _update(self, index: int, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.pages[index] = record
+            self._unsaved += 1
+            should_save = self._unsaved >= config.MANIFEST_SAVE_INTERVAL
+        if should_save:
+            self.save()
+
+    def is_complete(self, index: int) -> bool:
+        """Проверяет, что страница скачана и ее файл на месте и того же размера."""
+        record = self.pages.get(index)
+        if not record or record.get("status") != STATUS_DONE:
+            return False
+        if not record.get("size") or not record.get("file"):
+            return False
+        try:
+            return (self.path.parent / record["file"]).stat().st_size == record["size"]
+        except OSError:
+            return False
+
+    def pending_pages(self) -> list[int]:
+        """Индексы страниц, которые нужно скачать: нет записи, ошибка, файла нет."""
+        return [i for i in range(self.book["total_pages"]) if not self.is_complete(i)]
+
+    def save(self) -> bool:
+        """Атомарно сохраняет манифест (через временный файл).
+
+        Returns:
+            True в случае успеха, False при ошибке записи.
+        """
+        with self._lock:
+            data = {
+                "version": MANIFEST_VERSION,
+                "book": self.book,
+                "pages": {str(i): self.pages[i] for i in sorted(self.pages)},
+            }
+            self._unsaved = 0
+            temp_path = self.path.with_name(self.path.name + config.PARTIAL_FILE_SUFFIX)
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=1, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save manifest {self.path}: {e}")
+                return False
+        logger.debug(f"Manifest saved to {self.path}")
+        return True
+
+
+def book_identity(
+    base_url: str, url_ids: str, filename_pdf: str, total_pages: int
+) -> Dict[str, Any]:
+    """Параметры, по которым манифест сопоставляется с книгой."""
+    return {
+        "base_url": base_url,
+        "url_ids": url_ids,
+        "filename_pdf": filename_pdf,
+        "total_pages": total_pages,
+    }
+
+
+def read_page_hashes(folder: Path) -> Dict[str, Tuple[int, int, str]]:
+    """SHA-256 скачанных страниц папки, записанные при скачивании.
+
+    Манифест читается без сверки с книгой. Страница попадает в результат,
+    только если ее файл того же размера и не менялся после сохранения
+    манифеста (иначе хэш мог устареть).
+
+    Returns:
+        Имя файла -> (размер, mtime в нс, SHA-256); пусто, если манифеста нет.
+    """
+    path = folder / config.DOWNLOAD_MANIFEST_FILE
+    hashes: Dict[str, Tuple[int, int, str]] = {}
+    try:
+        saved_at = path.stat().st_mtime_ns
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            return hashes
+        for record in data.get("pages", {}).values():
+            if record.get("status") != STATUS_DONE or not record.get("sha256"):
+                continue
+            with suppress(OSError):
+                stat = (folder / record["file"]).stat()
+                if stat.st_size == record["size"] and stat.st_mtime_ns <= saved_at:
+                    hashes[record["file"]] = (
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                        record["sha256"],
+                    )
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.debug(f"Could not read page hashes from {path}: {e}")
+    return hashes
+
+
+def open_manifest(
+    output_path: Path, book: Dict[str, Any], resume: bool
+) -> DownloadManifest:
+    """Возвращает манифест для папки страниц.
+
+    В режиме докачки читает существующий, иначе начинает новый.
+    """
+    path = output_path / config.DOWNLOAD_MANIFEST_FILE
+    if resume:
+        return DownloadManifest.load(path, book)
+    return DownloadManifest(path, book)
@@ -0,0 +1,222 @@
+from contextlib import suppress
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+CacheEntry = Dict[str, Any]
+
+
+class PageCache:
+    """Локальный кэш страниц, общий для всех папок скачивания.
+
+    URL страницы детерминирован (base_url + url_ids + b64(имя/индекс)),
+    поэтому он и служит ключом. Для каждого URL в entries/ хранится запись
+    с ETag, Last-Modified, Content-Type и SHA-256 содержимого, а само
+    содержимое лежит в blobs/ под своим хешем (одинаковые страницы хранятся
+    один раз). Свежие записи отдаются без запроса к серверу, остальные
+    перепроверяются условным запросом (If-None-Match / If-Modified-Since).
+
+    Ошибки кэша никогда не прерывают скачивание: они логируются, а страница
+    качается как обычно.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_age: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        """Инициализация.
+
+        Args:
+            root: Папка кэша.
+            max_age: Сколько секунд запись считается свежей и отдается без
+                     запроса к серверу (0 - всегда перепроверять).
+            max_bytes: Предельный размер содержимого кэша для prune().
+        """
+        self.root = Path(root)
+        self.max_age = config.PAGE_CACHE_MAX_AGE if max_age is None else max_age
+        self.max_bytes = config.PAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def _entry_path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.root / "entries" / f"{key}.json"
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.root / "blobs" / sha256[:2] / sha256
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Возвращает запись кэша для URL, если ее содержимое на месте."""
+        entry_path = self._entry_path(url)
+        try:
+            with open(entry_path, encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry.get("url") != url:
+                return None
+            if self._blob_path(entry["sha256"]).stat().st_size != entry["size"]:
+                logger.debug(f"Cached blob for {url} has wrong size, ignoring")
+                return None
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Broken page cache entry {entry_path}: {e}")
+            return None
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Можно ли отдать запись без перепроверки на сервере."""
+        if self.max_age <= 0:
+            return False
+        return time.time() - entry.get("checked_at", 0) < self.max_age
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Заголовки условного запроса для перепроверки записи."""
+        headers: Dict[str, str] = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def restore(self, entry: CacheEntry, target: Path) -> int:
+        """Копирует содержимое записи в target (атомарно).
+
+        Returns:
+            Размер файла в байтах.
+
+        Raises:
+            OSError: Если содержимое не удалось скопировать.
+        """
+        _copy_atomically(self._blob_path(entry["sha256"]), target)
+        # Время последнего использования для prune()
+        with suppress(OSError):
+            os.utime(self._blob_path(entry["sha256"]))
+        return entry["size"]
+
+    def store(
+        self,
+        url: str,
+        source: Path,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        content_type: str,
+        sha256: str,
+        size: int,
+    ) -> bool:
+        """Кладет скачанную страницу в кэш.
+
+        Returns:
+            True, если запись сохранена.
+        """
+        try:
+            blob_path = self._blob_path(sha256)
+            if not blob_path.is_file() or blob_path.stat().st_size != size:
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                _copy_atomically(source, blob_path)
+            self._write_entry(
+                {
+                    "url": url,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "content_type": content_type,
+                    "sha256": sha256,
+                    "size": size,
+                    "checked_at": time.time(),
+                }
+            )
+            return True
+        except OSError as e:
+            logger.warning(f"Could not store {url} in page cache: {e}")
+            return False
+
+    def mark_revalidated(
+        self, entry: CacheEntry, etag: Optional[str], last_modified: Optional[str]
+    ) -> None:
+        """Обновляет запись после ответа 304 Not Modified."""
+        entry = dict(entry, checked_at=time.time())
+        if etag:
+            entry["etag"] = etag
+        if last_modified:
+            entry["last_modified"] = last_modified
+        try:
+            self._write_entry(entry)
+        except OSError as e:
+            logger.warning(f"Could not update page cache entry for {entry['url']}: {e}")
+
+    def _write_entry(self, entry: CacheEntry) -> None:
+        entry_path = self._entry_path(entry["url"])
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = entry_path.with_name(entry_path.name + config.PARTIAL_FILE_SUFFIX)
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, entry_path)
+
+    def prune(self) -> int:
+        """Удаляет давно не использованное содержимое сверх max_bytes.
+
+        Записи, чье содержимое удалено, отбрасываются при следующем lookup().
+
+        Returns:
+            Количество удаленных файлов.
+        """
+        if self.max_bytes <= 0:
+            return 0
+        try:
+            blobs = [
+                (path, path.stat())
+                for path in (self.root / "blobs").glob("*/*")
+                if path.is_file()
+            ]
+        except OSError as e:
+            logger.warning(f"Could not scan page cache {self.root}: {e}")
+            return 0
+        total = sum(stat.st_size for _, stat in blobs)
+        removed = 0
+        for path, stat in sorted(blobs, key=lambda item: item[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            with suppress(OSError):
+                path.unlink()
+                total -= stat.st_size
+                removed += 1
+        if removed:
+            logger.info(f"Page cache pruned: {removed} files removed from {self.root}")
+        return removed
+
+
+def _copy_atomically(source: Path, target: Path) -> None:
+    # Уникальное имя: одну и ту же страницу могут сохранять несколько потоков
+    temp_path = target.with_name(
+        f"{target.name}.{os.getpid()}.{threading.get_ident()}"
+        f"{config.PARTIAL_FILE_SUFFIX}"
+    )
+    try:
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, target)
+    except BaseException:
+        with suppress(OSError):
+            temp_path.unlink()
+        raise
+
+
+def create_page_cache(enabled: Optional[bool] = None) -> Optional[PageCache]:
+    """Создает кэш страниц по настройкам config (None, если кэш выключен).
+
+    Args:
+        enabled: Включить кэш (None - config.PAGE_CACHE_ENABLED).
+    """
+    if not (config.PAGE_CACHE_ENABLED if enabled is None else enabled):
+        return None
+    return PageCache(Path(config.PAGE_CACHE_DIR))
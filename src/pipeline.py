@@ -0,0 +1,98 @@
+import logging
+from pathlib import Path
+import threading
+from typing import Dict, Optional
+
+from .types import StopEvent
+
+logger = logging.getLogger(__name__)
+
+
+class PageFeed:
+    """Очередь скачанных страниц для конвейера «скачать → склеить».
+
+    Скачивание сообщает о каждой странице через page_done() (в любом
+    порядке и из любых потоков), а обработка читает страницы строго по
+    возрастанию индекса: has(position) ждет, пока не станет известно,
+    есть ли страница с таким порядковым номером. Неудачные страницы
+    пропускаются, как если бы их файла не было в папке.
+    Реализует протокол image_processing.PageSource.
+    """
+
+    def __init__(
+        self, total_pages: int, stop_event: StopEvent, poll_interval: float = 0.1
+    ):
+        """Инициализация.
+
+        Args:
+            total_pages: Сколько страниц ожидается от скачивания.
+            stop_event: Событие остановки; ожидание прерывается по нему.
+            poll_interval: Как часто проверять stop_event при ожидании (секунд).
+        """
+        self.total_pages = total_pages
+        self.stop_event = stop_event
+        self.poll_interval = poll_interval
+        self._condition = threading.Condition()
+        self._results: Dict[int, Optional[Path]] = {}
+        self._available: list[Path] = []  # Готовые страницы по порядку
+        self._next_index = 0  # Первый индекс, результат которого еще неизвестен
+        self._failed = 0
+        self._closed = False
+
+    def page_done(self, index: int, path: Optional[Path]) -> None:
+        """Сообщает результат страницы: путь к файлу или None при ошибке."""
+        with self._condition:
+            if self._closed or index in self._results or index < self._next_index:
+                return
+            self._results[index] = path
+            if path is None:
+                self._failed += 1
+            while self._next_index in self._results:
+                ready = self._results.pop(self._next_index)
+                if ready is not None:
+                    self._available.append(ready)
+                self._next_index += 1
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """Скачивание закончилось: страниц без результата уже не будет."""
+        with self._condition:
+            while self._next_index < self.total_pages:
+                ready = self._results.pop(self._next_index, None)
+                if ready is not None:
+                    self._available.append(ready)
+                self._next_index += 1
+            self._closed = True
+            self._condition.notify_all()
+        logger.debug(
+            f"Page feed closed: {len(self._available)} pages available, "
+            f"{self._failed} failed"
+        )
+
+    @property
+    def total(self) -> int:
+        """Ожидаемое количество страниц: все, кроме неудачных."""
+        with self._condition:
+            if self._closed:
+                return len(self._available)
+            return self.total_pages - self._failed
+
+    def has(self, position: int) -> bool:
+        """Ждет, пока станет известно, есть ли страница номер position.
+
+        Returns:
+            True, если страница есть; False, если страниц меньше или
+            пришел сигнал остановки.
+        """
+        with self._condition:
+            while position >= len(self._available):
+                if self._next_index >= self.total_pages:
+                    return False
+                if self.stop_event.is_set():
+                    return False
+                self._condition.wait(self.poll_interval)
+            return True
+
+    def __getitem__(self, position: int) -> Path:
+        with self._condition:
+            return self._available[position]
@@ -0,0 +1,136 @@
+from collections import deque
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+from . import config
+
+
+class ProgressStats(NamedTuple):
+    """Состояние задачи для вывода пользователю."""
+
+    current: int
+    total: int
+    items_per_second: float  # 0.0, пока скорость неизвестна
+    bytes_per_second: Optional[float]  # None, если байты не считаются
+    eta_seconds: Optional[float]  # None, пока скорость неизвестна
+
+    @property
+    def percent(self) -> int:
+        return self.current * 100 // self.total if self.total > 0 else 0
+
+
+def format_duration(seconds: float) -> str:
+    """Длительность в виде ЧЧ:ММ:СС или ММ:СС."""
+    minutes, secs = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def format_progress(stats: ProgressStats) -> str:
+    """Строка вида "120/500 (24%) · 3.5 стр/с · 1.2 МБ/с · осталось 01:48"."""
+    parts = [f"{stats.current}/{stats.total} ({stats.percent}%)"]
+    if stats.items_per_second > 0:
+        parts.append(f"{stats.items_per_second:.1f} стр/с")
+    if stats.bytes_per_second:
+        parts.append(f"{stats.bytes_per_second / 1024**2:.1f} МБ/с")
+    if stats.eta_seconds is not None and stats.current < stats.total:
+        parts.append(f"осталось {format_duration(stats.eta_seconds)}")
+    return " · ".join(parts)
+
+
+class ProgressReporter:
+    """Прореживает обновления прогресса и считает скорость и оставшееся время.
+
+    Вызывается вместо обычного колбэка прогресса (current, total) и
+    передает дальше ProgressStats: первое и последнее обновление задачи
+    всегда, промежуточные - только при смене процента и не чаще
+    min_interval. Скорость считается по отметкам за последние
+    config.PROGRESS_RATE_WINDOW секунд. Новая задача (total изменился
+    или current пошел назад) начинает отсчет заново. Потокобезопасен.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[ProgressStats], None],
+        bytes_source: Optional[Callable[[], int]] = None,
+        min_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Инициализация.
+
+        Args:
+            callback: Получатель прореженных обновлений.
+            bytes_source: Сколько байт обработано с начала задачи (для МБ/с);
+                          None - скорость в байтах не показывается.
+            min_interval: Минимальный интервал между промежуточными
+                          обновлениями, секунд (None - config.PROGRESS_MIN_INTERVAL).
+            clock: Источник монотонного времени (для тестов).
+        """
+        self.callback = callback
+        self.bytes_source = bytes_source
+        self.min_interval = (
+            config.PROGRESS_MIN_INTERVAL if min_interval is None else min_interval
+        )
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._samples: deque[tuple[float, int, int]] = deque()
+        self._total = -1
+        self._last_current = 0
+        self._last_sent_at: Optional[float] = None
+        self._last_sent_percent = -1
+
+    def reset(self) -> None:
+        """Начинает отсчет новой задачи."""
+        with self._lock:
+            self._reset()
+
+    def _reset(self) -> None:
+        self._samples.clear()
+        self._total = -1
+        self._last_sent_at = None
+        self._last_sent_percent = -1
+
+    def __call__(self, current: int, total: int) -> None:
+        now = self._clock()
+        done_bytes = self.bytes_source() if self.bytes_source is not None else 0
+        with self._lock:
+            if total != self._total or current < self._last_current:
+                self._reset()
+                self._total = total
+            self._last_current = current
+            self._samples.append((now, current, done_bytes))
+            while (
+                len(self._samples) > 2
+                and now - self._samples[1][0] >= config.PROGRESS_RATE_WINDOW
+            ):
+                self._samples.popleft()
+            stats = self._stats(current, total)
+            finished = total > 0 and current >= total
+            if not finished and self._last_sent_at is not None:
+                if stats.percent == self._last_sent_percent:
+                    return
+                if now - self._last_sent_at < self.min_interval:
+                    return
+            self._last_sent_at = now
+            self._last_sent_percent = stats.percent
+            self.callback(stats)  # Под блокировкой, чтобы прогресс не шел назад
+
+    def _stats(self, current: int, total: int) -> ProgressStats:
+        started_at, started_count, started_bytes = self._samples[0]
+        now, _, done_bytes = self._samples[-1]
+        elapsed = now - started_at
+        if elapsed <= 0 or current <= started_count:
+            return ProgressStats(current, total, 0.0, None, None)
+        items_per_second = (current - started_count) / elapsed
+        bytes_per_second = (
+            (done_bytes - started_bytes) / elapsed
+            if self.bytes_source is not None and done_bytes > started_bytes
+            else None
+        )
+        eta_seconds = max(total - current, 0) / items_per_second
+        return ProgressStats(
+            current, total, items_per_second, bytes_per_second, eta_seconds
+        )
@@ -0,0 +1,163 @@
+from email.utils import parsedate_to_datetime
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Статусы, при которых сервер просит снизить нагрузку
+THROTTLE_STATUS_CODES: tuple[int, ...] = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разбирает заголовок Retry-After (секунды или HTTP-дата).
+
+    Args:
+        value: Значение заголовка или None.
+
+    Returns:
+        Задержка в секундах (не больше config.RATE_LIMIT_MAX_RETRY_AFTER)
+        или None, если заголовка нет или его не удалось разобрать.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            logger.debug(f"Could not parse Retry-After header: {value!r}")
+            return None
+        seconds = retry_at.timestamp() - time.time()
+    return min(max(seconds, 0.0), config.RATE_LIMIT_MAX_RETRY_AFTER)
+
+
+class AdaptiveRateLimiter:
+    """Token bucket со скоростью, подстраиваемой по AIMD.
+
+    Перед каждым запросом вызывается reserve() (или acquire()), после ответа -
+    record(). Пока сервер быстро отвечает 200, скорость растет на постоянную
+    величину; при 429/5xx, сетевых ошибках или резком росте задержки
+    скорость умножается на коэффициент < 1. Retry-After блокирует выдачу
+    токенов до указанного момента. Потокобезопасен, reserve() не блокирует,
+    поэтому подходит и для asyncio-движка.
+    """
+
+    def __init__(
+        self,
+        initial_rate: Optional[float] = None,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Инициализация.
+
+        Args:
+            initial_rate: Начальная скорость (запросов в секунду).
+            min_rate: Нижняя граница скорости.
+            max_rate: Верхняя граница скорости.
+            burst: Емкость корзины (сколько запросов можно сделать подряд).
+            clock: Источник монотонного времени (для тестов).
+        """
+        self.min_rate = min_rate or config.RATE_LIMIT_MIN_RPS
+        self.max_rate = max_rate or config.RATE_LIMIT_MAX_RPS
+        self.rate = min(
+            max(initial_rate or config.RATE_LIMIT_INITIAL_RPS, self.min_rate),
+            self.max_rate,
+        )
+        self.burst = burst or config.RATE_LIMIT_BURST
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._last_refill = clock()
+        self._blocked_until = 0.0
+        self._latency_ewma: Optional[float] = None
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(now - self._last_refill, 0.0)
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def reserve(self) -> float:
+        """Резервирует токен для одного запроса.
+
+        Returns:
+            Сколько секунд нужно подождать перед запросом (0, если можно сразу).
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now, 0.0)
+
+    def acquire(self, stop_event: threading.Event) -> bool:
+        """Ждет разрешения на запрос, прерываясь по stop_event.
+
+        Returns:
+            True, если можно отправлять запрос; False, если пришел сигнал стоп.
+        """
+        wait = self.reserve()
+        if wait > 0 and stop_event.wait(wait):
+            return False
+        return True
+
+    def record(
+        self,
+        status_code: Optional[int],
+        latency: float,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """Учитывает результат запроса и подстраивает скорость.
+
+        Args:
+            status_code: HTTP-статус ответа или None при сетевой ошибке/таймауте.
+            latency: Время ответа в секундах.
+            retry_after: Значение Retry-After в секундах, если сервер его прислал.
+        """
+        with self._lock:
+            now = self._clock()
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+            previous_rate = self.rate
+            overloaded = status_code is None or status_code == 429 or status_code >= 500
+            slowing = (
+                self._latency_ewma is not None
+                and latency > config.RATE_LIMIT_SLOW_LATENCY_FLOOR
+                and latency > self._latency_ewma * config.RATE_LIMIT_LATENCY_FACTOR
+            )
+            if overloaded or slowing:
+                self._refill(now)
+                self.rate = max(
+                    self.min_rate, self.rate * config.RATE_LIMIT_DECREASE_FACTOR
+                )
+            elif status_code is not None and 200 <= status_code < 300:
+                self._refill(now)
+                self.rate = min(
+                    self.max_rate, self.rate + config.RATE_LIMIT_INCREASE_RPS
+                )
+
+            if status_code is not None:
+                alpha = config.RATE_LIMIT_LATENCY_EWMA_ALPHA
+                self._latency_ewma = (
+                    latency
+                    if self._latency_ewma is None
+                    else alpha * latency + (1 - alpha) * self._latency_ewma
+                )
+
+        if self.rate < previous_rate:
+            logger.info(
+                f"Rate limit lowered: {previous_rate:.2f} -> {self.rate:.2f} req/s "
+                f"(status={status_code}, latency={latency:.2f}s, retry_after={retry_after})"
+            )
+        elif self.rate != previous_rate:
+            logger.debug(
+                f"Rate limit raised: {previous_rate:.2f} -> {self.rate:.2f} req/s"
+            )
@@ -0,0 +1,140 @@
+import builtins
+from contextlib import suppress
+from functools import partial
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, cast
+
+# Тяжелые зависимости, которые не должны грузиться до первого действия
+HEAVY_MODULES: Tuple[str, ...] = ("PIL", "requests", "urllib3", "asyncio")
+
+
+def loaded_heavy_modules() -> list[str]:
+    """Какие из тяжелых зависимостей уже импортированы."""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+class StartupTimer:
+    """Отметки этапов запуска приложения для отчета в лог."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        """Инициализация; отсчет идет с момента создания.
+
+        Args:
+            clock: Источник монотонного времени (для тестов).
+        """
+        self._clock = clock
+        self._last = clock()
+        self._started = self._last
+        self.stages: list[Tuple[str, float]] = []
+
+    def mark(self, stage: str) -> None:
+        """Завершает этап: записывает время с предыдущей отметки."""
+        now = self._clock()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def report(self) -> str:
+        """Строка вида "imports 0.120 s, tk 0.030 s (total 0.150 s)"."""
+        stages = ", ".join(f"{stage} {seconds:.3f} s" for stage, seconds in self.stages)
+        return f"{stages} (total {self._last - self._started:.3f} s)"
+
+
+class ImportProfiler:
+    """Замеряет время импорта модулей, как python -X importtime.
+
+    На время замера подменяет builtins.__import__. Для каждого впервые
+    загружаемого модуля считает общее время (с вложенными импортами) и
+    собственное (без них). Учитываются только импорты из потока, который
+    запустил замер. Нужен для сборки PyInstaller, где вывод -X importtime
+    в stderr недоступен.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        """Инициализация.
+
+        Args:
+            clock: Источник монотонного времени (для тестов).
+        """
+        self._clock = clock
+        # Имя модуля -> (собственное время, общее время), секунд
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        self._children: list[float] = []  # Время вложенных импортов по уровням
+        self._original_import: Optional[Callable[..., Any]] = None
+        self._thread_id: Optional[int] = None
+
+    def start(self) -> None:
+        """Начинает замер."""
+        self._original_import = builtins.__import__
+        self._thread_id = threading.get_ident()
+        builtins.__import__ = cast(Any, self._import)
+
+    def stop(self) -> None:
+        """Заканчивает замер и возвращает обычный импорт."""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def report(self, top: int) -> str:
+        """Таблица самых долгих импортов по общему времени."""
+        lines = ["     self [ms] | cumulative [ms] | module"]
+        slowest = sorted(self.timings.items(), key=lambda item: -item[1][1])[:top]
+        for name, (own, cumulative) in slowest:
+            lines.append(f"{own * 1000:14.1f} | {cumulative * 1000:15.1f} | {name}")
+        return "\n".join(lines)
+
+    def _timed(self, name: str, do_import: Callable[[], Any]) -> Any:
+        started = self._clock()
+        self._children.append(0.0)
+        try:
+            return do_import()
+        finally:
+            children = self._children.pop()
+            elapsed = self._clock() - started
+            if self._children:
+                self._children[-1] += elapsed
+            if name in sys.modules and name not in self.timings:
+                self.timings[name] = (elapsed - children, elapsed)
+
+    def _import(
+        self,
+        name: str,
+        globals: Optional[Dict[str, Any]] = None,  # noqa: A002
+        locals: Optional[Dict[str, Any]] = None,  # noqa: A002
+        fromlist: Tuple[str, ...] = (),
+        level: int = 0,
+    ) -> Any:
+        original_import = self._original_import or importlib.__import__
+
+        def do_import() -> Any:
+            return original_import(name, globals, locals, fromlist, level)
+
+        if threading.get_ident() != self._thread_id:
+            return do_import()
+        try:
+            package = (globals or {}).get("__package__")
+            full_name = importlib.util.resolve_name("." * level + name, package)
+        except (ImportError, ValueError):
+            return do_import()
+        if full_name not in sys.modules:
+            return self._timed(full_name, do_import)
+
+        # from пакет import модуль: подмодули грузятся внутри __import__,
+        # замеряем их по отдельности
+        package_module = sys.modules[full_name]
+        for item in fromlist or ():
+            submodule = f"{full_name}.{item}"
+            if (
+                item == "*"
+                or not hasattr(package_module, "__path__")
+                or hasattr(package_module, item)
+                or submodule in sys.modules
+            ):
+                continue
+            # Не подмодуль: ошибку, если она есть, покажет сам импорт
+            with suppress(ModuleNotFoundError):
+                self._timed(submodule, partial(importlib.import_module, submodule))
+        return do_import()
@@ -0,0 +1,56 @@
+from collections import deque
+import threading
+import time
+from typing import Callable, Optional
+
+from . import config
+
+
+class StatusBuffer:
+    """Потокобезопасный буфер строк статуса для GUI.
+
+    Рабочие потоки кладут сообщения через put(), а главный поток Tk раз в
+    config.GUI_STATUS_FLUSH_MS забирает все накопленное через drain() и
+    вставляет в виджет одной операцией. Так тысячи сообщений в минуту не
+    превращаются в тысячи событий root.after.
+
+    Буфер кольцевой: если главный поток не успевает, хранятся только
+    последние max_lines строк (больше поле статуса все равно не покажет),
+    а вместо выпавших выводится одна строка с их количеством.
+    """
+
+    def __init__(
+        self,
+        max_lines: Optional[int] = None,
+        clock: Callable[[], time.struct_time] = time.localtime,
+    ):
+        """Инициализация.
+
+        Args:
+            max_lines: Сколько строк хранить (None - config.GUI_STATUS_MAX_LINES).
+            clock: Источник времени для отметок в строках (для тестов).
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._lines: deque[str] = deque(maxlen=max_lines or config.GUI_STATUS_MAX_LINES)
+        self._dropped = 0
+
+    def put(self, message: str) -> None:
+        """Добавляет сообщение с отметкой времени его появления."""
+        line = f"[{time.strftime('%H:%M:%S', self._clock())}] {message}\n"
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(line)
+
+    def drain(self) -> list[str]:
+        """Забирает все накопленные строки (с переводами строк) по порядку."""
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            lines.insert(
+                0, f"... пропущено строк: {dropped}, полный журнал: {config.LOG_FILE}\n"
+            )
+        return lines
@@ -2,13 +2,16 @@
 import logging
 import threading
 import time
-from typing import Any, Callable, Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 from . import config  # Для доступа к LOG_FILE в сообщениях
 
 # Импортируем зависимости
 from .app_state import AppState
-from .logic import LibraryHandler  # Или из . import logic
+from .pipeline import PageFeed
+
+if TYPE_CHECKING:  # logic тянет requests и Pillow, нужен только для аннотаций
+    from .logic import LibraryHandler
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +31,7 @@ class TaskManager:
     def __init__(
         self,
         app_state: AppState,
-        handler: LibraryHandler,
+        handler: Optional["LibraryHandler"],
         stop_event: threading.Event,
         status_callback: StatusCallback,
         progress_callback: ProgressCallback,
@@ -36,9 +39,12 @@ class TaskManager:
         show_message_callback: ShowMessageCallback,
         open_folder_callback: OpenFolderCallback,
         root: Optional[Any],  # tk.Tk, но избегаем прямого импорта tk для чистоты
+        handler_factory: Optional[Callable[[], "LibraryHandler"]] = None,
     ):
         self.app_state = app_state
-        self.handler = handler  # Экземпляр LibraryHandler
+        self._handler = handler  # Экземпляр LibraryHandler
+        # Создает обработчик при первой задаче, если handler не передан
+        self._handler_factory = handler_factory
         self.stop_event = stop_event
         self.current_thread: Optional[threading.Thread] = None
         # Сохраняем колбэки для взаимодействия с GUI
@@ -50,11 +56,26 @@ class TaskManager:
         self.root = root  # Нужен для root.after
         logger.debug("TaskManager initialized.")
 
+    @property
+    def handler(self) -> "LibraryHandler":
+        """Обработчик задач; без готового создается фабрикой при первом обращении."""
+        if self._handler is None:
+            if self._handler_factory is None:
+                raise RuntimeError("TaskManager has neither handler nor factory")
+            self._handler = self._handler_factory()
+        return self._handler
+
+    @handler.setter
+    def handler(self, handler: "LibraryHandler") -> None:
+        self._handler = handler
+
     def is_running(self) -> bool:
         """Проверяет, выполняется ли сейчас какая-либо задача."""
         return self.current_thread is not None and self.current_thread.is_alive()
 
-    def _start_thread(self, target_func: callable, args: tuple, task_name: str):
+    def _start_thread(
+        self, target_func: Callable[..., Any], args: tuple, task_name: str
+    ):
         """Внутренний метод для запуска потока."""
         if self.is_running():
             logger.warning(
@@ -129,8 +150,12 @@ class TaskManager:
             self.show_message_cb("error", "Ошибка", "Некорректное количество страниц.")
             return
 
+        # Целевая функция - внутренняя последовательность
+        sequence = (
+            self._run_all_pipelined if config.PIPELINED_ALL else self._run_all_sequence
+        )
         self._start_thread(
-            target_func=self._run_all_sequence,  # Целевая функция - внутренняя последовательность
+            target_func=sequence,
             args=(base_url, url_ids, filename_pdf, total_pages, pages_dir, spreads_dir),
             task_name=task_name,
         )
@@ -148,7 +173,7 @@ class TaskManager:
 
     # --- Обертки выполнения задач ---
     def _thread_wrapper(
-        self, target_func: callable, *args, task_name: str = "Task", **kwargs
+        self, target_func: Callable[..., Any], *args, task_name: str = "Task", **kwargs
     ) -> None:
         """Обертка для выполнения целевой функции (download или process) в потоке.
         Обрабатывает результат, ошибки и обновляет GUI через колбэки.
@@ -338,3 +363,101 @@ class TaskManager:
             and self.root
         ):
             self.root.after(500, lambda p=final_folder_to_open: self.open_folder_cb(p))
+
+    def _run_all_pipelined(
+        self,
+        base_url: str,
+        url_ids: str,
+        filename_pdf: str,
+        total_pages: int,
+        pages_dir: str,
+        spreads_dir: str,
+    ) -> None:
+        """Скачивает страницы и одновременно склеивает их в развороты.
+
+        Развороты создаются в отдельном потоке из PageFeed: пара страниц
+        обрабатывается, как только обе скачаны, поэтому общее время близко
+        к самому долгому из этапов, а не к их сумме. Пока идет скачивание,
+        полоса прогресса показывает его, затем - остаток обработки.
+        Вызывается как target_func через _start_thread -> _thread_wrapper.
+        """
+        task_name = "Download & Process"
+        logger.info(f"Pipelined combined task started: {task_name}")
+        feed = PageFeed(total_pages, self.stop_event)
+        download_finished = threading.Event()
+        processing: dict[str, Any] = {}
+
+        def processing_progress(current: int, total: int) -> None:
+            if download_finished.is_set():
+                self.progress_cb(current, total)
+
+        def run_processing() -> None:
+            try:
+                processing["result"] = self.handler.process_page_feed(
+                    feed, spreads_dir, processing_progress
+                )
+            except Exception as e:
+                processing["error"] = e
+
+        self.status_cb("--- НАЧАЛО: Скачивание страниц и создание разворотов ---")
+        processor = threading.Thread(
+            target=run_processing, name="SpreadProcessor", daemon=True
+        )
+        processor.start()
+        try:
+            success_count, total_dl_pages = self.handler.download_pages(
+                base_url,
+                url_ids,
+                filename_pdf,
+                total_pages,
+                pages_dir,
+                page_done_callback=feed.page_done,
+            )
+        finally:
+            download_finished.set()
+            feed.close()
+            processor.join()
+
+        if "error" in processing:
+            error = processing["error"]
+            logger.critical(
+                f"Critical error in pipelined processing ({task_name}): {error}",
+                exc_info=error,
+            )
+            raise error
+
+        if self.stop_event.is_set():
+            self.status_cb("--- Скачивание и обработка прерваны ---")
+            return
+
+        if success_count == 0:
+            self.status_cb(
+                "--- Скачивание не удалось (0 страниц), развороты не созданы ---"
+            )
+            self.show_message_cb(
+                "error",
+                "Ошибка скачивания",
+                f"Не удалось скачать ни одной страницы.\nПроверьте лог ({config.LOG_FILE}).",
+            )
+            return
+
+        processed_count, created_spread_count = processing["result"]
+        if success_count < total_dl_pages:
+            self.status_cb(
+                f"--- Скачивание завершено с ошибками ({success_count}/{total_dl_pages}) ---"
+            )
+            self.show_message_cb(
+                "warning",
+                "Скачивание с ошибками",
+                f"Скачано {success_count} из {total_dl_pages} страниц.\nРазвороты созданы из скачанных файлов.",
+            )
+        if config.CONTACT_SHEET_ENABLED and processed_count > 0:
+            # process_images делает это сам, при склейке по ходу - здесь
+            self.handler.create_contact_sheets(pages_dir, spreads_dir)
+
+        final_message = f"Скачивание ({success_count}/{total_dl_pages}) и обработка ({processed_count} файлов, {created_spread_count} разворотов) завершены."
+        self.status_cb(f"--- {final_message} ---")
+        self.show_message_cb("info", "Завершено", final_message)
+
+        if (processed_count > 0 or created_spread_count > 0) and self.root:
+            self.root.after(500, lambda p=spreads_dir: self.open_folder_cb(p))
@@ -1,7 +1,10 @@
+from pathlib import Path
 import threading
-from typing import Callable
+from typing import Callable, Optional
 
 # Общие типы колбэков для GUI
 StatusCallback = Callable[[str], None]
 ProgressCallback = Callable[[int, int], None]
 StopEvent = threading.Event
+# Результат страницы: (индекс, путь к файлу или None при ошибке)
+PageDoneCallback = Callable[[int, Optional[Path]], None]
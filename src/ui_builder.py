@@ -7,8 +7,6 @@ from tkinter import scrolledtext, ttk
 # Добавляем импорт Optional и других нужных типов
 from typing import Callable, Dict, Optional
 
-from PIL import Image, ImageTk
-
 from . import config, utils  # Для resource_path и констант
 
 # Импортируем зависимости
@@ -21,7 +19,7 @@ WidgetsDict = Dict[str, tk.Widget]
 
 
 # Теперь Optional будет найден
-def setup_main_window(root: tk.Tk) -> Optional[ImageTk.PhotoImage]:
+def setup_main_window(root: tk.Tk) -> Optional[tk.PhotoImage]:
     """Настраивает основные параметры главного окна (заголовок, размер, иконка, стили)."""
     logger.debug("Setting up main window...")
     root.title(config.WINDOW_TITLE)
@@ -32,9 +30,9 @@ def setup_main_window(root: tk.Tk) -> Optional[ImageTk.PhotoImage]:
     try:
         window_icon_path = utils.resource_path(config.WINDOW_ICON_PATH)
         if Path(window_icon_path).is_file():
-            pil_icon = Image.open(window_icon_path)
+            # PNG читает сам Tk (8.6+), Pillow для старта окна не нужен.
             # Важно сохранить ссылку на PhotoImage, иначе он будет собран GC
-            window_icon_image = ImageTk.PhotoImage(pil_icon)
+            window_icon_image = tk.PhotoImage(file=window_icon_path)
             root.iconphoto(True, window_icon_image)
             logger.debug(f"Window icon set from: {window_icon_path}")
         else:
@@ -176,16 +174,30 @@ def create_progress_frame(parent: tk.Widget) -> WidgetsDict:
         progress_frame, orient=tk.HORIZONTAL, length=100, mode="determinate"
     )
     widgets["progress_bar"].pack(fill=tk.X, expand=True)
+    # Счетчик, скорость и оставшееся время (см. progress.format_progress)
+    widgets["progress_label"] = ttk.Label(progress_frame, text="", anchor=tk.W)
+    widgets["progress_label"].pack(fill=tk.X)
     logger.debug("Progress frame created.")
     return widgets
 
 
-def create_status_frame(parent: tk.Widget) -> WidgetsDict:
-    """Создает фрейм с текстовым полем для вывода статуса."""
+def create_status_frame(
+    parent: tk.Widget, open_log_cmd: Optional[Callable] = None
+) -> WidgetsDict:
+    """Создает фрейм с текстовым полем для вывода статуса.
+
+    В поле видны только последние config.GUI_STATUS_MAX_LINES строк,
+    кнопка «Журнал» открывает полный лог.
+    """
     logger.debug("Creating status frame...")
     widgets: WidgetsDict = {}
     status_frame = ttk.LabelFrame(parent, text="Статус", padding=10)
     status_frame.pack(padx=10, pady=(0, 10), fill=tk.BOTH, expand=True)
+    if open_log_cmd is not None:
+        widgets["open_log_button"] = ttk.Button(
+            status_frame, text="Журнал", command=open_log_cmd
+        )
+        widgets["open_log_button"].pack(anchor=tk.E, pady=(0, 5))
     widgets["status_text"] = scrolledtext.ScrolledText(
         status_frame, height=10, wrap=tk.WORD, state=tk.DISABLED, bd=0, relief=tk.FLAT
     )
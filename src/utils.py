@@ -1,11 +1,12 @@
+from functools import lru_cache
 import logging
 import logging.handlers
+import os
 from pathlib import Path
 import re
+import subprocess
 import sys
-from typing import Optional, Union
-
-from PIL import Image
+from typing import NamedTuple, Optional, Union
 
 from . import config
 
@@ -28,7 +29,54 @@ def get_page_number(filename: str) -> int:
     return int(match.group()) if match else -1
 
 
-def is_likely_spread(image_path: Union[str, Path], threshold: Optional[float] = None) -> bool:
+class ImageInfo(NamedTuple):
+    """Сведения об изображении из заголовка файла."""
+
+    width: int
+    height: int
+    mode: str
+    format: Optional[str]
+
+
+@lru_cache(maxsize=config.IMAGE_INFO_CACHE_SIZE)
+def _read_cached_image_info(path: str, mtime_ns: int, size: int) -> ImageInfo:
+    # mtime_ns и size - часть ключа кэша: измененный файл читается заново
+    return _read_image_info(path)
+
+
+def _read_image_info(image_path: Union[str, Path]) -> ImageInfo:
+    from PIL import Image  # Pillow грузится только при первой обработке
+
+    with Image.open(image_path) as img:  # Пиксели не декодируются
+        width, height = img.size
+        return ImageInfo(width, height, img.mode, img.format)
+
+
+def get_image_info(image_path: Union[str, Path]) -> ImageInfo:
+    """Возвращает размеры и формат изображения, читая только заголовок.
+
+    Результат запоминается по пути, времени изменения и размеру файла,
+    поэтому повторные проверки той же страницы файл не открывают.
+
+    Args:
+        image_path: Путь к файлу.
+
+    Returns:
+        Сведения об изображении.
+
+    Raises:
+        OSError: Если файл не найден или не является изображением.
+    """
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return _read_image_info(image_path)  # Сообщит об ошибке Pillow
+    return _read_cached_image_info(str(image_path), stat.st_mtime_ns, stat.st_size)
+
+
+def is_likely_spread(
+    image_path: Union[str, Path], threshold: Optional[float] = None
+) -> bool:
     """Проверяет, может ли изображение уже быть разворотом,
     основываясь на соотношении сторон (ширина / высота).
 
@@ -44,16 +92,15 @@ def is_likely_spread(image_path: Union[str, Path], threshold: Optional[float] =
         threshold = config.DEFAULT_ASPECT_RATIO_THRESHOLD
 
     try:
-        with Image.open(image_path) as img:
-            width, height = img.size
-            if height == 0:
-                logger.warning(f"Image has zero height: {image_path}")
-                return False
-            aspect_ratio = width / height
-            logger.debug(
-                f"Image: {Path(image_path).name}, Size: {width}x{height}, Ratio: {aspect_ratio:.2f}, Threshold: {threshold}"
-            )
-            return aspect_ratio > threshold
+        width, height = get_image_info(image_path)[:2]
+        if height == 0:
+            logger.warning(f"Image has zero height: {image_path}")
+            return False
+        aspect_ratio = width / height
+        logger.debug(
+            f"Image: {Path(image_path).name}, Size: {width}x{height}, Ratio: {aspect_ratio:.2f}, Threshold: {threshold}"
+        )
+        return aspect_ratio > threshold
     except FileNotFoundError:
         logger.error(f"Image file not found for aspect ratio check: {image_path}")
         return False
@@ -88,6 +135,23 @@ def resource_path(relative_path: str) -> str:
     return str(final_path)
 
 
+def open_in_system_app(path: Union[str, Path]) -> None:
+    """Открывает файл или папку программой по умолчанию.
+
+    На Windows - через os.startfile, на macOS - командой open, на Linux и
+    других системах - через xdg-open. Команда запускается без ожидания.
+
+    Raises:
+        OSError: Не удалось запустить программу (например, нет xdg-open).
+    """
+    if sys.platform == "win32":
+        os.startfile(path)
+    elif sys.platform == "darwin":
+        subprocess.Popen(["open", str(path)])
+    else:
+        subprocess.Popen(["xdg-open", str(path)])
+
+
 def setup_logging():
     """Настраивает базовую конфигурацию логирования."""
     log_formatter = logging.Formatter(
@@ -0,0 +1,410 @@
+# tests/test_async_engine.py
+import asyncio
+import base64
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src import async_engine, config, logic
+from src.page_cache import PageCache
+from src.rate_limiter import AdaptiveRateLimiter
+
+
+class _PageRequestHandler(BaseHTTPRequestHandler):
+    """Заглушка elib.rgo.ru: отдает страницы по base64("<имя>/<индекс>")."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        encoded = self.path.rsplit("/", 1)[-1]
+        try:
+            name, index = base64.b64decode(encoded).decode("utf-8").rsplit("/", 1)
+            index = int(index)
+        except Exception:
+            self._reply(400, "text/plain", b"bad request")
+            return
+        with self.server.lock:
+            self.server.requested.append(index)
+            self.server.cookies.add(self.headers.get("Cookie"))
+        if self.server.throttled.get(index):
+            self.server.throttled[index] -= 1
+            self.send_response(self.server.throttle_status)
+            self.send_header("Retry-After", "30")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif index in self.server.redirected and not self.path.startswith("/moved/"):
+            self.send_response(302)
+            location = self.server.redirect_location.format(
+                encoded=encoded, path=self.path
+            )
+            self.send_header("Location", location)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", "5")
+            self.end_headers()
+            self.wfile.write(b"moved")
+        elif index in self.server.missing:
+            self._reply(404, "text/plain", b"not found")
+        elif index in self.server.html_pages:
+            self._reply(200, "text/html; charset=utf-8", b"<html>login</html>")
+        elif index in self.server.chunked_pages:
+            self._reply_chunked(f"{name}:{index}".encode())
+        elif self.headers.get("If-None-Match") == f'"{index}"':
+            with self.server.lock:
+                self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", f'"{index}"')
+            self.end_headers()
+        else:
+            self._reply(200, "image/jpeg", f"{name}:{index}".encode(), f'"{index}"')
+
+    def _reply(self, status, content_type, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reply_chunked(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for part in (body[:3], body[3:]):
+            self.wfile.write(f"{len(part):x}\r\n".encode() + part + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+@pytest.fixture
+def page_server():
+    """Локальный HTTP-сервер со страницами книги."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageRequestHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requested = []
+    server.cookies = set()
+    server.missing = set()
+    server.redirected = set()
+    server.redirect_location = "/moved/{encoded}"  # Шаблон заголовка Location
+    server.html_pages = set()
+    server.chunked_pages = set()
+    server.throttled = {}
+    server.throttle_status = 503
+    server.not_modified = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/safe-view/"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fast_config(mocker):
+    """Убирает повторы запросов."""
+    mocker.patch("src.async_engine.config.MAX_RETRIES", 0)
+
+
+@pytest.fixture
+def async_handler(mocker):
+    """Экземпляр AsyncLibraryHandler без запроса куки к реальному сайту."""
+    handler = async_engine.AsyncLibraryHandler(
+        status_callback=MagicMock(),
+        progress_callback=MagicMock(),
+        stop_event=threading.Event(),
+    )
+    mocker.patch.object(handler, "_get_initial_cookies", return_value=True)
+    handler.rate_limiter = AdaptiveRateLimiter(
+        initial_rate=1000, max_rate=1000, burst=1000
+    )
+    return handler
+
+
+@pytest.mark.usefixtures("fast_config")
+def test_async_download_all_pages(async_handler, page_server, tmp_path):
+    """Тест: все страницы скачаны через ограниченное число соединений."""
+    total_pages = 40
+    result = async_handler.download_pages(
+        page_server.base_url, "123/456", "atlas.pdf", total_pages, str(tmp_path), 3
+    )
+
+    assert result == (total_pages, total_pages)
+    assert sorted(page_server.requested) == list(range(total_pages))
+    # Соединения переиспользуются (keep-alive)
+    assert page_server.connections <= 3
+    for i in range(total_pages):
+        assert (
+            tmp_path / f"page_{i:03d}.jpeg"
+        ).read_bytes() == f"atlas.pdf:{i}".encode()
+
+    assert not list(tmp_path.glob("*.part"))
+    progress_values = [c[0][0] for c in async_handler.progress_callback.call_args_list]
+    assert progress_values == list(range(total_pages + 1))
+    async_handler.status_callback.assert_any_call(
+        f"Скачивание завершено. Успешно: {total_pages} из {total_pages}."
+    )
+
+
+@pytest.mark.usefixtures("fast_config")
+def test_async_download_errors_and_chunked(async_handler, page_server, tmp_path):
+    """Тест: 404, HTML вместо картинки и chunked-ответ."""
+    page_server.missing = {1}
+    page_server.html_pages = {2}
+    page_server.chunked_pages = {3}
+
+    result = async_handler.download_pages(
+        page_server.base_url, "ids", "book.pdf", 4, str(tmp_path)
+    )
+
+    assert result == (2, 4)
+    assert (tmp_path / "page_000.jpeg").exists()
+    assert not list(tmp_path.glob("page_001.*"))
+    assert not list(tmp_path.glob("page_002.*"))
+    assert (tmp_path / "page_003.png").read_bytes() == b"book.pdf:3"
+    status_cb = async_handler.status_callback
+    assert any("Ошибка HTTP 404 на стр. 2" in c[0][0] for c in status_cb.call_args_list)
+    status_cb.assert_any_call(
+        "Ошибка на стр. 3: Получен HTML вместо изображения. Проблема с сессией/URL?"
+    )
+
+
+@pytest.mark.usefixtures("fast_config")
+def test_async_download_follows_same_host_redirect(
+    async_handler, page_server, tmp_path
+):
+    """Тест: по 302 на тот же хост страница скачивается, как в requests."""
+    page_server.redirected = {1}
+
+    result = async_handler.download_pages(
+        page_server.base_url, "ids", "book.pdf", 2, str(tmp_path)
+    )
+
+    assert result == (2, 2)
+    assert (tmp_path / "page_001.jpeg").read_bytes() == b"book.pdf:1"
+    assert sorted(page_server.requested) == [0, 1, 1]
+
+
+@pytest.mark.usefixtures("fast_config")
+@pytest.mark.parametrize(
+    "location",
+    ["http://elib.invalid/login", "{path}"],  # Другой хост и цикл
+)
+def test_async_download_redirect_not_followed(
+    async_handler, page_server, tmp_path, mocker, location
+):
+    """Тест: редирект на другой хост или сверх лимита - ошибка, тело не сохраняется."""
+    mocker.patch("src.async_engine.config.ASYNC_MAX_REDIRECTS", 2)
+    page_server.redirected = {1}
+    page_server.redirect_location = location
+
+    result = async_handler.download_pages(
+        page_server.base_url, "ids", "book.pdf", 2, str(tmp_path)
+    )
+
+    assert result == (1, 2)
+    assert not list(tmp_path.glob("page_001.*"))
+    status_cb = async_handler.status_callback
+    assert any("Ошибка HTTP 302 на стр. 2" in c[0][0] for c in status_cb.call_args_list)
+
+
+@pytest.mark.usefixtures("fast_config")
+def test_async_download_streams_body_in_chunks(
+    async_handler, page_server, tmp_path, mocker
+):
+    """Тест: тело читается кусками и собирается в файле без потерь."""
+    mocker.patch("src.async_engine.config.DOWNLOAD_CHUNK_SIZE", 2)
+    page_server.chunked_pages = {1}
+
+    result = async_handler.download_pages(
+        page_server.base_url, "ids", "book.pdf", 3, str(tmp_path), 1
+    )
+
+    assert result == (3, 3)
+    assert (tmp_path / "page_000.jpeg").read_bytes() == b"book.pdf:0"
+    assert (tmp_path / "page_001.png").read_bytes() == b"book.pdf:1"
+    assert (tmp_path / "page_002.jpeg").read_bytes() == b"book.pdf:2"
+    assert page_server.connections == 1  # Соединение дочитано и переиспользовано
+
+
+@pytest.mark.usefixtures("fast_config")
+def test_async_download_resume(async_handler, page_server, tmp_path):
+    """Тест: при докачке запрашиваются только недостающие страницы."""
+    page_server.missing = {1}
+    assert async_handler.download_pages(
+        page_server.base_url, "ids", "b.pdf", 3, str(tmp_path)
+    ) == (2, 3)
+    manifest = json.loads((tmp_path / config.DOWNLOAD_MANIFEST_FILE).read_bytes())
+    assert manifest["pages"]["0"]["sha256"] == hashlib.sha256(b"b.pdf:0").hexdigest()
+    assert manifest["pages"]["1"]["status"] == "failed"
+
+    page_server.missing = set()
+    page_server.requested.clear()
+    result = async_handler.download_pages(
+        page_server.base_url, "ids", "b.pdf", 3, str(tmp_path), resume=True
+    )
+
+    assert result == (3, 3)
+    assert page_server.requested == [1]
+    assert (tmp_path / "page_001.jpeg").read_bytes() == b"b.pdf:1"
+
+
+@pytest.mark.usefixtures("fast_config")
+def test_async_download_page_cache(async_handler, page_server, tmp_path):
+    """Тест: повторное скачивание книги идет из кэша или через 304."""
+    async_handler.page_cache = PageCache(tmp_path / "cache", max_age=3600)
+    args = (page_server.base_url, "ids", "b.pdf", 3)
+    assert async_handler.download_pages(*args, str(tmp_path / "a")) == (3, 3)
+    assert len(page_server.requested) == 3
+
+    page_server.requested.clear()
+    assert async_handler.download_pages(*args, str(tmp_path / "b")) == (3, 3)
+    assert page_server.requested == []  # Все страницы свежие в кэше
+
+    async_handler.page_cache.max_age = 0
+    assert async_handler.download_pages(*args, str(tmp_path / "c")) == (3, 3)
+    assert sorted(page_server.requested) == [0, 1, 2]
+    assert page_server.not_modified == 3
+    assert (tmp_path / "c" / "page_002.jpeg").read_bytes() == b"b.pdf:2"
+
+
+@pytest.mark.usefixtures("fast_config")
+def test_async_download_sends_session_cookies(async_handler, page_server, tmp_path):
+    """Тест: куки из сессии requests передаются в асинхронные запросы."""
+    async_handler._setup_session_with_retry()
+    async_handler.session.cookies.set("JSESSIONID", "abc", domain="127.0.0.1")
+
+    async_handler.download_pages(page_server.base_url, "ids", "b.pdf", 2, str(tmp_path))
+
+    assert page_server.cookies == {"JSESSIONID=abc"}
+
+
+@pytest.mark.usefixtures("fast_config")
+def test_async_download_stop_event(async_handler, page_server, tmp_path):
+    """Тест: после сигнала стоп новые страницы не запрашиваются."""
+
+    def stop_after_first(current, total):
+        if current >= 1:
+            async_handler.stop_event.set()
+
+    async_handler.progress_callback.side_effect = stop_after_first
+
+    success, total = async_handler.download_pages(
+        page_server.base_url, "ids", "b.pdf", 50, str(tmp_path), 1
+    )
+
+    assert total == 50
+    assert 1 <= success < 50
+    assert len(page_server.requested) < 50
+    async_handler.status_callback.assert_any_call(
+        "--- Скачивание прервано пользователем ---"
+    )
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_async_download_retries_and_honours_retry_after(
+    async_handler, page_server, tmp_path, mocker, status
+):
+    """Тест: 429/503 с Retry-After повторяется после паузы лимитера."""
+    mocker.patch("src.async_engine.config.MAX_RETRIES", 1)
+    real_sleep = asyncio.sleep
+
+    async def no_wait(delay):
+        await real_sleep(0)
+
+    mock_sleep = mocker.patch("src.async_engine.asyncio.sleep", side_effect=no_wait)
+    page_server.throttled = {0: 1}  # Первый запрос страницы 0 получит status
+    page_server.throttle_status = status
+    rate_before = async_handler.rate_limiter.rate
+
+    result = async_handler.download_pages(
+        page_server.base_url, "ids", "b.pdf", 1, str(tmp_path)
+    )
+
+    assert result == (1, 1)
+    assert (tmp_path / "page_000.jpeg").read_bytes() == b"b.pdf:0"
+    assert page_server.requested == [0, 0]
+    assert async_handler.rate_limiter.rate < rate_before
+    # Повтор ждал паузу из Retry-After, а не backoff
+    delays = [c[0][0] for c in mock_sleep.call_args_list]
+    assert any(delay > 29 for delay in delays)
+    assert 1 not in delays
+
+
+@pytest.mark.usefixtures("fast_config")
+def test_async_download_takes_tokens_per_connection(
+    async_handler, page_server, tmp_path, mocker
+):
+    """Тест: с начальной скоростью токены берутся только под занятые соединения.
+
+    Если бы вся очередь бронировала токены заранее, паузы росли бы по
+    начальной скорости и не сокращались бы после ее повышения.
+    """
+    limiter = AdaptiveRateLimiter()  # Начальная скорость из config
+    async_handler.rate_limiter = limiter
+    real_reserve, real_record = limiter.reserve, limiter.record
+    outstanding = 0
+    peak = 0
+    waits = []
+
+    def reserve():
+        nonlocal outstanding, peak
+        outstanding += 1
+        peak = max(peak, outstanding)
+        waits.append(real_reserve())
+        return waits[-1]
+
+    def record(*args):
+        nonlocal outstanding
+        outstanding -= 1
+        real_record(*args)
+
+    mocker.patch.object(limiter, "reserve", side_effect=reserve)
+    mocker.patch.object(limiter, "record", side_effect=record)
+    real_sleep = asyncio.sleep
+
+    async def no_wait(delay):
+        await real_sleep(0)
+
+    mocker.patch("src.async_engine.asyncio.sleep", side_effect=no_wait)
+    pages = 20
+
+    result = async_handler.download_pages(
+        page_server.base_url, "ids", "b.pdf", pages, str(tmp_path), workers=2
+    )
+
+    assert result == (pages, pages)
+    assert peak <= 2
+    assert limiter.rate > config.RATE_LIMIT_INITIAL_RPS
+    booked_at_initial_rate = (
+        pages - config.RATE_LIMIT_BURST
+    ) / config.RATE_LIMIT_INITIAL_RPS
+    assert max(waits) < booked_at_initial_rate / 2
+
+
+def test_async_download_prepare_fails(async_handler, mocker):
+    """Тест: при ошибке подготовки event loop не запускается."""
+    mocker.patch.object(async_handler, "_prepare_download", return_value=None)
+    mock_run = mocker.patch("src.async_engine.asyncio.run")
+
+    assert async_handler.download_pages("b", "i", "f", 5, "out") == (0, 5)
+    mock_run.assert_not_called()
+
+
+def test_async_handler_shares_page_url_scheme():
+    """Тест: URL страниц строятся так же, как в синхронном движке."""
+    url = logic.build_page_url("http://h/safe-view/", "1/2/", "book.pdf", 7)
+    assert url == "http://h/safe-view/1/2/" + base64.b64encode(b"book.pdf/7").decode()
@@ -0,0 +1,204 @@
+# tests/test_batch.py
+import json
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src import batch, logic
+from src.manifest import book_identity
+from src.rate_limiter import AdaptiveRateLimiter
+
+
+def _book(name, pages=4):
+    return book_identity("https://h/safe-view/", f"1/{name}/", f"{name}.pdf", pages)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = batch.BatchQueue(tmp_path / "queue.json")
+    for name in ("a", "b", "c"):
+        queue.add(_book(name), tmp_path / "out")
+    return queue
+
+
+class _FakeFactory:
+    """Фабрика обработчиков: download_pages по словарю результатов книг."""
+
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.handlers = []
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def __call__(self, status_callback, progress_callback, stop_event):
+        handler = MagicMock(spec=logic.LibraryHandler)
+        handler.stop_event = stop_event
+        handler.process_images.return_value = (4, 2)
+
+        def download_pages(base_url, url_ids, filename_pdf, total_pages, *a, **kw):
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            try:
+                result = self.results.get(filename_pdf, total_pages)
+                if isinstance(result, Exception):
+                    raise result
+                progress_callback(result, total_pages)
+                return result, total_pages
+            finally:
+                with self.lock:
+                    self.active -= 1
+
+        handler.download_pages.side_effect = download_pages
+        self.handlers.append(handler)
+        return handler
+
+
+def _runner(queue, factory, **kwargs):
+    kwargs.setdefault("stop_event", threading.Event())
+    return batch.BatchRunner(queue, factory, MagicMock(), MagicMock(), **kwargs)
+
+
+def test_load_books_csv_and_json(tmp_path):
+    """Тест: список книг из CSV и JSON, base_url по умолчанию."""
+    csv_path = tmp_path / "books.csv"
+    csv_path.write_text(
+        "url_ids,filename_pdf,total_pages,base_url\n"
+        "1/2/,atlas.pdf,10,\n"
+        "3/4/,map.pdf,5,http://other/safe-view/\n",
+        encoding="utf-8",
+    )
+    json_path = tmp_path / "books.json"
+    json_path.write_text(
+        json.dumps(
+            [{"url_ids": "1/2/", "filename_pdf": "atlas.pdf", "total_pages": 10}]
+        )
+    )
+
+    books = batch.load_books(csv_path, "http://h/")
+
+    assert books == [
+        book_identity("http://h/", "1/2/", "atlas.pdf", 10),
+        book_identity("http://other/safe-view/", "3/4/", "map.pdf", 5),
+    ]
+    assert batch.load_books(json_path, "http://h/") == books[:1]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        '{"url_ids": "1"}',
+        '[{"url_ids": "1", "filename_pdf": "a.pdf"}]',
+        '[{"url_ids": "1", "filename_pdf": "a.pdf", "total_pages": 0}]',
+    ],
+)
+def test_load_books_invalid(tmp_path, content):
+    path = tmp_path / "books.json"
+    path.write_text(content)
+    with pytest.raises(ValueError):
+        batch.load_books(path, "http://h/")
+
+
+def test_queue_add_save_and_load(tmp_path, queue):
+    """Тест: очередь без дублей, прерванные книги снова в очереди."""
+    assert queue.add(_book("a"), tmp_path / "out") is False
+    assert queue.jobs[0]["pages_dir"] == str(tmp_path / "out" / "a_1_a" / "pages")
+    queue.update(0, status=batch.JOB_DONE)
+    queue.update(1, status=batch.JOB_RUNNING)
+    assert not list(tmp_path.glob("*.part"))
+
+    loaded = batch.BatchQueue.load(tmp_path / "queue.json")
+
+    assert [job["status"] for job in loaded.jobs] == [
+        batch.JOB_DONE,
+        batch.JOB_PENDING,
+        batch.JOB_PENDING,
+    ]
+    assert loaded.pending_jobs() == [1, 2]
+
+
+def test_queue_load_corrupted(tmp_path):
+    path = tmp_path / "queue.json"
+    path.write_text("{broken")
+    assert batch.BatchQueue.load(path).jobs == []
+
+
+def test_runner_statuses_and_shared_limiter(queue):
+    """Тест: итоги книг записаны в очередь, лимитер общий для всех книг."""
+    factory = _FakeFactory({"b.pdf": 2, "c.pdf": RuntimeError("boom")})
+    limiter = AdaptiveRateLimiter()
+    runner = _runner(queue, factory, rate_limiter=limiter)
+
+    summary = runner.run()
+
+    assert summary[batch.JOB_DONE] == 1
+    assert summary[batch.JOB_PARTIAL] == 1
+    assert summary[batch.JOB_FAILED] == 1
+    assert queue.jobs[2]["error"] == "boom"
+    assert all(handler.rate_limiter is limiter for handler in factory.handlers)
+    for handler in factory.handlers:
+        assert handler.download_pages.call_args.kwargs["resume"] is True
+    runner.progress_callback.assert_any_call(6, 12)
+
+    # Повторный запуск доделывает только неготовые книги
+    factory = _FakeFactory()
+    assert _runner(queue, factory).run()[batch.JOB_DONE] == 3
+    assert len(factory.handlers) == 2
+
+
+def test_runner_concurrency_limits(tmp_path):
+    """Тест: книг одновременно не больше max_connections // page_workers."""
+    queue = batch.BatchQueue(tmp_path / "queue.json")
+    for i in range(6):
+        queue.add(_book(str(i)), tmp_path)
+    factory = _FakeFactory()
+    barrier = threading.Barrier(2, timeout=5)
+    original = factory.__call__
+
+    def factory_with_barrier(*args):
+        handler = original(*args)
+        inner = handler.download_pages.side_effect
+
+        def download(*a, **kw):
+            barrier.wait()  # Две книги должны идти одновременно
+            return inner(*a, **kw)
+
+        handler.download_pages.side_effect = download
+        return handler
+
+    runner = _runner(
+        queue, factory_with_barrier, book_workers=5, page_workers=3, max_connections=7
+    )
+    assert (runner.book_workers, runner.page_workers) == (2, 3)
+
+    assert runner.run()[batch.JOB_DONE] == 6
+    assert factory.max_active <= 2  # Барьер выше доказал, что их было две
+    assert factory.handlers[0].download_pages.call_args.kwargs["workers"] == 3
+
+
+def test_runner_stop_keeps_books_pending(queue):
+    """Тест: после стопа незавершенные книги остаются в очереди."""
+    stop_event = threading.Event()
+    factory = _FakeFactory()
+    original = factory.__call__
+
+    def stopping_factory(*args):
+        handler = original(*args)
+
+        def download(*a, **kw):
+            stop_event.set()
+            assert handler.stop_event.wait(5)  # Сигнал дошел до книги
+            return 1, 4
+
+        handler.download_pages.side_effect = download
+        return handler
+
+    summary = _runner(
+        queue, stopping_factory, stop_event=stop_event, book_workers=1
+    ).run()
+
+    assert summary[batch.JOB_PENDING] == 3
+    assert len(factory.handlers) == 1
+    factory.handlers[0].process_images.assert_not_called()
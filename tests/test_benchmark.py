@@ -0,0 +1,121 @@
+# tests/test_benchmark.py
+import base64
+import time
+
+from PIL import Image
+import pytest
+import requests
+
+from src import benchmark, config
+
+
+def test_make_sample_page_modes():
+    """Тест: серая и цветная страницы нужного режима и размера."""
+    gray = benchmark.make_sample_page((60, 80), "L")
+    colour = benchmark.make_sample_page((60, 80), "RGB")
+    assert (gray.mode, gray.size) == ("L", (60, 80))
+    assert (colour.mode, colour.size) == ("RGB", (60, 80))
+    red, _, blue = colour.split()
+    assert blue.getextrema()[1] < red.getextrema()[1]  # Желтоватая бумага
+
+
+def test_benchmark_compose(tmp_path):
+    """Тест: серая книга дает серый разворот, прежняя склейка - RGB."""
+    results = benchmark.benchmark_compose(tmp_path, (60, 80), repeat=1)
+
+    assert [(r.book, r.mode) for r in results] == [
+        ("grayscale", "L"),
+        ("grayscale-as-rgb", "RGB"),
+        ("colour", "RGB"),
+    ]
+    assert all(r.seconds > 0 and r.size_bytes > 0 for r in results)
+    with Image.open(tmp_path / "grayscale_001-002.jpg") as spread:
+        assert spread.size == (120, 80)
+
+    table = benchmark.format_compose_benchmark(results).splitlines()
+    assert len(table) == 6
+    assert table[-2].startswith("grayscale vs grayscale-as-rgb: time x")
+
+
+def test_serve_pages():
+    """Тест: локальный сервер ставит куки и отдает страницу с задержкой."""
+    page_url = base64.b64encode(b"book.pdf/3").decode()
+    with benchmark.serve_pages(b"jpeg bytes", latency=0.05) as base_url:
+        assert requests.get(base_url, timeout=5).cookies["session"] == "bench"
+        started = time.monotonic()
+        response = requests.get(f"{base_url}ids/{page_url}", timeout=5)
+        assert time.monotonic() - started >= 0.05
+        assert requests.get(f"{base_url}missing", timeout=5).status_code == 404
+
+    assert response.content == b"jpeg bytes"
+    assert response.headers["Content-Type"] == "image/jpeg"
+
+
+@pytest.mark.parametrize("engine", ["requests", "asyncio"])
+def test_bench_download(tmp_path, engine):
+    cookie_url = config.INITIAL_COOKIE_URL
+    page = b"\xff\xd8 page"
+    with benchmark.serve_pages(page) as base_url:
+        result = benchmark.bench_download(
+            base_url, tmp_path / "pages", 3, workers=2, engine=engine
+        )
+
+    assert cookie_url == config.INITIAL_COOKIE_URL  # Замер не меняет config
+    assert (result.suite, result.case) == ("download", f"{engine} workers=2")
+    assert (result.pages, result.size_bytes) == (3, 3 * len(page))
+    assert result.pages_per_second > 0
+    assert sorted(p.name for p in (tmp_path / "pages").glob("page_*")) == [
+        "page_000.jpeg",
+        "page_001.jpeg",
+        "page_002.jpeg",
+    ]
+
+
+def test_make_page_set_mixed(tmp_path):
+    """Тест: в смешанной книге цветная обложка и каждая шестая - разворот."""
+    total = benchmark.make_page_set(tmp_path, "mixed", 7, dpi=10)
+
+    assert total == sum(p.stat().st_size for p in tmp_path.iterdir())
+    sizes = {}
+    for path in sorted(tmp_path.iterdir()):
+        with Image.open(path) as page:
+            sizes[path.name] = (page.mode, page.size)
+    assert sizes["page_000.jpg"] == ("RGB", (83, 117))
+    assert sizes["page_001.jpg"] == ("L", (83, 117))
+    assert sizes["page_005.jpg"] == ("RGB", (166, 117))
+
+
+def test_run_suite_isolated_processing(tmp_path):
+    """Тест: случай обработки в отдельном процессе, с пиковым RSS."""
+    results = benchmark.run_suite(
+        tmp_path, ("process",), pages=4, books=("grayscale",), dpis=(20,)
+    )
+
+    assert [(r.suite, r.case, r.pages) for r in results] == [
+        ("process", "grayscale 20dpi workers=1", 4)
+    ]
+    assert (tmp_path / "spreads_grayscale_20" / "001-002.jpg").is_file()
+    if results[0].peak_rss_mb is not None:
+        assert results[0].peak_rss_mb > 1
+
+
+def test_history_and_format(tmp_path):
+    """Тест: запуск дописывается в историю и сравнивается с прошлым."""
+    history = tmp_path / "bench.jsonl"
+    first = benchmark.BenchResult(
+        "process", "colour 150dpi", 10, 2.0, 4 * 1024**2, 80.0
+    )
+    benchmark.append_history(history, [first])
+    benchmark.append_history(history, [first._replace(seconds=1.0)])
+
+    runs = benchmark.load_history(history)
+    table = benchmark.format_suite(
+        [first._replace(seconds=2.5), first._replace(case="new", peak_rss_mb=None)],
+        runs[0],
+    ).splitlines()
+
+    assert len(runs) == 2
+    assert runs[1]["results"][0]["seconds"] == 1.0
+    assert table[1].split()[-4:] == ["4.0", "1.6", "80", "-20%"]
+    assert table[2].split()[-3:] == ["5.0", "2.0", "-"]  # Нового случая нет в истории
+    assert benchmark.load_history(tmp_path / "missing.jsonl") == []
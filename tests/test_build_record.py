@@ -0,0 +1,192 @@
+# tests/test_build_record.py
+import hashlib
+import os
+
+import pytest
+
+from src import build_record, config, manifest
+from src.build_record import (
+    KIND_COPY,
+    KIND_SPREAD,
+    BuildRecord,
+    file_sha256,
+    open_build_record,
+)
+
+PARAMS = {"threshold": 1.1, "encoder": ("jpeg", {"quality": 95})}
+
+
+@pytest.fixture
+def pages(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"page_{i:03d}.jpg"
+        path.write_bytes(bytes([i]) * 100)
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def spreads(tmp_path):
+    folder = tmp_path / "spreads"
+    folder.mkdir()
+    (folder / "000.jpg").write_bytes(b"cover")
+    (folder / "001-002.jpg").write_bytes(b"spread")
+    return folder
+
+
+def _save_record(spreads, pages):
+    record = BuildRecord(spreads / config.BUILD_RECORD_FILE, PARAMS)
+    record.update(spreads / "000.jpg", pages[:1], KIND_COPY)
+    record.update(spreads / "001-002.jpg", pages[1:], KIND_SPREAD)
+    assert record.save()
+    return record
+
+
+def _save_manifest(pages):
+    """Манифест скачивания, как после download_pages."""
+    folder = pages[0].parent
+    download = manifest.DownloadManifest(
+        folder / config.DOWNLOAD_MANIFEST_FILE, {"total_pages": len(pages)}
+    )
+    for i, path in enumerate(pages):
+        download.mark_done(
+            i, path.name, path.stat().st_size, "image/jpeg", file_sha256(path)
+        )
+    assert download.save()
+
+
+def test_file_sha256(pages):
+    assert file_sha256(pages[1]) == hashlib.sha256(b"\x01" * 100).hexdigest()
+
+
+def test_record_roundtrip(spreads, pages):
+    """Тест: после перезапуска неизмененные файлы считаются актуальными."""
+    _save_record(spreads, pages)
+
+    record = open_build_record(spreads, PARAMS, rebuild=False)
+
+    assert record.is_current(spreads / "000.jpg", pages[:1])
+    assert record.is_current(spreads / "001-002.jpg", pages[1:])
+    assert not record.is_current(spreads / "003.jpg", pages[2:])
+    assert not record.is_current(spreads / "001-002.jpg", pages[:2])  # Другие страницы
+
+
+def test_changed_page_makes_output_stale(spreads, pages):
+    _save_record(spreads, pages)
+    pages[2].write_bytes(b"\xff" * 100)  # Тот же размер, другой mtime и SHA-256
+    os.utime(pages[2], ns=(0, 0))
+
+    record = open_build_record(spreads, PARAMS, rebuild=False)
+
+    assert record.is_current(spreads / "000.jpg", pages[:1])
+    assert not record.is_current(spreads / "001-002.jpg", pages[1:])
+
+
+def test_update_does_not_read_pages(spreads, pages, mocker):
+    """Тест: при записи страницы не читаются, SHA-256 берется из манифеста."""
+    _save_manifest(pages)
+    spy_hash = mocker.spy(build_record, "file_sha256")
+
+    record = _save_record(spreads, pages)
+
+    spy_hash.assert_not_called()
+    sources = record.outputs["001-002.jpg"]["sources"]
+    assert sources[0]["sha256"] == hashlib.sha256(b"\x01" * 100).hexdigest()
+
+
+def test_redownloaded_page_with_same_content(spreads, pages, mocker):
+    """Тест: новый mtime при том же содержимом - хэш совпадает, mtime запоминается."""
+    _save_manifest(pages)
+    _save_record(spreads, pages)
+    pages[1].write_bytes(b"\x01" * 100)  # Скачана заново
+    os.utime(pages[1], ns=(0, 0))
+    _save_manifest(pages)
+    record = open_build_record(spreads, PARAMS, rebuild=False)
+    spy_hash = mocker.spy(build_record, "file_sha256")
+
+    assert record.is_current(spreads / "001-002.jpg", pages[1:])
+    assert record.is_current(spreads / "001-002.jpg", pages[1:])
+
+    spy_hash.assert_not_called()  # Хэш из манифеста, страница не читается
+    assert record.outputs["001-002.jpg"]["sources"][0]["mtime_ns"] == 0
+
+
+def test_page_edited_after_download_is_hashed(spreads, pages, mocker):
+    """Тест: манифест старше страницы - хэш считается по содержимому."""
+    _save_manifest(pages)
+    _save_record(spreads, pages)
+    later = pages[1].stat().st_mtime_ns + 10**9
+    os.utime(pages[1], ns=(later, later))  # Содержимое то же
+    pages[2].write_bytes(b"\xff" * 100)
+    os.utime(pages[2], ns=(later, later))
+    record = open_build_record(spreads, PARAMS, rebuild=False)
+    spy_hash = mocker.spy(build_record, "file_sha256")
+
+    assert not record.is_current(spreads / "001-002.jpg", pages[1:])
+
+    assert spy_hash.call_args_list == [mocker.call(pages[1]), mocker.call(pages[2])]
+
+
+def test_touched_page_without_hash_is_stale(spreads, pages, mocker):
+    """Тест: без манифеста новый mtime означает пересборку, без чтения страниц."""
+    _save_record(spreads, pages)
+    os.utime(pages[1], ns=(0, 0))
+    record = open_build_record(spreads, PARAMS, rebuild=False)
+    spy_hash = mocker.spy(build_record, "file_sha256")
+
+    assert not record.is_current(spreads / "001-002.jpg", pages[1:])
+    spy_hash.assert_not_called()
+
+
+def test_changed_or_missing_output(spreads, pages):
+    _save_record(spreads, pages)
+    (spreads / "000.jpg").write_bytes(b"edited cover")
+    (spreads / "001-002.jpg").unlink()
+
+    record = open_build_record(spreads, PARAMS, rebuild=False)
+
+    assert not record.is_current(spreads / "000.jpg", pages[:1])
+    assert not record.is_current(spreads / "001-002.jpg", pages[1:])
+
+
+def test_changed_params_drop_only_spreads(spreads, pages):
+    """Тест: при смене параметров развороты собираются заново, копии - нет."""
+    _save_record(spreads, pages)
+
+    record = open_build_record(spreads, {**PARAMS, "threshold": 1.3}, rebuild=False)
+
+    assert record.is_current(spreads / "000.jpg", pages[:1])
+    assert not record.is_current(spreads / "001-002.jpg", pages[1:])
+
+
+def test_rebuild_and_forget(spreads, pages):
+    _save_record(spreads, pages)
+
+    assert not open_build_record(spreads, PARAMS, rebuild=True).outputs
+    record = open_build_record(spreads, PARAMS, rebuild=False)
+    record.forget(spreads / "000.jpg")
+    assert not record.is_current(spreads / "000.jpg", pages[:1])
+
+
+def test_drop_stale_outputs(spreads, pages):
+    """Тест: файлы прежней раскладки, не собранные в этом запуске, удаляются."""
+    _save_record(spreads, pages)
+    record = open_build_record(spreads, PARAMS, rebuild=False)
+    (spreads / "001.jpg").write_bytes(b"single")
+    assert record.is_current(spreads / "000.jpg", pages[:1])
+    record.update(spreads / "001.jpg", pages[1:2], KIND_COPY)
+
+    assert record.drop_stale() == ["001-002.jpg"]
+
+    assert sorted(record.outputs) == ["000.jpg", "001.jpg"]
+    assert not (spreads / "001-002.jpg").exists()
+    assert (spreads / "000.jpg").exists()
+
+
+def test_corrupted_record_is_ignored(spreads):
+    (spreads / config.BUILD_RECORD_FILE).write_text("{broken", encoding="utf-8")
+
+    record = open_build_record(spreads, PARAMS, rebuild=False)
+
+    assert record.outputs == {}
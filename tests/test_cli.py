@@ -0,0 +1,255 @@
+# tests/test_cli.py
+import subprocess
+import sys
+import threading
+from unittest.mock import MagicMock
+
+from PIL import Image
+import pytest
+
+from src import async_engine, batch, benchmark, cli, config, logic
+
+DOWNLOAD_ARGS = ["--ids", "123/456", "--pdf-name", "book.pdf", "--pages", "10"]
+
+
+@pytest.fixture
+def mock_handler():
+    handler = MagicMock(spec=logic.LibraryHandler)
+    handler.download_pages.return_value = (10, 10)
+    handler.process_images.return_value = (10, 5)
+    return handler
+
+
+def _parse(*argv):
+    return cli.build_parser().parse_args(list(argv))
+
+
+def test_cli_does_not_import_tkinter():
+    """Тест: консольный режим работает без tkinter (сервер без дисплея)."""
+    code = "import sys, src.cli; sys.exit('tkinter' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], check=False).returncode == 0
+
+
+def test_parser_defaults():
+    args = _parse("all", *DOWNLOAD_ARGS)
+    assert args.base_url == config.DEFAULT_URL_BASE
+    assert args.pages == 10
+    assert args.pages_dir == config.DEFAULT_PAGES_DIR
+    assert args.spreads_dir == config.DEFAULT_SPREADS_DIR
+    assert args.workers is None
+    assert args.resume is None  # Значение из config.DOWNLOAD_RESUME
+    assert args.process_workers is None
+    assert args.rebuild is False
+    assert _parse("process", "--rebuild").rebuild is True
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["download", "--ids", "1"],  # Нет --pdf-name и --pages
+        ["download", *DOWNLOAD_ARGS, "--workers", "0"],
+        ["download", *DOWNLOAD_ARGS, "--delay", "-1"],
+        ["process", "--resume"],  # Ключ скачивания у обработки
+    ],
+)
+def test_parser_rejects_bad_arguments(argv, capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        _parse(*argv)
+    assert exc_info.value.code == 2
+
+
+def test_create_handler_engine_and_delay(mocker):
+    mocker.patch("src.cli.page_cache.create_page_cache", return_value=None)
+    args = _parse("download", *DOWNLOAD_ARGS, "--engine", "asyncio", "--delay", "2")
+
+    handler = cli.create_handler(args, threading.Event())
+
+    assert isinstance(handler, async_engine.AsyncLibraryHandler)
+    assert handler.rate_limiter.rate == pytest.approx(0.5)
+    assert handler.rate_limiter.max_rate == pytest.approx(0.5)
+
+
+def test_create_handler_no_cache():
+    args = _parse("download", *DOWNLOAD_ARGS, "--no-cache")
+    handler = cli.create_handler(args, threading.Event())
+    assert type(handler) is logic.LibraryHandler
+    assert handler.page_cache is None
+
+
+def test_create_handler_cache_opt_in(mocker, tmp_path):
+    """Тест: кэш выключен по умолчанию и включается ключом --cache."""
+    mocker.patch("src.page_cache.config.PAGE_CACHE_DIR", str(tmp_path))
+
+    handler = cli.create_handler(_parse("download", *DOWNLOAD_ARGS), threading.Event())
+    assert handler.page_cache is None
+
+    args = _parse("download", *DOWNLOAD_ARGS, "--cache")
+    handler = cli.create_handler(args, threading.Event())
+    assert handler.page_cache.root == tmp_path
+
+
+def test_run_command_all(mock_handler):
+    args = _parse(
+        "all", *DOWNLOAD_ARGS, "--pages-dir", "p", "--spreads-dir", "s", "--resume"
+    )
+    args.workers = 4
+
+    assert cli.run_command(args, mock_handler, threading.Event()) == cli.EXIT_OK
+
+    mock_handler.download_pages.assert_called_once_with(
+        config.DEFAULT_URL_BASE,
+        "123/456",
+        "book.pdf",
+        10,
+        "p",
+        workers=4,
+        resume=True,
+    )
+    mock_handler.process_images.assert_called_once_with(
+        "p", "s", workers=None, contact_sheet=None, rebuild=False
+    )
+
+
+@pytest.mark.parametrize(
+    "command, downloaded, processed, expected",
+    [
+        ("download", (10, 10), None, cli.EXIT_OK),
+        ("download", (7, 10), None, cli.EXIT_PARTIAL),
+        ("all", (0, 10), None, cli.EXIT_PARTIAL),
+        ("all", (7, 10), (7, 3), cli.EXIT_PARTIAL),
+        ("process", None, (0, 0), cli.EXIT_PARTIAL),
+        ("process", None, (4, 2), cli.EXIT_OK),
+    ],
+)
+def test_run_command_exit_codes(mock_handler, command, downloaded, processed, expected):
+    argv = [command] if command == "process" else [command, *DOWNLOAD_ARGS]
+    mock_handler.download_pages.return_value = downloaded
+    mock_handler.process_images.return_value = processed
+
+    assert cli.run_command(_parse(*argv), mock_handler, threading.Event()) == expected
+    if processed is None:
+        mock_handler.process_images.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "sheets, expected", [([1], cli.EXIT_OK), ([], cli.EXIT_PARTIAL)]
+)
+def test_run_command_preview(mock_handler, sheets, expected):
+    """Тест: preview только создает листы миниатюр, без скачивания и склейки."""
+    mock_handler.create_contact_sheets.return_value = sheets
+    args = _parse("preview", "--pages-dir", "p", "--spreads-dir", "s")
+
+    assert cli.run_command(args, mock_handler, threading.Event()) == expected
+    mock_handler.create_contact_sheets.assert_called_once_with("p", "s")
+    mock_handler.process_images.assert_not_called()
+
+
+def test_run_encoder_benchmark(tmp_path, capsys):
+    """Тест: bench-encoders печатает таблицу по всем предустановкам JPEG."""
+    image = tmp_path / "spread.png"
+    Image.new("RGB", (64, 32), (90, 120, 30)).save(image)
+    args = _parse("bench-encoders", "--image", str(image), "--formats", "jpeg")
+    args.repeat = 1
+
+    assert cli.run_encoder_benchmark(args) == cli.EXIT_OK
+    rows = capsys.readouterr().out.splitlines()
+    assert [row.split()[:2] for row in rows[1:]] == [
+        ["jpeg", "fast"],
+        ["jpeg", "balanced"],
+        ["jpeg", "small"],
+    ]
+
+    args.image = str(tmp_path / "missing.jpg")
+    assert cli.run_encoder_benchmark(args) == cli.EXIT_USAGE
+
+
+def test_run_benchmark_suite(tmp_path, mocker, capsys):
+    """Тест: bench передает параметры в набор и ведет историю."""
+    result = benchmark.BenchResult("process", "mixed 300dpi", 8, 2.0, 1024**2, 90.0)
+    mock_run = mocker.patch("src.cli.benchmark.run_suite", return_value=[result])
+    history = tmp_path / "bench.jsonl"
+    args = _parse(
+        "bench", "--suite", "process", "--dpi", "300", "--history", str(history)
+    )
+
+    assert cli.run_benchmark_suite(args) == cli.EXIT_OK
+    assert cli.run_benchmark_suite(args) == cli.EXIT_OK
+
+    suites = mock_run.call_args.args[1]
+    assert suites == ("process",)
+    assert mock_run.call_args.kwargs["dpis"] == [300]
+    assert len(benchmark.load_history(history)) == 2
+    assert capsys.readouterr().out.splitlines()[-1].endswith("+0%")
+
+
+def test_run_command_interrupted(mock_handler):
+    stop_event = threading.Event()
+    stop_event.set()
+    args = _parse("all", *DOWNLOAD_ARGS)
+    assert cli.run_command(args, mock_handler, stop_event) == cli.EXIT_INTERRUPTED
+    mock_handler.process_images.assert_not_called()
+
+
+def test_main_runs_command(mocker, mock_handler, capsys):
+    """Тест: main настраивает лог, запускает команду и возвращает ее код."""
+    mock_setup = mocker.patch("src.cli.utils.setup_logging")
+    mocker.patch("src.cli.logging.shutdown")
+    mocker.patch("src.cli.create_handler", return_value=mock_handler)
+
+    def download(*args, **kwargs):
+        mock_handler.status_callback("Скачивание завершено.")
+        return (3, 10)
+
+    mock_handler.status_callback = cli._make_callbacks(quiet=False)[0]
+    mock_handler.download_pages.side_effect = download
+
+    assert cli.main(["download", *DOWNLOAD_ARGS]) == cli.EXIT_PARTIAL
+    mock_setup.assert_called_once()
+    assert "Скачивание завершено." in capsys.readouterr().out
+
+
+def test_main_reports_critical_error(mocker, mock_handler, capsys):
+    mocker.patch("src.cli.utils.setup_logging")
+    mocker.patch("src.cli.logging.shutdown")
+    mocker.patch("src.cli.create_handler", return_value=mock_handler)
+    mock_handler.process_images.side_effect = RuntimeError("boom")
+
+    assert cli.main(["process"]) == cli.EXIT_PARTIAL
+    assert "Критическая ошибка: boom" in capsys.readouterr().out
+
+
+def test_quiet_callbacks_print_nothing(capsys):
+    status_callback, progress_callback = cli._make_callbacks(quiet=True)
+    status_callback("msg")
+    progress_callback(1, 2)
+    assert capsys.readouterr().out == ""
+
+
+def test_run_batch(tmp_path, mocker):
+    """Тест: пакет из CSV, повторный запуск продолжает сохраненную очередь."""
+    books = tmp_path / "books.csv"
+    books.write_text("url_ids,filename_pdf,total_pages\n1/2/,a.pdf,3\n")
+    mock_runner = mocker.patch("src.cli.batch.BatchRunner")
+    mock_runner.return_value.run.return_value = {batch.JOB_DONE: 1}
+    argv = ["batch", "--output-dir", str(tmp_path), "--book-workers", "3"]
+
+    assert cli.run_batch(_parse(*argv, "--books", str(books)), threading.Event()) == 0
+
+    queue = mock_runner.call_args[0][0]
+    assert queue.path == tmp_path / config.BATCH_QUEUE_FILE_NAME
+    assert queue.jobs[0]["book"]["filename_pdf"] == "a.pdf"
+    assert mock_runner.call_args.kwargs["book_workers"] == 3
+
+    # Без --books берется очередь с диска
+    assert cli.run_batch(_parse(*argv), threading.Event()) == 0
+    assert len(mock_runner.call_args[0][0].jobs) == 1
+
+
+def test_run_batch_usage_errors(tmp_path, capsys):
+    argv = ["batch", "--output-dir", str(tmp_path)]
+    assert cli.run_batch(_parse(*argv), threading.Event()) == cli.EXIT_USAGE
+    bad = tmp_path / "books.json"
+    bad.write_text("[{}]")
+    args = _parse(*argv, "--books", str(bad))
+    assert cli.run_batch(args, threading.Event()) == cli.EXIT_USAGE
+    assert "Ошибка списка книг" in capsys.readouterr().err
@@ -0,0 +1,90 @@
+# tests/test_encoders.py
+from io import BytesIO
+from unittest.mock import MagicMock
+
+from PIL import Image
+import pytest
+
+from src import encoders, image_processing
+
+
+@pytest.fixture
+def spread_image():
+    return Image.linear_gradient("L").resize((120, 80)).convert("RGB")
+
+
+@pytest.mark.parametrize(
+    "preset, expected",
+    [
+        ("fast", {"quality": 90}),
+        ("balanced", {"quality": 90, "optimize": True}),
+        ("small", {"quality": 90, "optimize": True, "progressive": True}),
+    ],
+)
+def test_get_encoder_jpeg_presets(preset, expected):
+    """Тест: качество JPEG из настроек, fast - без optimize."""
+    encoder = encoders.get_encoder("jpeg", preset, 90)
+    assert (encoder.pil_format, encoder.extension) == ("JPEG", ".jpg")
+    assert encoder.options == expected
+
+
+def test_get_encoder_errors():
+    with pytest.raises(ValueError, match="формат"):
+        encoders.get_encoder("bmp", "fast", 90)
+    with pytest.raises(ValueError, match="предустановка"):
+        encoders.get_encoder("jpeg", "turbo", 90)
+
+
+def test_get_encoder_falls_back_to_jpeg(mocker):
+    """Тест: формат без поддержки в Pillow заменяется JPEG."""
+    mocker.patch("src.encoders.importlib.import_module", side_effect=ImportError)
+    assert not encoders.is_available("jxl")
+
+    encoder = encoders.get_encoder("jxl", "small", 80)
+
+    assert encoder.name == "jpeg"
+    assert encoder.options["progressive"] is True
+
+
+def test_register_encoder_requires_all_presets():
+    with pytest.raises(ValueError, match="presets"):
+        encoders.register_encoder("tiff", "TIFF", ".tif", {"fast": {}})
+
+
+@pytest.mark.skipif(not encoders.is_available("webp"), reason="Pillow без WebP")
+def test_compose_spread_webp_skips_lossless_join(tmp_path, mocker, spread_image):
+    """Тест: при выводе в WebP jpegtran не используется, файл - WebP."""
+    mock_join = mocker.patch("src.image_processing.jpeg_join.join_losslessly")
+    left, right = tmp_path / "l.jpg", tmp_path / "r.jpg"
+    spread_image.save(left)
+    spread_image.save(right)
+    output = tmp_path / "001-002.webp"
+
+    image_processing.compose_spread(
+        left,
+        right,
+        output,
+        95,
+        MagicMock(),
+        "jpegtran",
+        encoders.get_encoder("webp", "fast", 95),
+    )
+
+    mock_join.assert_not_called()
+    with Image.open(output) as spread:
+        assert (spread.format, spread.size) == ("WEBP", (240, 80))
+
+
+def test_benchmark_encoders(spread_image):
+    """Тест: для каждой предустановки есть время и размер результата."""
+    results = encoders.benchmark_encoders(
+        spread_image, ["jpeg"], jpeg_quality=90, repeat=2
+    )
+
+    assert [r.preset for r in results] == list(encoders.PRESETS)
+    fast = BytesIO()
+    spread_image.save(fast, "JPEG", quality=90)
+    assert results[0].size_bytes == fast.tell()
+    assert all(r.seconds > 0 for r in results)
+    table = encoders.format_benchmark(results)
+    assert table.splitlines()[1].startswith("jpeg   fast")
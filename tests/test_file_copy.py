@@ -0,0 +1,107 @@
+# tests/test_file_copy.py
+import errno
+import os
+
+import pytest
+
+from src import config, file_copy
+
+
+@pytest.fixture(autouse=True)
+def clear_unsupported():
+    file_copy._unsupported.clear()
+    yield
+    file_copy._unsupported.clear()
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "page_001.jpg"
+    path.write_bytes(b"\xff\xd8" + os.urandom(4096))
+    os.utime(path, (1_000_000, 1_000_000))
+    return path
+
+
+def test_copy_file_hardlink(source, tmp_path):
+    """Тест: жесткая ссылка вместо копии, старый файл назначения заменяется."""
+    target = tmp_path / "001.jpg"
+    target.write_bytes(b"old")
+
+    method = file_copy.copy_file(source, target, ("hardlink",))
+
+    assert method == "hardlink"
+    assert os.path.samefile(source, target)
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".part"] == []
+
+
+@pytest.mark.parametrize("method", ["copy_file_range", "copy2"])
+def test_copy_file_copies_data_and_mtime(source, tmp_path, method):
+    target = tmp_path / "001.jpg"
+    if method == "copy_file_range" and not hasattr(os, "copy_file_range"):
+        pytest.skip("copy_file_range есть только в Linux")
+
+    assert file_copy.copy_file(source, target, (method,)) == method
+
+    assert target.read_bytes() == source.read_bytes()
+    assert not os.path.samefile(source, target)
+    assert target.stat().st_mtime == source.stat().st_mtime
+
+
+def test_copy_file_range_short_copy_falls_back(source, tmp_path, mocker):
+    """Тест: если copy_file_range скопировал не все, файл копируется заново."""
+    mocker.patch.object(file_copy.os, "copy_file_range", return_value=0, create=True)
+    target = tmp_path / "001.jpg"
+
+    method = file_copy.copy_file(source, target, ("copy_file_range", "copy2"))
+
+    assert method == "copy2"
+    assert target.read_bytes() == source.read_bytes()
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".part"] == []
+
+
+def test_copy_file_falls_back_and_remembers_unsupported(source, tmp_path, mocker):
+    """Тест: неподдерживаемый способ пропускается и больше не пробуется."""
+    failing = mocker.Mock(side_effect=OSError(errno.EXDEV, "cross-device"))
+    mocker.patch.dict(file_copy._METHODS, {"reflink": failing})
+    spy_copy2 = mocker.spy(file_copy.shutil, "copy2")
+
+    for name in ("001.jpg", "002.jpg"):
+        method = file_copy.copy_file(source, tmp_path / name, ("reflink", "copy2"))
+        assert method == "copy2"
+
+    failing.assert_called_once()
+    assert spy_copy2.call_count == 2
+    assert (tmp_path / "002.jpg").read_bytes() == source.read_bytes()
+
+
+def test_copy_file_retries_after_other_errors(source, tmp_path, mocker):
+    """Тест: случайная ошибка не отключает способ для следующих файлов."""
+    failing = mocker.Mock(side_effect=OSError(errno.EIO, "I/O error"))
+    mocker.patch.dict(file_copy._METHODS, {"hardlink": failing})
+
+    for name in ("001.jpg", "002.jpg"):
+        assert file_copy.copy_file(source, tmp_path / name, ("hardlink",)) == "copy2"
+
+    assert failing.call_count == 2
+
+
+def test_copy_file_missing_source(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        file_copy.copy_file(tmp_path / "missing.jpg", tmp_path / "001.jpg")
+
+
+def test_copy_file_unknown_method(source, tmp_path):
+    with pytest.raises(ValueError, match="Неизвестный способ копирования: rsync"):
+        file_copy.copy_file(source, tmp_path / "001.jpg", ("rsync",))
+
+
+def test_copy_file_default_methods(source, tmp_path):
+    """Тест: способы из config, первым срабатывает поддерживаемый."""
+    target = tmp_path / "001.jpg"
+
+    method = file_copy.copy_file(source, target)
+
+    assert method in config.COPY_METHODS
+    assert "hardlink" not in config.COPY_METHODS  # Общий файл только по выбору
+    assert target.read_bytes() == source.read_bytes()
+    assert not os.path.samefile(source, target)
@@ -1,4 +1,5 @@
 # tests/test_image_processing.py
+import json
 import logging
 from pathlib import Path
 import shutil
@@ -9,14 +10,35 @@ from unittest.mock import (
     call,
 )  # ANY поможет проверять вызовы с динамическими аргументами
 
-from PIL import Image  # Нужен для моков и проверки типов
+from PIL import Image, ImageChops  # Нужен для моков и проверки типов
+from PIL.JpegImagePlugin import JpegImageFile
 import pytest
 
+from src import config, encoders, utils
+
 # Импортируем тестируемую функцию
-from src.image_processing import process_images_in_folders
+from src.image_processing import (
+    DEFAULT_RESIZE,
+    ResizeStrategy,
+    SpreadJob,
+    StripMode,
+    compose_spread,
+    create_contact_sheets,
+    load_thumbnail,
+    plan_spread_jobs,
+    process_images_in_folders,
+    resize_strategy_from_config,
+    spread_mode,
+)
 
 
 # --- Фикстуры для моков ---
+@pytest.fixture(autouse=True)
+def no_jpegtran(mocker):
+    """Склейка через jpegtran проверяется в test_jpeg_join.py."""
+    mocker.patch("src.image_processing.jpeg_join.find_jpegtran", return_value=None)
+
+
 @pytest.fixture
 def mock_config():
     """Фикстура для мока модуля config."""
@@ -24,6 +46,15 @@ def mock_config():
     config.IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
     config.DEFAULT_ASPECT_RATIO_THRESHOLD = 1.2  # Пример значения
     config.JPEG_QUALITY = 85  # Пример значения
+    config.OUTPUT_FORMAT = "jpeg"
+    config.OUTPUT_PRESET = "balanced"
+    config.SPREAD_TARGET_HEIGHT = "max"
+    config.RESIZE_FILTER = "lanczos"
+    config.RESIZE_REDUCING_GAP = 2.0
+    config.COMPOSE_LOW_MEMORY_PIXELS = 0
+    config.COMPOSE_STRIP_HEIGHT = 256
+    config.COPY_METHODS = ("copy2",)
+    config.INCREMENTAL_PROCESSING = False
     return config
 
 
@@ -163,14 +194,13 @@ def test_process_images_success_copy_and_merge(
     mocker.patch("src.image_processing.Path", side_effect=path_side_effect)
 
     # 2. Мокаем os/shutil/PIL
-    mock_shutil_copy = mocker.patch("src.image_processing.shutil.copy2")
+    mock_shutil_copy = mocker.patch("src.file_copy.shutil.copy2")
     mock_image_open = mocker.patch(
         "src.image_processing.Image.open", return_value=mock_pil_image
     )
     mock_image_new = mocker.patch(
         "src.image_processing.Image.new", return_value=mock_pil_image
     )  # Image.new тоже возвращает Image
-    mocker.patch("src.image_processing.time.sleep")  # Убираем задержку
 
     # 3. Настройка mock_utils
     def get_page_number_side_effect(filename):
@@ -281,16 +311,13 @@ def test_process_images_success_copy_and_merge(
     mock_image_open.assert_any_call(mock_iterdir_results[2])  # 002_page.jpg
 
     assert mock_img1.resize.call_count == 1
-    assert mock_img2.resize.call_count == 1
     target_height = 1210
     w1_final = int(800 * (target_height / 1200))
     w2_final = 810
     mock_img1.resize.assert_called_with(
         (w1_final, target_height), Image.Resampling.LANCZOS
     )
-    mock_img2.resize.assert_called_with(
-        (w2_final, target_height), Image.Resampling.LANCZOS
-    )
+    mock_img2.resize.assert_not_called()  # Уже нужной высоты
 
     mock_image_new.assert_called_once_with(
         "RGB", (w1_final + w2_final, target_height), (255, 255, 255)
@@ -394,8 +421,6 @@ def test_process_images_input_not_found(
 
     mocker.patch("src.image_processing.Path", side_effect=path_side_effect)
 
-    mocker.patch("src.image_processing.time.sleep")
-
     result = process_images_in_folders(
         str(input_dir),
         str(output_dir),
@@ -452,8 +477,6 @@ def test_process_images_output_creation_error(
 
     mocker.patch("src.image_processing.Path", side_effect=path_side_effect)
 
-    mocker.patch("src.image_processing.time.sleep")
-
     result = process_images_in_folders(
         str(input_dir),
         str(output_dir),
@@ -513,7 +536,6 @@ def test_process_images_no_numbered_files(
     mocker.patch("src.image_processing.Path", side_effect=path_side_effect)
 
     mock_utils.get_page_number.return_value = -1
-    mocker.patch("src.image_processing.time.sleep")
 
     result = process_images_in_folders(
         str(input_dir),
@@ -578,8 +600,7 @@ def test_process_images_stop_event_triggered(
 
     mocker.patch("src.image_processing.Path", side_effect=path_side_effect)
 
-    mock_shutil_copy = mocker.patch("src.image_processing.shutil.copy2")
-    mocker.patch("src.image_processing.time.sleep")
+    mock_shutil_copy = mocker.patch("src.file_copy.shutil.copy2")
 
     def get_page_number_side_effect(filename):
         if "000" in filename:
@@ -666,9 +687,8 @@ def test_process_images_copy_error(
     mocker.patch("src.image_processing.Path", side_effect=path_side_effect)
 
     mock_shutil_copy = mocker.patch(
-        "src.image_processing.shutil.copy2", side_effect=shutil.Error("Disk full")
+        "src.file_copy.shutil.copy2", side_effect=shutil.Error("Disk full")
     )
-    mocker.patch("src.image_processing.time.sleep")
 
     mock_utils.get_page_number.return_value = 0
 
@@ -739,7 +759,7 @@ def test_process_images_merge_error(
 
     mocker.patch("src.image_processing.Path", side_effect=path_side_effect)
 
-    mock_shutil_copy = mocker.patch("src.image_processing.shutil.copy2")
+    mock_shutil_copy = mocker.patch("src.file_copy.shutil.copy2")
     mock_image_open = mocker.patch(
         "src.image_processing.Image.open", return_value=mock_pil_image
     )
@@ -747,7 +767,6 @@ def test_process_images_merge_error(
         "src.image_processing.Image.new", return_value=mock_pil_image
     )
     mock_pil_image.save.side_effect = OSError("Cannot save file")
-    mocker.patch("src.image_processing.time.sleep")
 
     mock_utils.get_page_number.side_effect = (
         lambda f: 0 if "000" in f else (1 if "001" in f else (2 if "002" in f else -1))
@@ -832,8 +851,7 @@ def test_process_images_cover_followed_by_spread(
 
     mocker.patch("src.image_processing.Path", side_effect=path_side_effect)
 
-    mock_shutil_copy = mocker.patch("src.image_processing.shutil.copy2")
-    mocker.patch("src.image_processing.time.sleep")
+    mock_shutil_copy = mocker.patch("src.file_copy.shutil.copy2")
 
     mock_utils.get_page_number.side_effect = (
         lambda f: 0 if "000" in f else (1 if "001" in f else -1)
@@ -923,8 +941,7 @@ def test_process_images_single_page_before_spread(
 
     mocker.patch("src.image_processing.Path", side_effect=path_side_effect)
 
-    mock_shutil_copy = mocker.patch("src.image_processing.shutil.copy2")
-    mocker.patch("src.image_processing.time.sleep")
+    mock_shutil_copy = mocker.patch("src.file_copy.shutil.copy2")
 
     mock_utils.get_page_number.side_effect = (
         lambda f: 0 if "000" in f else (1 if "001" in f else (2 if "002" in f else -1))
@@ -1027,7 +1044,6 @@ def test_process_images_iterdir_os_error(
             return Path(x)
 
     mocker.patch("src.image_processing.Path", side_effect=path_side_effect)
-    mocker.patch("src.image_processing.time.sleep")
 
     result = process_images_in_folders(
         str(input_dir),
@@ -1105,9 +1121,8 @@ def test_process_images_copy_error_single_before_spread(
         pass
 
     mock_shutil_copy = mocker.patch(
-        "src.image_processing.shutil.copy2", side_effect=copy2_side_effect
+        "src.file_copy.shutil.copy2", side_effect=copy2_side_effect
     )
-    mocker.patch("src.image_processing.time.sleep")
 
     mock_utils.get_page_number.side_effect = (
         lambda f: 0 if "000" in f else (1 if "001" in f else (2 if "002" in f else -1))
@@ -1204,7 +1219,7 @@ def test_process_images_copy_error_last_single(
         pass
 
     mock_shutil_copy = mocker.patch(
-        "src.image_processing.shutil.copy2", side_effect=copy2_side_effect
+        "src.file_copy.shutil.copy2", side_effect=copy2_side_effect
     )
     mock_image_open = mocker.patch(
         "src.image_processing.Image.open", return_value=mock_pil_image
@@ -1212,7 +1227,6 @@ def test_process_images_copy_error_last_single(
     mock_image_new = mocker.patch(
         "src.image_processing.Image.new", return_value=mock_pil_image
     )
-    mocker.patch("src.image_processing.time.sleep")
 
     mock_utils.get_page_number.side_effect = (
         lambda f: 0
@@ -1259,3 +1273,374 @@ def test_process_images_copy_error_last_single(
     mock_progress_callback.assert_has_calls(
         [call(0, 4), call(1, 4), call(3, 4), call(4, 4)]
     )
+
+
+# --- Тесты параллельной обработки ---
+
+
+def test_plan_spread_jobs(tmp_path, mock_config, mock_utils):
+    """Тест: планирование повторяет правила последовательного режима."""
+    files = [tmp_path / f"{i:03d}.jpg" for i in range(6)]
+    mock_utils.get_page_number.side_effect = lambda name: int(name[:3])
+    # 002 - готовый разворот, поэтому 001 копируется одна
+    mock_utils.is_likely_spread.side_effect = lambda path, _: path.name == "002.jpg"
+
+    jobs = plan_spread_jobs(files, tmp_path / "out", mock_config, mock_utils)
+
+    assert [(len(j.sources), j.output_file_path.name, j.next_index) for j in jobs] == [
+        (1, "000.jpg", 1),
+        (1, "001.jpg", 2),
+        (1, "002.jpg", 3),
+        (2, "003-004.jpg", 5),
+        (1, "005.jpg", 6),
+    ]
+    assert jobs[0] == SpreadJob(
+        (files[0],),
+        tmp_path / "out" / "000.jpg",
+        "Копирую обложку: 000.jpg -> 000.jpg",
+        1,
+    )
+    assert jobs[1].status_message == (
+        "Копирую одиночную страницу (следующий - разворот): 001.jpg -> 001.jpg"
+    )
+    assert jobs[2].status_message == "Копирую готовый разворот: 002.jpg -> 002.jpg"
+    assert jobs[4].status_message == (
+        "Копирую последнюю одиночную страницу: 005.jpg -> 005.jpg"
+    )
+
+
+def _make_pages(folder, sizes):
+    folder.mkdir()
+    for i, size in enumerate(sizes):
+        Image.new("RGB", size, (i * 40, 0, 0)).save(folder / f"page_{i:03d}.jpg")
+
+
+def test_process_images_parallel_matches_serial(tmp_path, mock_logger):
+    """Тест: пул процессов дает те же файлы, что и последовательный режим."""
+    _make_pages(
+        tmp_path / "pages", [(60, 100), (60, 100), (50, 80), (200, 100), (60, 100)]
+    )
+    results = {}
+    for workers in (1, 2):
+        output_dir = tmp_path / f"out_{workers}"
+        progress = MagicMock()
+        result = process_images_in_folders(
+            str(tmp_path / "pages"),
+            str(output_dir),
+            MagicMock(),
+            progress,
+            MagicMock(is_set=MagicMock(return_value=False)),
+            config,
+            utils,
+            mock_logger,
+            workers=workers,
+        )
+        sizes = {}
+        for path in sorted(output_dir.glob("*.jpg")):
+            with Image.open(path) as img:
+                sizes[path.name] = img.size
+        results[workers] = (result, sizes, progress.call_args_list)
+
+    assert results[2] == results[1]
+    assert results[2][0] == (5, 1)
+    assert results[2][1]["001-002.jpg"] == (60 + 62, 100)
+    assert [c[0][0] for c in results[2][2]] == [0, 1, 3, 4, 5]
+
+
+def test_process_images_serial_does_not_sleep(tmp_path, mock_logger, mocker):
+    """Тест: последовательный цикл не делает пауз между страницами."""
+    mock_sleep = mocker.patch("time.sleep")
+    _make_pages(tmp_path / "pages", [(60, 100)] * 5)
+
+    result = process_images_in_folders(
+        str(tmp_path / "pages"),
+        str(tmp_path / "out"),
+        MagicMock(),
+        MagicMock(),
+        MagicMock(is_set=MagicMock(return_value=False)),
+        config,
+        utils,
+        mock_logger,
+        workers=1,
+    )
+
+    assert result == (5, 2)
+    mock_sleep.assert_not_called()
+
+
+def test_process_images_parallel_stop(tmp_path, mock_logger, mock_status_callback):
+    """Тест: по сигналу СТОП оставшиеся задания не выполняются."""
+    _make_pages(tmp_path / "pages", [(60, 100)] * 6)
+    stop_event = MagicMock()
+    stop_event.is_set.return_value = True
+
+    result = process_images_in_folders(
+        str(tmp_path / "pages"),
+        str(tmp_path / "out"),
+        mock_status_callback,
+        MagicMock(),
+        stop_event,
+        config,
+        utils,
+        mock_logger,
+        workers=2,
+    )
+
+    assert result == (0, 0)
+    mock_status_callback.assert_any_call("--- Обработка прервана пользователем ---")
+
+
+def test_process_images_parallel_reports_errors(
+    tmp_path, mock_logger, mock_status_callback
+):
+    """Тест: ошибка склейки не останавливает остальные задания."""
+    _make_pages(tmp_path / "pages", [(60, 100)] * 4)
+    (tmp_path / "pages" / "page_002.jpg").write_bytes(b"not an image")
+
+    result = process_images_in_folders(
+        str(tmp_path / "pages"),
+        str(tmp_path / "out"),
+        mock_status_callback,
+        MagicMock(),
+        MagicMock(is_set=MagicMock(return_value=False)),
+        config,
+        utils,
+        mock_logger,
+        workers=2,
+    )
+
+    assert result == (4, 0)
+    assert sorted(p.name for p in (tmp_path / "out").glob("*.jpg")) == [
+        "000.jpg",
+        "003.jpg",
+    ]
+    assert any(
+        "Ошибка при создании разворота для page_001.jpg и page_002.jpg" in c[0][0]
+        for c in mock_status_callback.call_args_list
+    )
+
+
+def test_load_thumbnail_uses_draft(tmp_path, mocker):
+    """Тест: JPEG декодируется в уменьшенном масштабе, миниатюра вписана в рамку."""
+    page = tmp_path / "page_001.jpg"
+    Image.new("RGB", (800, 1200), (10, 200, 10)).save(page, "JPEG")
+    spy_draft = mocker.spy(JpegImageFile, "draft")
+
+    thumb = load_thumbnail(page, (100, 150))
+
+    assert thumb.size == (100, 150)
+    assert thumb.mode == "RGB"
+    # Первый вызов - наш: декодер переключен на масштаб 1/8 (800x1200 -> 100x150)
+    assert spy_draft.call_args_list[0][0][2] == (100, 150)
+    assert spy_draft.spy_return_list[0] is not None
+
+
+def test_create_contact_sheets(tmp_path, mock_logger, mock_status_callback):
+    """Тест: листы миниатюр в порядке страниц, битая страница не мешает."""
+    _make_pages(tmp_path / "pages", [(60, 100)] * 4 + [(200, 100)])
+    (tmp_path / "pages" / "page_005.jpg").write_bytes(b"not an image")
+    sheets_config = types.SimpleNamespace(
+        IMAGE_EXTENSIONS=config.IMAGE_EXTENSIONS,
+        CONTACT_SHEET_THUMB_SIZE=(40, 50),
+        CONTACT_SHEET_COLUMNS=2,
+        CONTACT_SHEET_ROWS=2,
+        CONTACT_SHEET_QUALITY=80,
+    )
+    stop_event = MagicMock(is_set=MagicMock(return_value=False))
+
+    sheets = create_contact_sheets(
+        str(tmp_path / "pages"),
+        str(tmp_path / "preview"),
+        mock_status_callback,
+        stop_event,
+        sheets_config,
+        utils,
+        mock_logger,
+    )
+
+    assert [path.name for path in sheets] == [
+        "contact_sheet_001.jpg",
+        "contact_sheet_002.jpg",
+    ]
+    with Image.open(sheets[0]) as first, Image.open(sheets[1]) as second:
+        assert first.size == (2 * 48 + 8, 2 * 66 + 8)
+        assert second.size == (2 * 48 + 8, 66 + 8)  # Две страницы - одна строка
+    mock_logger.warning.assert_called_once()  # page_005.jpg не читается
+
+
+def test_compose_spread_min_height_uses_draft(tmp_path, mock_logger, mocker):
+    """Тест: при сильном уменьшении JPEG декодируется в уменьшенном масштабе."""
+    left, right = tmp_path / "page_001.jpg", tmp_path / "page_002.jpg"
+    Image.new("RGB", (400, 1500), (200, 0, 0)).save(left, "JPEG")
+    Image.new("RGB", (200, 400), (0, 0, 200)).save(right, "JPEG")
+    spy_draft = mocker.spy(JpegImageFile, "draft")
+    spy_resize = mocker.spy(Image.Image, "resize")
+    output = tmp_path / "001-002.jpg"
+
+    timings = compose_spread(
+        left,
+        right,
+        output,
+        90,
+        mock_logger,
+        resize=ResizeStrategy("min", Image.Resampling.BICUBIC, 2.0),
+    )
+
+    spy_draft.assert_called_once()
+    assert spy_draft.call_args[0][2] == (106, 400)
+    # Масштабируется только левая страница, из копии 1/2 (200x750)
+    spy_resize.assert_called_once()
+    assert spy_resize.call_args[0][0].size == (200, 750)
+    with Image.open(output) as spread:
+        assert spread.size == (106 + 200, 400)
+    assert min(timings) >= 0
+
+
+@pytest.mark.parametrize(
+    "resize_filter, preset, expected",
+    [
+        ("lanczos", "fast", Image.Resampling.LANCZOS),
+        ("auto", "fast", Image.Resampling.BILINEAR),
+        ("auto", "balanced", Image.Resampling.BICUBIC),
+    ],
+)
+def test_resize_strategy_from_config(mock_config, resize_filter, preset, expected):
+    mock_config.RESIZE_FILTER = resize_filter
+    mock_config.OUTPUT_PRESET = preset
+    assert resize_strategy_from_config(mock_config) == ResizeStrategy(
+        "max", expected, 2.0
+    )
+    assert resize_strategy_from_config(config) == DEFAULT_RESIZE
+
+    mock_config.RESIZE_FILTER = "nearest"
+    with pytest.raises(ValueError, match="фильтр"):
+        resize_strategy_from_config(mock_config)
+
+
+@pytest.mark.parametrize("target", ["max", "min"])
+def test_compose_spread_strips_match_full_compose(tmp_path, mock_logger, target):
+    """Тест: склейка полосами дает тот же разворот, что и целиком."""
+    left, right = tmp_path / "page_001.png", tmp_path / "page_002.jpg"
+    Image.radial_gradient("L").resize((300, 500)).convert("RGB").save(left)
+    Image.linear_gradient("L").resize((280, 450)).save(right, "JPEG")
+    png = encoders.OutputEncoder("png", "PNG", ".png", {})
+    resize = ResizeStrategy(target, Image.Resampling.LANCZOS, 2.0)
+    outputs = {}
+    for name, strips in (("full", None), ("strips", StripMode(1, 64))):
+        outputs[name] = tmp_path / f"{name}.png"
+        compose_spread(
+            left, right, outputs[name], 90, mock_logger, None, png, resize, strips
+        )
+
+    with Image.open(outputs["full"]) as full, Image.open(outputs["strips"]) as bands:
+        assert bands.size == full.size
+        extrema = ImageChops.difference(full, bands).getextrema()
+        assert max(high for _, high in extrema) <= 1
+    mock_logger.debug.assert_any_call(
+        f"    Composing {full.width}x{full.height} RGB in strips of 64 rows"
+    )
+
+
+@pytest.mark.parametrize(
+    "modes, expected",
+    [(("L", "L"), "L"), (("L", "1"), "L"), (("L", "RGB"), "RGB"), (("P", "L"), "RGB")],
+)
+def test_spread_mode(modes, expected):
+    assert spread_mode(*modes) == expected
+
+
+def test_compose_spread_grayscale_pages_without_conversion(
+    tmp_path, mock_logger, mocker
+):
+    """Тест: серые страницы дают серый разворот без копий в другом режиме."""
+    left, right = tmp_path / "page_001.jpg", tmp_path / "page_002.jpg"
+    Image.new("L", (40, 60), 30).save(left)
+    Image.new("L", (50, 60), 220).save(right)
+    spy_convert = mocker.spy(Image.Image, "convert")
+    output = tmp_path / "001-002.jpg"
+
+    compose_spread(left, right, output, 90, mock_logger)
+
+    spy_convert.assert_not_called()
+    with Image.open(output) as spread:
+        assert (spread.mode, spread.size) == ("L", (90, 60))
+        assert spread.getpixel((10, 10)) < 40 < 200 < spread.getpixel((80, 10))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_process_images_incremental_rerun(
+    tmp_path, mock_logger, mock_status_callback, workers
+):
+    """Тест: повторный запуск пересобирает только разворот с измененной страницей."""
+    _make_pages(tmp_path / "pages", [(60, 100)] * 5)
+    output_dir = tmp_path / "out"
+
+    def run(rebuild=False):
+        return process_images_in_folders(
+            str(tmp_path / "pages"),
+            str(output_dir),
+            mock_status_callback,
+            MagicMock(),
+            MagicMock(is_set=MagicMock(return_value=False)),
+            config,
+            utils,
+            mock_logger,
+            workers=workers,
+            rebuild=rebuild,
+        )
+
+    assert run() == (5, 2)
+    unchanged_mtime = (output_dir / "001-002.jpg").stat().st_mtime_ns
+    Image.new("RGB", (60, 100), "blue").save(tmp_path / "pages" / "page_004.jpg")
+
+    assert run() == (5, 1)
+    mock_status_callback.assert_called_with(
+        "Обработка завершена. Обработано/скопировано: 5. Создано разворотов: 1."
+        " Без изменений: 2."
+    )
+    assert (output_dir / "001-002.jpg").stat().st_mtime_ns == unchanged_mtime
+    with Image.open(output_dir / "003-004.jpg") as spread:
+        assert spread.getpixel((90, 50))[2] > 200
+
+    assert run() == (5, 0)
+    assert run(rebuild=True) == (5, 2)
+
+
+def test_process_images_removes_outputs_of_old_pairing(
+    tmp_path, mock_logger, mock_status_callback
+):
+    """Тест: после смены раскладки страниц старые развороты удаляются."""
+    _make_pages(tmp_path / "pages", [(60, 100)] * 5)
+    output_dir = tmp_path / "out"
+
+    def run():
+        return process_images_in_folders(
+            str(tmp_path / "pages"),
+            str(output_dir),
+            mock_status_callback,
+            MagicMock(),
+            MagicMock(is_set=MagicMock(return_value=False)),
+            config,
+            utils,
+            mock_logger,
+        )
+
+    run()
+    assert sorted(p.name for p in output_dir.glob("*.jpg")) == [
+        "000.jpg",
+        "001-002.jpg",
+        "003-004.jpg",
+    ]
+    # Страница 1 стала разворотом: пары сдвигаются
+    Image.new("RGB", (200, 100), "blue").save(tmp_path / "pages" / "page_001.jpg")
+
+    run()
+
+    assert sorted(p.name for p in output_dir.glob("*.jpg")) == [
+        "000.jpg",
+        "001.jpg",
+        "002-003.jpg",
+        "004.jpg",
+    ]
+    record = json.loads((output_dir / config.BUILD_RECORD_FILE).read_text("utf-8"))
+    assert sorted(record["outputs"]) == ["000.jpg", "001.jpg", "002-003.jpg", "004.jpg"]
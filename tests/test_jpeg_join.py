@@ -0,0 +1,153 @@
+# tests/test_jpeg_join.py
+import shutil
+import subprocess
+from unittest.mock import MagicMock
+
+from PIL import Image, ImageChops
+import pytest
+
+from src import image_processing, jpeg_join
+
+
+def _save_jpeg(path, size, color=(200, 30, 30), **params):
+    Image.new("RGB", size, color).save(path, "JPEG", quality=90, **params)
+    return path
+
+
+@pytest.fixture
+def pages(tmp_path):
+    """Две совместимые страницы: ширина левой кратна MCU (16 для 4:2:0)."""
+    left = _save_jpeg(tmp_path / "page_001.jpg", (64, 48))
+    right = _save_jpeg(tmp_path / "page_002.jpg", (40, 48), (30, 30, 200))
+    return left, right
+
+
+def _fake_jpegtran(args, **kwargs):
+    """Имитирует jpegtran: -crop расширяет холст, -drop вставляет картинку."""
+    options = args[1:]
+    output = options[options.index("-outfile") + 1]
+    with Image.open(options[-1]) as source:
+        if "-crop" in options:
+            width, height = map(
+                int, options[options.index("-crop") + 1][:-4].split("x")
+            )
+            result = Image.new(source.mode, (width, height))
+            result.paste(source, (0, 0))
+        else:
+            x = int(options[options.index("-drop") + 1].split("+")[1])
+            result = source.copy()
+            with Image.open(options[options.index("-drop") + 2]) as dropped:
+                result.paste(dropped, (x, 0))
+    result.save(output, "JPEG", quality=90)
+    return subprocess.CompletedProcess(args, 0, b"", b"")
+
+
+def test_find_jpegtran(mocker):
+    mocker.patch("src.jpeg_join.config.JPEG_LOSSLESS_JOIN", True)
+    mocker.patch("src.jpeg_join.config.JPEGTRAN_PATH", "")
+    mocker.patch("src.jpeg_join.shutil.which", return_value="/usr/bin/jpegtran")
+    assert jpeg_join.find_jpegtran() == "/usr/bin/jpegtran"
+
+    mocker.patch("src.jpeg_join.config.JPEGTRAN_PATH", "C:/tools/jpegtran.exe")
+    assert jpeg_join.find_jpegtran() == "C:/tools/jpegtran.exe"
+
+    mocker.patch("src.jpeg_join.config.JPEG_LOSSLESS_JOIN", False)
+    assert jpeg_join.find_jpegtran() is None
+
+
+def test_read_jpeg_layout(tmp_path, pages):
+    layout = jpeg_join.read_jpeg_layout(pages[0])
+    assert (layout.width, layout.height, layout.mode) == (64, 48, "RGB")
+    assert layout.sampling == ((2, 2), (1, 1), (1, 1))
+
+    progressive = _save_jpeg(tmp_path / "p.jpg", (64, 48), progressive=True)
+    assert jpeg_join.read_jpeg_layout(progressive) is None
+    png = tmp_path / "page.png"
+    Image.new("RGB", (10, 10)).save(png)
+    assert jpeg_join.read_jpeg_layout(png) is None
+
+
+@pytest.mark.parametrize(
+    "left_size, right_size, right_params, expected",
+    [
+        ((64, 48), (40, 48), {}, True),
+        ((60, 48), (40, 48), {}, False),  # Левая не кратна ширине MCU
+        ((64, 48), (40, 50), {}, False),  # Разная высота
+        ((64, 48), (40, 48), {"subsampling": 0}, False),  # Другое прореживание
+        ((64, 48), (40, 48), {"qtables": "web_low"}, False),  # Другие таблицы
+    ],
+)
+def test_can_join_losslessly(tmp_path, left_size, right_size, right_params, expected):
+    left = _save_jpeg(tmp_path / "l.jpg", left_size)
+    right = _save_jpeg(tmp_path / "r.jpg", right_size, **right_params)
+    assert (
+        jpeg_join.can_join_losslessly(
+            jpeg_join.read_jpeg_layout(left), jpeg_join.read_jpeg_layout(right)
+        )
+        is expected
+    )
+
+
+def test_join_losslessly_runs_crop_and_drop(tmp_path, pages, mocker):
+    """Тест: холст расширяется до ширины разворота, затем вставляется правая."""
+    mock_run = mocker.patch("src.jpeg_join.subprocess.run", side_effect=_fake_jpegtran)
+    output = tmp_path / "001-002.jpg"
+
+    assert jpeg_join.join_losslessly(*pages, output, "jpegtran") is True
+
+    crop_args, drop_args = (c[0][0] for c in mock_run.call_args_list)
+    assert crop_args[crop_args.index("-crop") + 1] == "104x48+0+0"
+    assert drop_args[drop_args.index("-drop") + 1 :][:2] == ["+64+0", str(pages[1])]
+    with Image.open(output) as spread:
+        assert spread.size == (104, 48)
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_join_losslessly_tool_error(tmp_path, pages, mocker):
+    """Тест: ошибка jpegtran - False и никаких временных файлов."""
+    mocker.patch(
+        "src.jpeg_join.subprocess.run",
+        side_effect=subprocess.CalledProcessError(1, "jpegtran", stderr=b"usage"),
+    )
+    output = tmp_path / "001-002.jpg"
+
+    assert jpeg_join.join_losslessly(*pages, output, "jpegtran") is False
+    assert not output.exists()
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_join_losslessly_skips_incompatible(tmp_path, mocker):
+    mock_run = mocker.patch("src.jpeg_join.subprocess.run")
+    left = _save_jpeg(tmp_path / "l.jpg", (64, 48))
+    right = _save_jpeg(tmp_path / "r.jpg", (40, 60))
+
+    assert not jpeg_join.join_losslessly(left, right, tmp_path / "o.jpg", "jpegtran")
+    mock_run.assert_not_called()
+
+
+def test_compose_spread_prefers_lossless_join(tmp_path, pages, mocker):
+    """Тест: при удачной склейке jpegtran Pillow не перекодирует страницы."""
+    mocker.patch("src.image_processing.jpeg_join.join_losslessly", return_value=True)
+    mock_new = mocker.patch("src.image_processing.Image.new")
+
+    image_processing.compose_spread(
+        *pages, tmp_path / "001-002.jpg", 95, MagicMock(), "jpegtran"
+    )
+
+    mock_new.assert_not_called()
+
+
+@pytest.mark.skipif(shutil.which("jpegtran") is None, reason="jpegtran не найден")
+def test_join_losslessly_real_jpegtran(tmp_path, pages):
+    """Тест: настоящий jpegtran дает разворот с исходными пикселями."""
+    output = tmp_path / "001-002.jpg"
+    if not jpeg_join.join_losslessly(*pages, output, shutil.which("jpegtran")):
+        pytest.skip("jpegtran без поддержки -crop с расширением и -drop")
+
+    with Image.open(output) as spread, Image.open(pages[0]) as left:
+        assert spread.size == (104, 48)
+        # Край у стыка не сравниваем: сглаживание цветности берет соседей
+        box = (0, 0, 56, 48)
+        left_part = spread.crop(box).convert("RGB")
+        original = left.crop(box).convert("RGB")
+        assert ImageChops.difference(left_part, original).getbbox() is None
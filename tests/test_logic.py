@@ -1,4 +1,5 @@
 # tests/test_logic.py
+import hashlib
 import logging
 from pathlib import Path
 import threading
@@ -12,7 +13,8 @@ from requests.adapters import HTTPAdapter
 from requests.cookies import RequestsCookieJar
 from urllib3.util.retry import Retry
 
-from src import config, logic, utils
+from src import config, logic, manifest, utils
+from src.page_cache import PageCache
 from src.types import ProgressCallback, StatusCallback
 
 
@@ -32,6 +34,7 @@ def library_handler(mock_callbacks, mocker):
     """Фикстура для создания экземпляра LibraryHandler с моками."""
     mocker.patch("src.logic.logger", MagicMock(spec=logging.Logger))
     mock_callbacks["stop_event"].is_set.return_value = False
+    mock_callbacks["stop_event"].wait.return_value = False  # Ожидание лимитера
     handler = logic.LibraryHandler(
         status_callback=mock_callbacks["status_callback"],
         progress_callback=mock_callbacks["progress_callback"],
@@ -52,7 +55,7 @@ def mock_session(mocker):
 
     mock_response = mocker.MagicMock(spec=requests.Response)
     mock_response.status_code = 200
-    mock_response.content = b"fake image data"
+    mock_response.iter_content.return_value = [b"fake image data"]
     mock_response.headers = {"Content-Type": "image/jpeg"}
     mock_response.raise_for_status = mocker.MagicMock()
     mock_sess.get.return_value = mock_response
@@ -65,14 +68,14 @@ def mock_session(mocker):
 
 @pytest.fixture
 def mock_path(mocker):
-    """Фикстура для мока pathlib.Path (без мока open)."""
+    """Фикстура для мока pathlib.Path и os.replace (без мока open)."""
     mock_p = mocker.patch("src.logic.Path", spec=Path)
     mock_instance = mocker.MagicMock(spec=Path)
     mock_instance.mkdir = mocker.MagicMock()
-    mock_stat_result = mocker.MagicMock()
-    mock_stat_result.st_size = 100  # По умолчанию файл не пустой
-    mock_instance.stat.return_value = mock_stat_result
     mock_instance.with_suffix = mocker.MagicMock(return_value=mock_instance)
+    # Временный .part-файл - тот же мок, переименование тоже мокаем
+    mock_instance.with_name = mocker.MagicMock(return_value=mock_instance)
+    mocker.patch("src.logic.os.replace")
     mock_instance.__truediv__.return_value = mock_instance
     mock_instance.name = "mock_file.jpg"
     mock_p.return_value = mock_instance
@@ -86,6 +89,45 @@ def mock_dependencies(mocker):
     mocker.patch(
         "src.logic.image_processing.process_images_in_folders", return_value=(10, 5)
     )
+    # Манифест на диск не пишем (проверяется в test_manifest.py)
+    mocker.patch("src.logic.open_manifest", spec=manifest.open_manifest)
+
+
+# --- Тесты write_stream_atomically ---
+
+
+def test_write_stream_atomically(tmp_path):
+    """Тест: куски склеиваются, временный файл переименовывается."""
+    target = tmp_path / "page_000.jpeg"
+
+    written = logic.write_stream_atomically([b"ab", b"", b"cd"], target)
+
+    assert written == 4
+    assert target.read_bytes() == b"abcd"
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_write_stream_atomically_empty(tmp_path):
+    """Тест: пустой поток не оставляет файлов."""
+    target = tmp_path / "page_000.jpeg"
+
+    assert logic.write_stream_atomically(iter([]), target) == 0
+    assert not list(tmp_path.iterdir())
+
+
+def test_write_stream_atomically_interrupted(tmp_path):
+    """Тест: при обрыве потока остается прежний файл, а .part удаляется."""
+    target = tmp_path / "page_000.jpeg"
+    target.write_bytes(b"old")
+
+    def broken():
+        yield b"new"
+        raise requests.exceptions.ChunkedEncodingError("connection reset")
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        logic.write_stream_atomically(broken(), target)
+    assert target.read_bytes() == b"old"
+    assert list(tmp_path.iterdir()) == [target]
 
 
 # --- Тесты ---
@@ -115,18 +157,24 @@ class TestLibraryHandler:
         mock_session.headers.update.assert_called_once_with(
             {"User-Agent": config.DEFAULT_USER_AGENT}
         )
+        # 503 (и 429) повторяются через лимитер, а не внутри urllib3
+        retry_statuses = [500, 502, 504]
         logic.Retry.assert_called_once_with(
             total=config.MAX_RETRIES,
-            status_forcelist=config.RETRY_ON_HTTP_CODES,
+            status_forcelist=retry_statuses,
             backoff_factor=1,
             allowed_methods=["HEAD", "GET", "OPTIONS"],
+            respect_retry_after_header=False,
+        )
+        logic.HTTPAdapter.assert_called_once_with(
+            max_retries=logic.Retry.return_value,
+            pool_maxsize=config.MAX_DOWNLOAD_WORKERS,
         )
-        logic.HTTPAdapter.assert_called_once_with(max_retries=logic.Retry.return_value)
         assert mock_session.mount.call_count == 2
         mock_session.mount.assert_any_call("https://", logic.HTTPAdapter.return_value)
         mock_session.mount.assert_any_call("http://", logic.HTTPAdapter.return_value)
         logic.logger.info.assert_called_with(
-            f"Requests session created with retry strategy (max={config.MAX_RETRIES}, statuses={config.RETRY_ON_HTTP_CODES})"
+            f"Requests session created with retry strategy (max={config.MAX_RETRIES}, statuses={retry_statuses})"
         )
 
     def test_setup_session_with_retry_existing(
@@ -324,7 +372,32 @@ class TestLibraryHandler:
         mock_file_open().write.assert_called_with(b"fake image data")
         assert mock_path.return_value.with_suffix.call_count == total_pages
         mock_path.return_value.with_suffix.assert_called_with(".jpeg")
-        assert logic.time.sleep.call_count == total_pages
+        # Страницы пишутся потоком во временный файл и атомарно переименовываются
+        mock_session.get.assert_called_with(
+            mocker.ANY, timeout=config.REQUEST_TIMEOUT, stream=True
+        )
+        mock_session.get.return_value.iter_content.assert_called_with(
+            chunk_size=config.DOWNLOAD_CHUNK_SIZE
+        )
+        mock_path.return_value.with_name.assert_called_with(
+            mock_path.return_value.name + config.PARTIAL_FILE_SUFFIX
+        )
+        assert logic.os.replace.call_count == total_pages
+        assert mock_session.get.return_value.close.call_count == total_pages
+        # Каждая страница записана в манифест с размером и контрольной суммой
+        expected_sha256 = hashlib.sha256(b"fake image data").hexdigest()
+        library_handler.manifest.mark_done.assert_called_with(
+            total_pages - 1,
+            mock_path.return_value.name,
+            len(b"fake image data"),
+            "image/jpeg",
+            expected_sha256,
+        )
+        assert library_handler.manifest.mark_done.call_count == total_pages
+        library_handler.manifest.save.assert_called_once()
+        # Фиксированной паузы больше нет, темп задает лимитер
+        logic.time.sleep.assert_not_called()
+        assert library_handler.rate_limiter.rate > config.RATE_LIMIT_INITIAL_RPS
 
     @pytest.mark.usefixtures("mock_dependencies")
     def test_download_pages_session_setup_fails(
@@ -415,28 +488,21 @@ class TestLibraryHandler:
         # Настраиваем side_effect для stop_event.is_set
         call_count = 0
         # Хотим прервать на проверке В НАЧАЛЕ цикла для i = stop_at_page (т.е. i=2)
-        # Эта проверка будет (stop_at_page * 2) + 1 = 5-м вызовом is_set()
-        target_stop_call = (stop_at_page * 2) + 1
+        # is_set() вызывается раз за итерацию, так что это 3-й вызов
+        target_stop_call = stop_at_page + 1
 
         def stop_side_effect():
             nonlocal call_count
             call_count += 1
-            return call_count >= target_stop_call  # Станет True на 5-м вызове
+            return call_count >= target_stop_call  # Станет True на 3-м вызове
 
         mock_callbacks["stop_event"].is_set.side_effect = stop_side_effect
 
-        # Настраиваем мок Path(...).stat()
-        mock_path.return_value.stat.reset_mock()
-        mock_path.return_value.stat.return_value.st_size = 100
-        mock_path.return_value.stat.side_effect = (
-            None  # Убедимся, что нет лишних side_effect
-        )
-
         # Настраиваем мок session.get
         mock_response = mocker.Mock(spec=requests.Response)  # Лучше использовать spec
         mock_response.status_code = 200
         mock_response.headers = {"Content-Type": "image/jpeg"}
-        mock_response.content = b"fakedata"
+        mock_response.iter_content.return_value = [b"fakedata"]
         mock_response.raise_for_status.return_value = None
         mock_session.get.return_value = mock_response
 
@@ -470,13 +536,73 @@ class TestLibraryHandler:
             stop_at_page, total_pages
         )
 
-        # Проверяем sleep: вызывается в finally для i=0 и i=1, т.к. is_set() там был False
-        assert mock_sleep.call_count == stop_at_page
+        # Фиксированной паузы после страниц больше нет
+        mock_sleep.assert_not_called()
+
+        # Переименование временных файлов только для i=0, i=1
+        assert logic.os.replace.call_count == stop_at_page
+
+    @pytest.mark.usefixtures("mock_dependencies")
+    def test_download_pages_concurrent_success(
+        self, library_handler, mock_session, mock_callbacks, mock_path, mocker
+    ):
+        """Тест параллельного скачивания пулом потоков."""
+        total_pages = 7
+        mock_file_open = mocker.mock_open()
+        mocker.patch("builtins.open", mock_file_open)
+        mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
+
+        success_count, total_count = library_handler.download_pages(
+            "base", "ids", "file.pdf", total_pages, "out", workers=3
+        )
 
-        # Дополнительно можно проверить вызовы Path().stat()
-        assert (
-            mock_path.return_value.stat.call_count == stop_at_page
-        )  # Вызван для i=0, i=1
+        assert (success_count, total_count) == (total_pages, total_pages)
+        assert mock_session.get.call_count == total_pages
+        requested_urls = {c[0][0] for c in mock_session.get.call_args_list}
+        assert len(requested_urls) == total_pages
+        # Имена файлов зависят только от индекса страницы
+        mock_path.return_value.__truediv__.assert_any_call("page_000")
+        mock_path.return_value.__truediv__.assert_any_call("page_006")
+        # Прогресс монотонно растет до total_pages
+        progress_values = [
+            c[0][0] for c in mock_callbacks["progress_callback"].call_args_list
+        ]
+        assert progress_values == list(range(total_pages + 1))
+        logic.time.sleep.assert_not_called()
+
+    @pytest.mark.usefixtures("mock_dependencies")
+    def test_download_pages_concurrent_stop_event(
+        self, library_handler, mock_session, mock_callbacks, mock_path, mocker
+    ):
+        """Тест: после сигнала стоп новые страницы не запрашиваются."""
+        mocker.patch("builtins.open", mocker.mock_open())
+        mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
+        mock_callbacks["stop_event"].is_set.return_value = True
+
+        success_count, total_count = library_handler.download_pages(
+            "base", "ids", "file.pdf", 5, "out", workers=4
+        )
+
+        assert (success_count, total_count) == (0, 5)
+        mock_session.get.assert_not_called()
+        mock_callbacks["status_callback"].assert_any_call(
+            "--- Скачивание прервано пользователем ---"
+        )
+
+    @pytest.mark.usefixtures("mock_dependencies")
+    def test_download_pages_workers_clamped(
+        self, library_handler, mock_session, mock_path, mocker
+    ):
+        """Тест ограничения числа потоков значением MAX_DOWNLOAD_WORKERS."""
+        mocker.patch("builtins.open", mocker.mock_open())
+        mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
+        mock_concurrent = mocker.patch.object(
+            library_handler, "_download_pages_concurrent", return_value=2
+        )
+
+        library_handler.download_pages("base", "ids", "file", 2, "out", workers=1000)
+
+        assert mock_concurrent.call_args[0][-1] == config.MAX_DOWNLOAD_WORKERS
 
     @pytest.mark.usefixtures("mock_dependencies")
     def test_download_pages_b64_encode_error(
@@ -515,9 +641,9 @@ class TestLibraryHandler:
         mock_response_ok = MagicMock(
             spec=requests.Response,
             status_code=200,
-            content=b"ok",
             headers={"Content-Type": "image/jpeg"},
         )
+        mock_response_ok.iter_content.return_value = [b"ok"]
         mock_response_ok.raise_for_status = MagicMock()
         mock_response_err = MagicMock(spec=requests.Response, status_code=404)
         http_error = requests.exceptions.HTTPError(
@@ -539,6 +665,7 @@ class TestLibraryHandler:
         # Проверяем, что файл был открыт только один раз (для успешной страницы)
         assert mock_file_open.call_count == 1
         assert mock_file_open().write.call_count == 1
+        library_handler.manifest.mark_failed.assert_called_once_with(1)
 
         mock_callbacks["status_callback"].assert_any_call(
             f"Ошибка HTTP 404 на стр. 2 (после {config.MAX_RETRIES} попыток): {http_error}"
@@ -548,6 +675,74 @@ class TestLibraryHandler:
             f"Ошибка HTTP 404 на стр. 2 (после {config.MAX_RETRIES} попыток): {http_error} URL: {failed_url}"
         )
 
+    @pytest.mark.usefixtures("mock_dependencies")
+    def test_download_pages_429_feeds_rate_limiter(
+        self, library_handler, mock_session, mock_callbacks, mock_path, mocker
+    ):
+        """Тест: 429 с Retry-After снижает скорость лимитера и ставит паузу."""
+        mocker.patch("builtins.open", mocker.mock_open())
+        mock_response_err = MagicMock(
+            spec=requests.Response, status_code=429, headers={"Retry-After": "7"}
+        )
+        mock_response_err.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            "429 Too Many Requests", response=mock_response_err
+        )
+        mock_session.get.return_value = mock_response_err
+        mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
+        mock_record = mocker.spy(library_handler.rate_limiter, "record")
+        library_handler._setup_session_with_retry()
+
+        success_count, _ = library_handler.download_pages(
+            "base", "ids", "file", 1, "out"
+        )
+
+        assert success_count == 0
+        assert mock_session.get.call_count == config.MAX_RETRIES + 1
+        mock_response_err.close.assert_called()
+        assert mock_record.call_args[0][0] == 429
+        assert mock_record.call_args[0][2] == 7.0
+        assert library_handler.rate_limiter.rate < config.RATE_LIMIT_INITIAL_RPS
+        assert library_handler.rate_limiter.reserve() > 6
+
+    @pytest.mark.usefixtures("mock_dependencies")
+    def test_download_pages_retries_after_429(
+        self, library_handler, mock_session, mock_callbacks, tmp_path, mocker
+    ):
+        """Тест: после 429 страница запрашивается снова, когда позволит лимитер."""
+        mock_response_err = MagicMock(
+            spec=requests.Response, status_code=429, headers={"Retry-After": "7"}
+        )
+        mock_response_ok = mock_session.get.return_value
+        mock_session.get.side_effect = [mock_response_err, mock_response_ok]
+        mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
+        library_handler._setup_session_with_retry()
+
+        result = library_handler.download_pages(
+            "base", "ids", "file", 1, str(tmp_path), resume=False
+        )
+
+        assert result == (1, 1)
+        assert (tmp_path / "page_000.jpeg").read_bytes() == b"fake image data"
+        mock_response_err.close.assert_called_once()
+        # Вторая попытка ждала паузу из Retry-After
+        wait = mock_callbacks["stop_event"].wait
+        assert wait.call_count == 1
+        assert wait.call_args[0][0] > 6
+
+    @pytest.mark.usefixtures("mock_dependencies")
+    def test_download_pages_network_error_feeds_rate_limiter(
+        self, library_handler, mock_session, mock_path, mocker
+    ):
+        """Тест: сетевая ошибка учитывается лимитером как перегрузка."""
+        mock_session.get.side_effect = requests.exceptions.Timeout("Timeout")
+        mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
+        mock_record = mocker.spy(library_handler.rate_limiter, "record")
+        library_handler._setup_session_with_retry()
+
+        library_handler.download_pages("base", "ids", "file", 1, "out")
+
+        assert mock_record.call_args[0][0] is None
+
     @pytest.mark.usefixtures("mock_dependencies")
     def test_download_pages_http_error_403(
         self, library_handler, mock_session, mock_callbacks, mock_path, mocker
@@ -663,6 +858,9 @@ class TestLibraryHandler:
         mock_file_open.assert_called_once_with(expected_path_object, "wb")
         # ИСПРАВЛЕНО: Проверяем write через return_value мока open
         mock_file_open.return_value.write.assert_called_once_with(b"fake image data")
+        # Недописанный временный файл удален, итоговый не создан
+        mock_path.return_value.unlink.assert_called_once()
+        logic.os.replace.assert_not_called()
 
         mock_callbacks["status_callback"].assert_any_call(
             f"Ошибка записи файла для стр. 1: {error_msg}"
@@ -677,15 +875,19 @@ class TestLibraryHandler:
     def test_download_pages_unexpected_error(
         self, library_handler, mock_session, mock_callbacks, mock_path, mocker
     ):
-        """Тест неожиданной ошибки в цикле скачивания (после записи)."""
+        """Тест неожиданной ошибки в цикле скачивания (во время записи)."""
         error_msg = "Something weird happened"
 
         # Мокаем builtins.open (он должен успешно отработать)
         mock_file_open = mocker.mock_open()
         mocker.patch("builtins.open", mock_file_open)
 
-        # Ошибка происходит при вызове stat() на объекте Path
-        mock_path.return_value.stat.side_effect = Exception(error_msg)
+        # Ошибка происходит посреди потока тела ответа
+        def broken_stream(chunk_size):
+            yield b"fake image data"
+            raise RuntimeError(error_msg)
+
+        mock_session.get.return_value.iter_content.side_effect = broken_stream
 
         mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
         library_handler._setup_session_with_retry()
@@ -702,8 +904,9 @@ class TestLibraryHandler:
         expected_path_object = mock_path.return_value
         mock_file_open.assert_called_once_with(expected_path_object, "wb")
         mock_file_open().write.assert_called_once_with(b"fake image data")
-        # Проверяем, что stat был вызван (и вызвал ошибку)
-        mock_path.return_value.stat.assert_called_once()
+        # Обрезанная страница не попала на место итогового файла
+        mock_path.return_value.unlink.assert_called_once()
+        logic.os.replace.assert_not_called()
 
         mock_callbacks["status_callback"].assert_any_call(
             f"Неожиданная ошибка на стр. 1: {error_msg}"
@@ -725,7 +928,6 @@ class TestLibraryHandler:
         mock_response = mock_session.get.return_value
         mock_response.headers = {"Content-Type": "text/html; charset=utf-8"}
         mock_response.text = "<html><body>Login page</body></html>"
-        mock_response.content = mock_response.text.encode("utf-8")
         mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
         library_handler._setup_session_with_retry()
 
@@ -752,10 +954,8 @@ class TestLibraryHandler:
         mock_file_open = mocker.mock_open()
         mocker.patch("builtins.open", mock_file_open)
 
-        # Настраиваем stat().st_size на возврат 0
-        mock_path.return_value.stat.return_value.st_size = 0
-        # Сбрасываем side_effect у stat, если он был установлен в другом тесте
-        mock_path.return_value.stat.side_effect = None
+        # Сервер вернул пустое тело
+        mock_session.get.return_value.iter_content.return_value = [b""]
 
         mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
         library_handler._setup_session_with_retry()
@@ -768,12 +968,12 @@ class TestLibraryHandler:
         assert success_count == 0
         assert total_count == 1
 
-        # Проверяем, что open и write были вызваны
+        # Временный файл открыт, но пустым не переименовывается
         expected_path_object = mock_path.return_value
         mock_file_open.assert_called_once_with(expected_path_object, "wb")
-        mock_file_open().write.assert_called_once_with(b"fake image data")
-        # Проверяем, что stat был вызван
-        mock_path.return_value.stat.assert_called_once()
+        mock_file_open().write.assert_not_called()
+        mock_path.return_value.unlink.assert_called_once()
+        logic.os.replace.assert_not_called()
 
         empty_filename = mock_path.return_value.name
         mock_callbacks["status_callback"].assert_any_call(
@@ -784,9 +984,6 @@ class TestLibraryHandler:
             f"Предупреждение: Файл {empty_filename} пустой. URL: {failed_url}"
         )
 
-        # Сбросим stat для других тестов
-        mock_path.return_value.stat.reset_mock()
-
     @pytest.mark.usefixtures("mock_dependencies")
     @pytest.mark.parametrize(
         "content_type, expected_suffix",
@@ -819,10 +1016,6 @@ class TestLibraryHandler:
 
         mock_response = mock_session.get.return_value
         mock_response.headers = {"Content-Type": content_type}
-        # Сбрасываем stat к значению по умолчанию > 0
-        mock_path.return_value.stat.return_value.st_size = 100
-        # Сбрасываем side_effect у stat
-        mock_path.return_value.stat.side_effect = None
 
         mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
         library_handler._setup_session_with_retry()
@@ -859,7 +1052,118 @@ class TestLibraryHandler:
         logic.logger.warning.reset_mock()
         mock_file_open.reset_mock()
         mock_file_open().write.reset_mock()
-        mock_path.return_value.stat.reset_mock()
+
+    def test_download_pages_resume(
+        self, library_handler, mock_session, mock_callbacks, mocker, tmp_path
+    ):
+        """Тест докачки: скачиваются только потерянные страницы."""
+        mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
+        total_pages = 4
+        assert library_handler.download_pages(
+            "base", "ids", "file.pdf", total_pages, str(tmp_path)
+        ) == (total_pages, total_pages)
+        assert (tmp_path / config.DOWNLOAD_MANIFEST_FILE).is_file()
+
+        (tmp_path / "page_002.jpeg").unlink()  # Страница потерялась
+        mock_session.get.reset_mock()
+        mock_callbacks["progress_callback"].reset_mock()
+
+        result = library_handler.download_pages(
+            "base", "ids", "file.pdf", total_pages, str(tmp_path), resume=True
+        )
+
+        assert result == (total_pages, total_pages)
+        assert mock_session.get.call_count == 1
+        assert mock_session.get.call_args[0][0] == logic.build_page_url(
+            "base/", "ids/", "file.pdf", 2
+        )
+        assert (tmp_path / "page_002.jpeg").read_bytes() == b"fake image data"
+        mock_callbacks["status_callback"].assert_any_call(
+            "Докачка: 3 из 4 страниц уже скачаны, осталось 1."
+        )
+        progress_values = [
+            c[0][0] for c in mock_callbacks["progress_callback"].call_args_list
+        ]
+        assert progress_values == [0, 3, 4]
+
+    def test_download_pages_page_done_callback(
+        self, library_handler, mock_session, mock_callbacks, mocker, tmp_path
+    ):
+        """Тест: получатель узнает о каждой странице, в том числе при докачке."""
+        mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
+        ok_response = mock_session.get.return_value
+        failed_response = MagicMock(spec=requests.Response)
+        failed_response.status_code = 404
+        failed_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            response=failed_response
+        )
+        mock_session.get.side_effect = [ok_response, failed_response, ok_response]
+        page_done = MagicMock()
+
+        assert library_handler.download_pages(
+            "base", "ids", "f.pdf", 3, str(tmp_path), page_done_callback=page_done
+        ) == (2, 3)
+        assert page_done.call_args_list == [
+            mocker.call(0, tmp_path / "page_000.jpeg"),
+            mocker.call(1, None),
+            mocker.call(2, tmp_path / "page_002.jpeg"),
+        ]
+
+        mock_session.get.side_effect = None
+        page_done.reset_mock()
+        library_handler.download_pages(
+            "base",
+            "ids",
+            "f.pdf",
+            3,
+            str(tmp_path),
+            resume=True,
+            page_done_callback=page_done,
+        )
+        # Сначала уже скачанные страницы, затем докачанная
+        assert page_done.call_args_list == [
+            mocker.call(0, tmp_path / "page_000.jpeg"),
+            mocker.call(2, tmp_path / "page_002.jpeg"),
+            mocker.call(1, tmp_path / "page_001.jpeg"),
+        ]
+        # Скорость в МБ/с считается только по реально записанным страницам
+        page_size = (tmp_path / "page_001.jpeg").stat().st_size
+        assert library_handler.downloaded_bytes == page_size
+
+    def test_download_pages_uses_page_cache(
+        self, library_handler, mock_session, mock_callbacks, mocker, tmp_path
+    ):
+        """Тест кэша: свежие страницы без запросов, устаревшие через 304."""
+        mocker.patch.object(library_handler, "_get_initial_cookies", return_value=True)
+        library_handler.page_cache = PageCache(tmp_path / "cache", max_age=3600)
+        mock_session.get.return_value.headers = {
+            "Content-Type": "image/jpeg",
+            "ETag": '"v1"',
+        }
+        library_handler.download_pages("base", "ids", "f.pdf", 2, str(tmp_path / "a"))
+        assert mock_session.get.call_count == 2
+
+        # Та же книга в другую папку - без единого запроса
+        mock_session.get.reset_mock()
+        result = library_handler.download_pages(
+            "base", "ids", "f.pdf", 2, str(tmp_path / "b")
+        )
+        assert result == (2, 2)
+        mock_session.get.assert_not_called()
+        assert (tmp_path / "b" / "page_001.jpeg").read_bytes() == b"fake image data"
+
+        # Устаревшая запись перепроверяется условным запросом
+        library_handler.page_cache.max_age = 0
+        not_modified = MagicMock(spec=requests.Response, status_code=304, headers={})
+        mock_session.get.return_value = not_modified
+        result = library_handler.download_pages(
+            "base", "ids", "f.pdf", 2, str(tmp_path / "c")
+        )
+        assert result == (2, 2)
+        assert mock_session.get.call_count == 2
+        assert mock_session.get.call_args[1]["headers"] == {"If-None-Match": '"v1"'}
+        not_modified.raise_for_status.assert_not_called()
+        assert (tmp_path / "c" / "page_000.jpeg").read_bytes() == b"fake image data"
 
     # --- Тест process_images ---
 
@@ -882,4 +1186,28 @@ class TestLibraryHandler:
             config=config,
             utils=utils,
             logger=logic.logger,
+            workers=config.PROCESSING_WORKERS,
+            rebuild=False,
         )
+
+    @pytest.mark.usefixtures("mock_dependencies")
+    def test_process_images_contact_sheet(
+        self, library_handler, mock_callbacks, mocker
+    ):
+        """Тест: после обработки создаются листы миниатюр в подпапке разворотов."""
+        mock_callbacks["stop_event"].is_set.return_value = False
+        mock_sheets = mocker.patch(
+            "src.logic.image_processing.create_contact_sheets", return_value=[]
+        )
+
+        library_handler.process_images("pages", "spreads", contact_sheet=True)
+
+        kwargs = mock_sheets.call_args.kwargs
+        assert kwargs["input_folder"] == "pages"
+        assert Path(kwargs["output_folder"]) == Path(
+            "spreads", config.CONTACT_SHEET_DIR_NAME
+        )
+
+        mock_sheets.reset_mock()
+        library_handler.process_images("pages", "spreads", contact_sheet=False)
+        mock_sheets.assert_not_called()
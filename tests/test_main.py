@@ -304,3 +304,21 @@ def test_main_exception_root_does_not_exist(patch_main_dependencies):
     assert kwargs["parent"] is None
 
     mocks["mock_shutdown"].assert_called_once()
+
+
+def test_main_reports_startup_after_first_frame(patch_main_dependencies):
+    """Тест: отчет о запуске пишется, когда окно уже нарисовано."""
+    mocks = patch_main_dependencies
+    main_module = mocks["main_module"]
+    logger_instance = mocks["mock_logger_instance"]
+
+    main_module.main()
+
+    mocks["mock_root_instance"].after_idle.assert_called_once_with(
+        main_module._report_startup
+    )
+    main_module._report_startup()
+    messages = [c[0][0] for c in logger_instance.info.call_args_list]
+    assert any(m.startswith("Startup timings: imports ") for m in messages)
+    # В процессе тестов Pillow и requests уже загружены другими тестами
+    assert any(m.startswith("Heavy modules loaded at startup: ") for m in messages)
@@ -0,0 +1,118 @@
+# tests/test_manifest.py
+import json
+import os
+
+import pytest
+
+from src import config
+from src.manifest import (
+    STATUS_DONE,
+    STATUS_FAILED,
+    DownloadManifest,
+    book_identity,
+    open_manifest,
+    read_page_hashes,
+)
+
+
+@pytest.fixture
+def book():
+    return book_identity("https://h/safe-view/", "1/2/", "book.pdf", 3)
+
+
+@pytest.fixture
+def manifest(tmp_path, book):
+    return open_manifest(tmp_path, book, resume=False)
+
+
+def _write_page(tmp_path, manifest, index, data=b"page"):
+    filename = f"page_{index:03d}.jpeg"
+    (tmp_path / filename).write_bytes(data)
+    manifest.mark_done(index, filename, len(data), "image/jpeg", "abc")
+
+
+def test_save_and_load_roundtrip(tmp_path, manifest, book):
+    """Тест: записи страниц сохраняются и читаются обратно."""
+    _write_page(tmp_path, manifest, 0)
+    manifest.mark_failed(1)
+
+    assert manifest.save() is True
+    assert not list(tmp_path.glob("*.part"))
+    data = json.loads((tmp_path / config.DOWNLOAD_MANIFEST_FILE).read_text("utf-8"))
+    assert data["book"] == book
+    assert data["pages"]["0"] == {
+        "status": STATUS_DONE,
+        "file": "page_000.jpeg",
+        "size": 4,
+        "content_type": "image/jpeg",
+        "sha256": "abc",
+    }
+
+    loaded = open_manifest(tmp_path, book, resume=True)
+    assert loaded.pages[0]["status"] == STATUS_DONE
+    assert loaded.pages[1] == {"status": STATUS_FAILED}
+
+
+def test_pending_pages(tmp_path, manifest):
+    """Тест: нескачанные, неудачные, пропавшие и измененные страницы."""
+    _write_page(tmp_path, manifest, 0)
+    _write_page(tmp_path, manifest, 1)
+    manifest.mark_failed(2)
+    assert manifest.pending_pages() == [2]
+
+    (tmp_path / "page_000.jpeg").unlink()
+    (tmp_path / "page_001.jpeg").write_bytes(b"truncated page")
+    assert manifest.pending_pages() == [0, 1, 2]
+
+
+def test_load_ignores_other_book(tmp_path, manifest, book):
+    """Тест: манифест другой книги не используется для докачки."""
+    _write_page(tmp_path, manifest, 0)
+    manifest.save()
+
+    other = dict(book, filename_pdf="other.pdf")
+    assert open_manifest(tmp_path, other, resume=True).pages == {}
+    # Без докачки существующий манифест не читается
+    assert open_manifest(tmp_path, book, resume=False).pages == {}
+
+
+def test_load_corrupted_manifest(tmp_path, book):
+    (tmp_path / config.DOWNLOAD_MANIFEST_FILE).write_text("{not json", "utf-8")
+    loaded = open_manifest(tmp_path, book, resume=True)
+    assert loaded.pages == {}
+    assert loaded.pending_pages() == [0, 1, 2]
+
+
+def test_periodic_save(tmp_path, book, mocker):
+    """Тест: манифест сохраняется каждые MANIFEST_SAVE_INTERVAL записей."""
+    mocker.patch("src.manifest.config.MANIFEST_SAVE_INTERVAL", 2)
+    manifest = DownloadManifest(tmp_path / "m.json", book)
+    mock_save = mocker.patch.object(manifest, "save")
+
+    manifest.mark_failed(0)
+    mock_save.assert_not_called()
+    manifest.mark_failed(1)
+    mock_save.assert_called_once()
+
+
+def test_save_error_is_not_fatal(tmp_path, book):
+    manifest = DownloadManifest(tmp_path / "missing_dir" / "m.json", book)
+    assert manifest.save() is False
+
+
+def test_read_page_hashes(tmp_path, manifest):
+    """Тест: хэши только у скачанных страниц, не измененных после манифеста."""
+    _write_page(tmp_path, manifest, 0)
+    _write_page(tmp_path, manifest, 1)
+    _write_page(tmp_path, manifest, 2)
+    manifest.mark_failed(2)
+    manifest.save()
+    stat = (tmp_path / "page_000.jpeg").stat()
+    edited = tmp_path / "page_001.jpeg"
+    later = (tmp_path / config.DOWNLOAD_MANIFEST_FILE).stat().st_mtime_ns + 10**9
+    os.utime(edited, ns=(later, later))
+
+    hashes = read_page_hashes(tmp_path)
+
+    assert hashes == {"page_000.jpeg": (stat.st_size, stat.st_mtime_ns, "abc")}
+    assert read_page_hashes(tmp_path / "missing") == {}
@@ -0,0 +1,143 @@
+# tests/test_page_cache.py
+import hashlib
+import os
+
+import pytest
+
+from src import config
+from src.page_cache import PageCache, create_page_cache
+
+URL = "https://elib.rgo.ru/safe-view/1/2/Ym9vay5wZGYvMA=="
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PageCache(tmp_path / "cache", max_age=60, max_bytes=1024)
+
+
+@pytest.fixture
+def page_file(tmp_path):
+    path = tmp_path / "page_000.jpeg"
+    path.write_bytes(b"page data")
+    return path
+
+
+def _store(cache, url, path, etag='"v1"'):
+    data = path.read_bytes()
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert cache.store(
+        url,
+        path,
+        etag,
+        "Mon, 01 Jan 2024 00:00:00 GMT",
+        "image/jpeg",
+        sha256,
+        len(data),
+    )
+    return sha256
+
+
+def test_store_and_lookup(cache, page_file, tmp_path):
+    """Тест: запись находится по URL, содержимое восстанавливается."""
+    assert cache.lookup(URL) is None
+    sha256 = _store(cache, URL, page_file)
+
+    entry = cache.lookup(URL)
+    assert entry["sha256"] == sha256
+    assert entry["content_type"] == "image/jpeg"
+    assert cache.is_fresh(entry)
+
+    target = tmp_path / "other_dir_page.jpeg"
+    assert cache.restore(entry, target) == len(b"page data")
+    assert target.read_bytes() == b"page data"
+    assert not list(tmp_path.rglob("*.part"))
+
+
+def test_identical_pages_share_blob(cache, page_file):
+    _store(cache, URL, page_file)
+    _store(cache, URL + "x", page_file)
+    assert len(list((cache.root / "blobs").glob("*/*"))) == 1
+
+
+def test_conditional_headers(cache, page_file):
+    _store(cache, URL, page_file)
+    assert PageCache.conditional_headers(cache.lookup(URL)) == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert PageCache.conditional_headers(None) == {}
+
+
+def test_stale_entry_and_revalidation(cache, page_file, mocker):
+    """Тест: устаревшая запись обновляется после 304."""
+    _store(cache, URL, page_file)
+    entry = cache.lookup(URL)
+    mocker.patch("src.page_cache.time.time", return_value=entry["checked_at"] + 61)
+    assert not cache.is_fresh(entry)
+
+    cache.mark_revalidated(entry, '"v2"', None)
+
+    updated = cache.lookup(URL)
+    assert updated["etag"] == '"v2"'
+    assert updated["last_modified"] == entry["last_modified"]
+    assert cache.is_fresh(updated)
+
+
+def test_max_age_zero_always_revalidates(tmp_path, page_file):
+    cache = PageCache(tmp_path / "cache", max_age=0)
+    _store(cache, URL, page_file)
+    assert not cache.is_fresh(cache.lookup(URL))
+
+
+def test_missing_or_broken_blob_is_ignored(cache, page_file):
+    sha256 = _store(cache, URL, page_file)
+    blob = cache.root / "blobs" / sha256[:2] / sha256
+    blob.write_bytes(b"short")
+    assert cache.lookup(URL) is None
+    blob.unlink()
+    assert cache.lookup(URL) is None
+
+
+def test_broken_entry_is_ignored(cache, page_file):
+    _store(cache, URL, page_file)
+    (entry_path,) = (cache.root / "entries").glob("*.json")
+    entry_path.write_text("{broken", "utf-8")
+    assert cache.lookup(URL) is None
+
+
+def test_prune_removes_least_recently_used(cache, tmp_path):
+    """Тест: при превышении max_bytes удаляется самое старое содержимое."""
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"p{i}.jpeg"
+        path.write_bytes(bytes([i]) * 600)
+        _store(cache, f"{URL}{i}", path)
+        paths.append(path)
+    blobs = {
+        i: cache.root / "blobs" / cache.lookup(f"{URL}{i}")["sha256"][:2]
+        for i in range(3)
+    }
+    for i, blob_dir in blobs.items():
+        (blob,) = blob_dir.glob("*")
+        os.utime(blob, (1000 + i, 1000 + i))
+
+    assert cache.prune() == 2
+    assert cache.lookup(f"{URL}0") is None
+    assert cache.lookup(f"{URL}1") is None
+    assert cache.lookup(f"{URL}2") is not None
+
+
+def test_store_error_is_not_fatal(cache, tmp_path):
+    assert not cache.store(URL, tmp_path / "missing.jpeg", None, None, "", "ab" * 32, 1)
+
+
+def test_create_page_cache(mocker, tmp_path):
+    mocker.patch("src.page_cache.config.PAGE_CACHE_DIR", str(tmp_path))
+    mocker.patch("src.page_cache.config.PAGE_CACHE_ENABLED", True)
+    cache = create_page_cache()
+    assert cache.root == tmp_path
+    assert cache.max_age == config.PAGE_CACHE_MAX_AGE
+
+    mocker.patch("src.page_cache.config.PAGE_CACHE_ENABLED", False)
+    assert create_page_cache() is None
+    assert create_page_cache(enabled=True).root == tmp_path
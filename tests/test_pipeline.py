@@ -0,0 +1,130 @@
+# tests/test_pipeline.py
+import logging
+from pathlib import Path
+import threading
+from unittest.mock import MagicMock
+
+from PIL import Image
+import pytest
+
+from src import config, utils
+from src.image_processing import process_page_feed
+from src.pipeline import PageFeed
+
+
+@pytest.fixture
+def stop_event():
+    return threading.Event()
+
+
+@pytest.fixture
+def feed(stop_event):
+    return PageFeed(4, stop_event, poll_interval=0.01)
+
+
+def test_feed_orders_pages(feed):
+    """Тест: страницы доступны по порядку, даже если пришли вразнобой."""
+    feed.page_done(1, Path("p1"))
+    feed.page_done(0, Path("p0"))
+    feed.page_done(3, Path("p3"))
+
+    assert feed.has(1)
+    assert [feed[0], feed[1]] == [Path("p0"), Path("p1")]
+    feed.page_done(2, Path("p2"))
+    assert feed.has(3)
+    assert feed[3] == Path("p3")
+    assert not feed.has(4)
+
+
+def test_feed_skips_failed_pages(feed):
+    """Тест: неудачные страницы пропускаются и уменьшают total."""
+    feed.page_done(0, Path("p0"))
+    feed.page_done(1, None)
+    assert feed.total == 3
+
+    feed.page_done(2, Path("p2"))
+    feed.page_done(3, Path("p3"))
+    assert feed.has(2)
+    assert [feed[0], feed[1], feed[2]] == [Path("p0"), Path("p2"), Path("p3")]
+    assert not feed.has(3)
+
+
+def test_feed_ignores_repeated_results(feed):
+    feed.page_done(0, Path("p0"))
+    feed.page_done(0, None)
+    feed.page_done(1, Path("p1"))
+    feed.page_done(1, Path("again"))
+    assert feed.total == 4
+    assert [feed[0], feed[1]] == [Path("p0"), Path("p1")]
+
+
+def test_feed_close_releases_waiting_reader(feed):
+    """Тест: после close() ожидание заканчивается, доступны готовые страницы."""
+    feed.page_done(0, Path("p0"))
+    feed.page_done(2, Path("p2"))  # Страница 1 так и не пришла
+    result = {}
+
+    reader = threading.Thread(target=lambda: result.update(has=feed.has(2)))
+    reader.start()
+    feed.close()
+    reader.join(timeout=5)
+
+    assert result == {"has": False}
+    assert feed.total == 2
+    assert feed[1] == Path("p2")
+
+
+def test_feed_has_waits_for_page(feed):
+    """Тест: has() ждет, пока страница не будет скачана."""
+    timer = threading.Timer(0.05, feed.page_done, args=(0, Path("p0")))
+    timer.start()
+    assert feed.has(0)
+    timer.join()
+
+
+def test_feed_has_returns_on_stop(feed, stop_event):
+    stop_event.set()
+    assert not feed.has(0)
+
+
+def _write_page(path, size):
+    Image.new("RGB", size, "white").save(path)
+    return path
+
+
+def test_process_page_feed_builds_spreads_while_downloading(tmp_path, stop_event):
+    """Тест: развороты создаются из страниц, поступающих из другого потока."""
+    pages_dir = tmp_path / "pages"
+    pages_dir.mkdir()
+    spreads_dir = tmp_path / "spreads"
+    feed = PageFeed(5, stop_event, poll_interval=0.01)
+
+    def download():
+        for i in (1, 0, 2, 4):  # Вразнобой, страница 3 не скачалась
+            path = pages_dir / f"page_{i:03d}.jpg"
+            feed.page_done(i, _write_page(path, (60, 100)))
+        feed.page_done(3, None)
+        feed.close()
+
+    downloader = threading.Thread(target=download)
+    downloader.start()
+    result = process_page_feed(
+        feed,
+        str(spreads_dir),
+        MagicMock(),
+        MagicMock(),
+        stop_event,
+        config,
+        utils,
+        logging.getLogger("test"),
+    )
+    downloader.join()
+
+    assert result == (4, 1)
+    assert sorted(p.name for p in spreads_dir.glob("*.jpg")) == [
+        "000.jpg",
+        "001-002.jpg",
+        "004.jpg",
+    ]
+    with Image.open(spreads_dir / "001-002.jpg") as spread:
+        assert spread.size == (120, 100)
@@ -0,0 +1,95 @@
+# tests/test_progress.py
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.progress import ProgressReporter, ProgressStats, format_progress
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+def _sent(callback):
+    return [c[0][0].current for c in callback.call_args_list]
+
+
+def test_reporter_throttles_by_percent_and_interval(clock):
+    """Тест: промежуточные обновления - при смене процента и не чаще интервала."""
+    callback = MagicMock()
+    reporter = ProgressReporter(callback, min_interval=1.0, clock=clock)
+
+    reporter(0, 400)  # Первое - всегда
+    for current in range(1, 400):
+        clock.now += 0.1
+        reporter(current, 400)
+    reporter(400, 400)  # Последнее - всегда
+
+    sent = _sent(callback)
+    assert sent[0] == 0
+    assert sent[-1] == 400
+    assert len(sent) < 50
+    assert all(b - a >= 10 for a, b in zip(sent[:-2], sent[1:-1]))  # >= 1 секунды
+
+
+def test_reporter_skips_same_percent(clock):
+    callback = MagicMock()
+    reporter = ProgressReporter(callback, min_interval=0, clock=clock)
+    for current in range(10):
+        clock.now += 1
+        reporter(current, 1000)  # Все в пределах 1%
+    assert _sent(callback) == [0]
+
+
+def test_reporter_rate_eta_and_bytes(clock):
+    """Тест: скорость, МБ/с и оставшееся время по окну отметок."""
+    callback = MagicMock()
+    done_bytes = {"value": 0}
+    reporter = ProgressReporter(
+        callback, bytes_source=lambda: done_bytes["value"], min_interval=0, clock=clock
+    )
+    reporter(0, 100)
+    clock.now = 10.0
+    done_bytes["value"] = 20 * 1024**2
+    reporter(20, 100)
+
+    stats = callback.call_args[0][0]
+    assert stats.items_per_second == pytest.approx(2.0)
+    assert stats.bytes_per_second == pytest.approx(2 * 1024**2)
+    assert stats.eta_seconds == pytest.approx(40.0)
+    assert (
+        format_progress(stats) == "20/100 (20%) · 2.0 стр/с · 2.0 МБ/с · осталось 00:40"
+    )
+
+
+def test_reporter_restarts_for_new_task(clock):
+    """Тест: новая задача (другой total) считается с нуля и сразу видна."""
+    callback = MagicMock()
+    reporter = ProgressReporter(callback, min_interval=10, clock=clock)
+    reporter(0, 10)
+    clock.now = 5
+    reporter(10, 10)
+    clock.now = 6
+    reporter(0, 4)
+
+    stats = callback.call_args[0][0]
+    assert (stats.current, stats.total) == (0, 4)
+    assert stats.eta_seconds is None
+
+
+def test_format_progress_without_rate():
+    assert format_progress(ProgressStats(0, 0, 0.0, None, None)) == "0/0 (0%)"
+    assert (
+        format_progress(ProgressStats(5, 5, 1.0, None, 0.0)) == "5/5 (100%) · 1.0 стр/с"
+    )
+    stats = ProgressStats(1, 9000, 1.0, None, 8999.0)
+    assert format_progress(stats).endswith("осталось 2:29:59")
@@ -0,0 +1,139 @@
+# tests/test_rate_limiter.py
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src import config
+from src.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+
+class FakeClock:
+    """Управляемые часы для детерминированных тестов."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock):
+    return AdaptiveRateLimiter(
+        initial_rate=2.0, min_rate=0.5, max_rate=4.0, burst=1.0, clock=clock
+    )
+
+
+# --- parse_retry_after ---
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("5", 5.0),
+        (" 2.5 ", 2.5),
+        ("-3", 0.0),
+        ("100000", config.RATE_LIMIT_MAX_RETRY_AFTER),
+        ("not a date", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    seconds = parse_retry_after(format_datetime(retry_at, usegmt=True))
+    assert 25 <= seconds <= 30
+
+
+# --- AdaptiveRateLimiter ---
+def test_reserve_paces_requests(limiter, clock):
+    """Тест: после исчерпания корзины запросы идут с интервалом 1/rate."""
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == pytest.approx(0.5)
+    assert limiter.reserve() == pytest.approx(1.0)
+    clock.now += 10  # Корзина снова полна
+    assert limiter.reserve() == 0.0
+
+
+def test_fast_success_increases_rate(limiter):
+    for _ in range(3):
+        limiter.record(200, 0.1)
+    assert limiter.rate == pytest.approx(2.0 + 3 * config.RATE_LIMIT_INCREASE_RPS)
+
+
+def test_rate_is_capped_by_max(limiter):
+    for _ in range(100):
+        limiter.record(200, 0.1)
+    assert limiter.rate == 4.0
+
+
+@pytest.mark.parametrize("status", [429, 500, 503, None])
+def test_throttling_and_errors_decrease_rate(limiter, status):
+    limiter.record(status, 0.1)
+    assert limiter.rate == pytest.approx(2.0 * config.RATE_LIMIT_DECREASE_FACTOR)
+
+
+def test_rate_is_floored_by_min(limiter):
+    for _ in range(20):
+        limiter.record(503, 0.1)
+    assert limiter.rate == 0.5
+
+
+def test_client_error_keeps_rate(limiter):
+    limiter.record(404, 0.1)
+    assert limiter.rate == 2.0
+
+
+def test_rising_latency_decreases_rate(limiter):
+    limiter.record(200, 1.0)
+    rate_after_first = limiter.rate
+    limiter.record(200, 1.0 * config.RATE_LIMIT_LATENCY_FACTOR + 1)
+    assert limiter.rate == pytest.approx(
+        rate_after_first * config.RATE_LIMIT_DECREASE_FACTOR
+    )
+
+
+def test_small_latency_jitter_is_ignored(limiter):
+    """Тест: рост задержки ниже порога не считается перегрузкой."""
+    limiter.record(200, 0.01)
+    limiter.record(200, 0.05)
+    assert limiter.rate > 2.0
+
+
+def test_retry_after_blocks_tokens(limiter, clock):
+    limiter.reserve()
+    limiter.record(429, 0.1, retry_after=30)
+    assert limiter.reserve() == pytest.approx(30.0)
+    clock.now += 31
+    assert limiter.reserve() == 0.0
+
+
+def test_acquire_waits_on_stop_event(limiter):
+    stop_event = MagicMock(spec=threading.Event)
+    stop_event.wait.return_value = False
+    assert limiter.acquire(stop_event) is True
+    stop_event.wait.assert_not_called()  # Первый токен без ожидания
+
+    assert limiter.acquire(stop_event) is True
+    stop_event.wait.assert_called_once_with(pytest.approx(0.5))
+
+
+def test_acquire_interrupted_by_stop(limiter):
+    stop_event = threading.Event()
+    stop_event.set()
+    limiter.reserve()
+    assert limiter.acquire(stop_event) is False
+
+
+def test_default_rate_matches_old_delay():
+    assert AdaptiveRateLimiter().rate == pytest.approx(1 / config.DEFAULT_DELAY_SECONDS)
@@ -0,0 +1,67 @@
+# tests/test_startup.py
+import builtins
+import itertools
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+from src import startup
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_gui_startup_does_not_import_heavy_modules(tmp_path):
+    """Тест: окно запускается без requests, Pillow и asyncio."""
+    code = (
+        "import sys, src.main; from src import startup; "
+        "print(startup.loaded_heavy_modules())"
+    )
+    env = {**os.environ, "PYTHONPATH": str(PROJECT_ROOT)}
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,  # parsing.log пишется сюда
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_startup_timer_report():
+    clock = iter([0.0, 0.25, 0.375]).__next__
+    timer = startup.StartupTimer(clock=clock)
+    timer.mark("imports")
+    timer.mark("ui")
+    assert timer.report() == "imports 0.250 s, ui 0.125 s (total 0.375 s)"
+
+
+def test_import_profiler_self_and_cumulative(tmp_path, monkeypatch):
+    """Тест: время вложенного импорта не входит в собственное время родителя."""
+    package = tmp_path / "profiled_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "outer.py").write_text("from . import inner\n")
+    (package / "inner.py").write_text("VALUE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    ticks = itertools.count()
+    profiler = startup.ImportProfiler(clock=lambda: float(next(ticks)))
+    original_import = builtins.__import__
+
+    profiler.start()
+    try:
+        import profiled_pkg.outer
+    finally:
+        profiler.stop()
+        for name in [m for m in sys.modules if m.startswith("profiled_pkg")]:
+            del sys.modules[name]
+
+    assert builtins.__import__ is original_import
+    own, cumulative = profiler.timings["profiled_pkg.outer"]
+    inner_own, inner_cumulative = profiler.timings["profiled_pkg.inner"]
+    assert inner_own == inner_cumulative
+    assert cumulative == own + inner_cumulative
+    report = profiler.report(top=1)
+    assert report.splitlines()[1].endswith("| profiled_pkg.outer")
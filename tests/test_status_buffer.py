@@ -0,0 +1,58 @@
+# tests/test_status_buffer.py
+import threading
+import time
+
+from src.status_buffer import StatusBuffer
+
+
+def test_drain_returns_lines_in_order_once():
+    buffer = StatusBuffer(clock=lambda: time.strptime("12:34:56", "%H:%M:%S"))
+    buffer.put("Скачивание начато")
+    buffer.put("Страница 1")
+
+    assert buffer.drain() == [
+        "[12:34:56] Скачивание начато\n",
+        "[12:34:56] Страница 1\n",
+    ]
+    assert buffer.drain() == []
+
+
+def test_put_from_many_threads():
+    """Тест: сообщения из разных потоков не теряются."""
+    buffer = StatusBuffer(max_lines=5000)
+    threads = [
+        threading.Thread(
+            target=lambda n=n: [buffer.put(f"{n}:{i}") for i in range(500)]
+        )
+        for n in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    drained = buffer.drain()  # Забираем во время записи
+    for thread in threads:
+        thread.join()
+    drained += buffer.drain()
+
+    assert len(drained) == 2000
+    for n in range(4):
+        own = [line.split("] ")[1] for line in drained if f"] {n}:" in line]
+        assert own == [f"{n}:{i}\n" for i in range(500)]
+
+
+def test_overflow_keeps_last_lines_and_reports_dropped(mocker):
+    """Тест: при переполнении остаются последние строки и счетчик выпавших."""
+    mocker.patch("src.status_buffer.config.LOG_FILE", "parsing.log")
+    buffer = StatusBuffer(max_lines=3)
+    for i in range(5):
+        buffer.put(f"msg {i}")
+
+    lines = buffer.drain()
+
+    assert lines[0] == "... пропущено строк: 2, полный журнал: parsing.log\n"
+    assert [line.split("] ")[1] for line in lines[1:]] == [
+        "msg 2\n",
+        "msg 3\n",
+        "msg 4\n",
+    ]
+    buffer.put("next")
+    assert len(buffer.drain()) == 1  # Счетчик сброшен
@@ -1012,3 +1012,181 @@ def test_thread_wrapper_stop_event_is_set_for_checks(task_manager, mock_deps):
 
     # 6. Убедимся, что is_set был вызван трижды (179, 191, 202)
     assert mock_deps["stop_event"].is_set.call_count == 3
+
+
+# --- Тесты конвейерного режима _run_all_pipelined ---
+
+
+@pytest.fixture
+def inline_processor(mock_deps):
+    """Поток обработки выполняется сразу при start() (обработка замокана)."""
+
+    def make_thread(*args, target=None, **kwargs):
+        thread = MagicMock(name="ProcessorThread")
+        thread.start.side_effect = target
+        return thread
+
+    mock_deps["thread_class"].side_effect = make_thread
+    mock_deps["handler"].process_page_feed.return_value = (10, 5)
+    return mock_deps
+
+
+def test_start_all_uses_pipeline_when_enabled(task_manager, mock_deps, mocker):
+    """Тест: при config.PIPELINED_ALL start_all запускает конвейер."""
+    mocker.patch("src.task_manager.config.PIPELINED_ALL", True)
+    task_manager.start_all()
+    captured_args = mock_deps["thread_targets"]["args"]
+    assert captured_args[0] == task_manager._run_all_pipelined
+
+
+def test_run_all_pipelined_success(task_manager, inline_processor):
+    """Тест: страницы передаются обработке по мере скачивания."""
+    mock_deps = inline_processor
+    handler = mock_deps["handler"]
+
+    task_manager._run_all_pipelined(
+        "base", "ids", "doc.pdf", 10, "/path/to/pages", "/path/to/spreads"
+    )
+
+    feed, spreads_dir, _ = handler.process_page_feed.call_args[0]
+    assert spreads_dir == "/path/to/spreads"
+    handler.download_pages.assert_called_once_with(
+        "base",
+        "ids",
+        "doc.pdf",
+        10,
+        "/path/to/pages",
+        page_done_callback=feed.page_done,
+    )
+    handler.process_images.assert_not_called()
+    final_msg = "Скачивание (10/10) и обработка (10 файлов, 5 разворотов) завершены."
+    mock_deps["status_cb"].assert_has_calls(
+        [
+            call("--- НАЧАЛО: Скачивание страниц и создание разворотов ---"),
+            call(f"--- {final_msg} ---"),
+        ]
+    )
+    mock_deps["show_message_cb"].assert_called_once_with("info", "Завершено", final_msg)
+    mock_deps["open_folder_cb"].assert_called_once_with("/path/to/spreads")
+
+
+def test_run_all_pipelined_contact_sheet(task_manager, inline_processor, mocker):
+    """Тест: при config.CONTACT_SHEET_ENABLED после склейки создаются миниатюры."""
+    mocker.patch("src.task_manager.config.CONTACT_SHEET_ENABLED", True)
+    handler = inline_processor["handler"]
+
+    task_manager._run_all_pipelined("b", "i", "f", 10, "pages", "spreads")
+
+    handler.create_contact_sheets.assert_called_once_with("pages", "spreads")
+
+
+def test_run_all_pipelined_progress_after_download(task_manager, inline_processor):
+    """Тест: прогресс обработки показывается только после скачивания."""
+    mock_deps = inline_processor
+    handler = mock_deps["handler"]
+
+    def process(feed, spreads_dir, progress):
+        progress(1, 10)  # Скачивание еще идет
+        return (10, 5)
+
+    handler.process_page_feed.side_effect = process
+    task_manager._run_all_pipelined("b", "i", "f", 10, "pages", "spreads")
+    mock_deps["progress_cb"].assert_not_called()
+
+    # После скачивания прогресс обработки пересылается
+    progress = handler.process_page_feed.call_args[0][2]
+    progress(7, 10)
+    mock_deps["progress_cb"].assert_called_once_with(7, 10)
+
+
+def test_run_all_pipelined_partial_download(task_manager, inline_processor):
+    """Тест: при ошибках скачивания развороты строятся из скачанного."""
+    mock_deps = inline_processor
+    mock_deps["handler"].download_pages.return_value = (8, 10)
+    mock_deps["handler"].process_page_feed.return_value = (8, 4)
+
+    task_manager._run_all_pipelined("b", "i", "f", 10, "pages", "spreads")
+
+    mock_deps["show_message_cb"].assert_has_calls(
+        [
+            call(
+                "warning",
+                "Скачивание с ошибками",
+                "Скачано 8 из 10 страниц.\nРазвороты созданы из скачанных файлов.",
+            ),
+            call(
+                "info",
+                "Завершено",
+                "Скачивание (8/10) и обработка (8 файлов, 4 разворотов) завершены.",
+            ),
+        ]
+    )
+
+
+def test_run_all_pipelined_zero_pages(task_manager, inline_processor):
+    """Тест: если ничего не скачано, сообщается об ошибке скачивания."""
+    mock_deps = inline_processor
+    mock_deps["handler"].download_pages.return_value = (0, 10)
+    mock_deps["handler"].process_page_feed.return_value = (0, 0)
+
+    task_manager._run_all_pipelined("b", "i", "f", 10, "pages", "spreads")
+
+    mock_deps["status_cb"].assert_any_call(
+        "--- Скачивание не удалось (0 страниц), развороты не созданы ---"
+    )
+    assert mock_deps["show_message_cb"].call_args[0][:2] == (
+        "error",
+        "Ошибка скачивания",
+    )
+    mock_deps["open_folder_cb"].assert_not_called()
+
+
+def test_run_all_pipelined_stopped(task_manager, inline_processor):
+    """Тест: после СТОП итоговые сообщения не показываются."""
+    mock_deps = inline_processor
+
+    def download_and_stop(*args, **kwargs):
+        mock_deps["stop_event"].is_set.return_value = True
+        return (5, 10)
+
+    mock_deps["handler"].download_pages.side_effect = download_and_stop
+    task_manager._run_all_pipelined("b", "i", "f", 10, "pages", "spreads")
+
+    mock_deps["status_cb"].assert_called_with("--- Скачивание и обработка прерваны ---")
+    mock_deps["show_message_cb"].assert_not_called()
+
+
+def test_run_all_pipelined_processing_error(task_manager, inline_processor):
+    """Тест: ошибка потока обработки перебрасывается после скачивания."""
+    mock_deps = inline_processor
+    mock_deps["handler"].process_page_feed.side_effect = OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        task_manager._run_all_pipelined("b", "i", "f", 10, "pages", "spreads")
+
+    mock_deps["handler"].download_pages.assert_called_once()
+    mock_deps["show_message_cb"].assert_not_called()
+
+
+def test_task_manager_creates_handler_lazily(mock_deps):
+    """Тест: обработчик создается фабрикой только при первой задаче."""
+    factory = MagicMock(return_value=mock_deps["handler"])
+    tm = TaskManager(
+        app_state=mock_deps["app_state"],
+        handler=None,
+        stop_event=mock_deps["stop_event"],
+        status_callback=mock_deps["status_cb"],
+        progress_callback=mock_deps["progress_cb"],
+        set_buttons_state_callback=mock_deps["set_buttons_state_cb"],
+        show_message_callback=mock_deps["show_message_cb"],
+        open_folder_callback=mock_deps["open_folder_cb"],
+        root=mock_deps["root"],
+        handler_factory=factory,
+    )
+    factory.assert_not_called()
+
+    tm.start_download()
+    tm.start_download()  # Повторно фабрика не вызывается
+
+    factory.assert_called_once_with()
+    assert tm.handler is mock_deps["handler"]
@@ -147,6 +147,30 @@ def test_is_likely_spread_zero_height(mock_image_open, caplog):
     assert f"Image has zero height: {image_path}" in caplog.text
 
 
+# --- Тесты для get_image_info ---
+def test_get_image_info_reads_header_once(tmp_path, mocker):
+    """Тест: повторная проверка той же страницы не открывает файл."""
+    image_path = tmp_path / "page_001.jpg"
+    Image.new("L", (300, 200)).save(image_path)
+    spy_open = mocker.spy(Image, "open")
+
+    info = utils.get_image_info(image_path)
+    assert info == utils.ImageInfo(300, 200, "L", "JPEG")
+    assert utils.is_likely_spread(image_path, threshold=1.2) is True
+    assert utils.is_likely_spread(str(image_path), threshold=2.0) is False
+    assert spy_open.call_count == 1
+
+
+def test_get_image_info_rereads_changed_file(tmp_path):
+    """Тест: после перезаписи файла размеры читаются заново."""
+    image_path = tmp_path / "page_002.png"
+    Image.new("RGB", (100, 100)).save(image_path)
+    assert utils.get_image_info(image_path)[:2] == (100, 100)
+
+    Image.new("RGB", (250, 100)).save(image_path)
+    assert utils.get_image_info(image_path)[:2] == (250, 100)
+
+
 # --- Тесты для resource_path ---
 @pytest.fixture
 def mock_sys_meipass(mocker, tmp_path):
@@ -537,3 +561,28 @@ def test_setup_logging_handler_error(
     assert log_file_path in captured.err
     assert error_message in captured.err
     assert "FATAL:" not in captured.out
+
+
+# --- Тесты для open_in_system_app ---
+@pytest.mark.parametrize(
+    "platform, command", [("darwin", "open"), ("linux", "xdg-open")]
+)
+def test_open_in_system_app_posix(mocker, platform, command):
+    """Тест: на macOS и Linux файл открывается внешней командой."""
+    mocker.patch.object(utils.sys, "platform", platform)
+    mock_popen = mocker.patch("src.utils.subprocess.Popen")
+
+    utils.open_in_system_app(Path("logs") / "app.log")
+
+    mock_popen.assert_called_once_with([command, str(Path("logs") / "app.log")])
+
+
+def test_open_in_system_app_windows(mocker):
+    mocker.patch.object(utils.sys, "platform", "win32")
+    mock_startfile = mocker.patch("src.utils.os.startfile", create=True)
+    mock_popen = mocker.patch("src.utils.subprocess.Popen")
+
+    utils.open_in_system_app("app.log")
+
+    mock_startfile.assert_called_once_with("app.log")
+    mock_popen.assert_not_called()